@@ -0,0 +1,177 @@
+"""Balance tables loaded from JSON files in the Wild Rails folder
+
+Each table lives in its own file so a hot reload only re-reads and
+re-validates what changed.  The tables are module-level dicts that are
+updated in place, so code that imported them keeps seeing current
+values.  A file that fails validation raises BalanceError and leaves the
+table it would have replaced untouched.
+"""
+import json
+import os
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Wild Rails")
+DEFAULT_CHARACTER = "Torcher"  # Every profile starts with it, so it must always exist
+
+RARITIES = {}
+CHARACTERS = {}
+ENEMY_TYPES = {}
+WAVES = {}
+
+COLOR = "color"    # Field type: [r, g, b] with components 0-255
+NUMBER = "number"  # Field type: int or float
+
+# Field name -> (type, required, minimum)
+RARITY_FIELDS = {
+    "color": (COLOR, True, None),
+    "chance": (NUMBER, True, 0),
+}
+CHARACTER_FIELDS = {
+    "name": (str, True, None),
+    "image": (str, True, None),
+    "damage": (int, True, 1),
+    "projectiles": (int, True, 1),
+    "pierce": (int, False, 0),
+    "price": (int, True, 0),
+    "rarity": (str, True, None),
+    "description": (str, True, None),
+    "is_melee": (bool, False, None),
+    "melee_range": (int, False, 1),
+    "melee_color": (COLOR, False, None),
+    "is_aoe": (bool, False, None),
+    "aoe_radius": (int, False, 1),
+}
+ENEMY_FIELDS = {
+    "name": (str, True, None),
+    "image": (str, True, None),
+    "base_hp": (int, True, 1),
+    "rarity": (str, True, None),
+    "speed_multiplier": (NUMBER, True, 0),
+}
+WAVE_FIELDS = {
+    "first_wave_size": (int, True, 1),
+    "second_wave_increase": (int, True, 0),
+    "wave_growth": (NUMBER, True, 1),
+    "zombie_base_hp": (int, True, 1),
+    "zombie_hp_growth": (NUMBER, True, 1),
+    "zombie_speed": (NUMBER, True, 0),
+    "spawn_delay": (int, True, 1),
+    "bonds_per_zombie": (int, True, 0),
+}
+
+# Table name -> (dict, file name, fields, keyed by id)
+TABLES = {
+    "rarities": (RARITIES, "rarities.json", RARITY_FIELDS, True),
+    "characters": (CHARACTERS, "characters.json", CHARACTER_FIELDS, True),
+    "enemy_types": (ENEMY_TYPES, "enemy_types.json", ENEMY_FIELDS, True),
+    "waves": (WAVES, "waves.json", WAVE_FIELDS, False),
+}
+TABLE_FILES = {filename: name for name, (_, filename, _, _) in TABLES.items()}
+
+_loaded_from = None
+
+
+class BalanceError(ValueError):
+    """A balance file is missing, unreadable or doesn't match its schema"""
+
+
+def _check_value(where, value, kind, minimum):
+    if kind == COLOR:
+        if (not isinstance(value, list) or len(value) != 3 or
+                not all(type(c) is int and 0 <= c <= 255 for c in value)):
+            raise BalanceError(f"{where} must be [r, g, b] with 0-255 components")
+        return tuple(value)
+    if kind == NUMBER:
+        ok = type(value) in (int, float)
+    else:
+        ok = type(value) is kind  # bool is an int subclass; don't accept it for ints
+    if not ok:
+        name = kind if kind == NUMBER else kind.__name__
+        raise BalanceError(f"{where} must be {name}, not {type(value).__name__}")
+    if minimum is not None and value < minimum:
+        raise BalanceError(f"{where} must be at least {minimum}")
+    return value
+
+
+def _check_record(where, record, fields):
+    if not isinstance(record, dict):
+        raise BalanceError(f"{where} must be an object")
+    unknown = sorted(set(record) - set(fields))
+    if unknown:
+        raise BalanceError(f"{where} has unknown field(s): {', '.join(unknown)}")
+    checked = {}
+    for field, (kind, required, minimum) in fields.items():
+        if field in record:
+            checked[field] = _check_value(f"{where}.{field}", record[field], kind, minimum)
+        elif required:
+            raise BalanceError(f"{where} is missing {field}")
+    return checked
+
+
+def validate(name, data, rarities=None):
+    """Check one table's parsed JSON against its schema; returns the cleaned table
+
+    References to rarities are checked against rarities (the loaded table
+    by default).
+    """
+    _, filename, fields, keyed = TABLES[name]
+    if not keyed:
+        return _check_record(filename, data, fields)
+    if not isinstance(data, dict) or not data:
+        raise BalanceError(f"{filename} must be a non-empty object of {name}")
+    table = {key: _check_record(f"{filename}: {key}", record, fields) for key, record in data.items()}
+
+    rarities = RARITIES if rarities is None else rarities
+    if name == "rarities":
+        if sum(r["chance"] for r in table.values()) <= 0:
+            raise BalanceError(f"{filename}: at least one rarity needs a chance above 0")
+        # Existing characters and enemies must still have a rarity
+        for other in ("characters", "enemy_types"):
+            for key, record in TABLES[other][0].items():
+                if record["rarity"] not in table:
+                    raise BalanceError(f"{filename} drops rarity {record['rarity']} used by {key}")
+    elif "rarity" in fields:
+        for key, record in table.items():
+            if record["rarity"] not in rarities:
+                raise BalanceError(f"{filename}: {key} has unknown rarity {record['rarity']}")
+    if name == "characters" and DEFAULT_CHARACTER not in table:
+        raise BalanceError(f"{filename} must define {DEFAULT_CHARACTER}")
+    return table
+
+
+def read_table(name, folder=DATA_FOLDER, rarities=None):
+    """Parse and validate one table file without installing it"""
+    path = os.path.join(folder, TABLES[name][1])
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BalanceError(f"Can't read {path}: {e}") from e
+    return validate(name, data, rarities)
+
+
+def load_table(name, folder=DATA_FOLDER):
+    """Read, validate and install one table in place; returns it"""
+    table = TABLES[name][0]
+    data = read_table(name, folder)
+    table.clear()
+    table.update(data)
+    return table
+
+
+def load_tables(folder=DATA_FOLDER):
+    """Load every table, all or nothing"""
+    global _loaded_from
+    rarities = read_table("rarities", folder, rarities={})
+    loaded = {"rarities": rarities}
+    for name in ("characters", "enemy_types", "waves"):
+        loaded[name] = read_table(name, folder, rarities)
+    for name, data in loaded.items():
+        TABLES[name][0].clear()
+        TABLES[name][0].update(data)
+    _loaded_from = folder
+
+
+def ensure_loaded(folder=DATA_FOLDER):
+    """Load the tables on first use"""
+    if _loaded_from is None:
+        load_tables(folder)
@@ -0,0 +1,61 @@
+"""Startup benchmark: time from process launch to the first rendered menu frame
+
+    python bench_startup.py --runs 10
+    python bench_startup.py --headless   # dummy video/audio drivers, for CI
+
+Each run starts a fresh interpreter with game.py --exit-after-first-frame
+and stops the clock when the game prints its first-frame marker, so
+interpreter start-up, imports, subsystem init and asset loading are all
+counted.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from game import STARTUP_MARKER
+
+GAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game.py")
+
+
+def time_startup(env):
+    """Seconds from launching game.py until it reports its first frame"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, GAME, "--exit-after-first-frame"],
+                               stdout=subprocess.PIPE, env=env, text=True)
+    for line in process.stdout:
+        if line.strip() == STARTUP_MARKER:
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        process.wait()
+        raise RuntimeError(f"game.py exited with {process.returncode} before drawing a frame")
+    process.stdout.close()
+    process.wait()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wild Rails startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--headless", action="store_true",
+                        help="Use SDL's dummy video and audio drivers")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.headless:
+        env["SDL_VIDEODRIVER"] = "dummy"
+        env["SDL_AUDIODRIVER"] = "dummy"
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+    time_startup(env)  # Warm the OS file cache so runs are comparable
+    times = [time_startup(env) * 1000 for _ in range(args.runs)]
+    print(f"launch to first menu frame over {args.runs} runs: "
+          f"median {statistics.median(times):.0f} ms, min {min(times):.0f} ms, "
+          f"max {max(times):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Swept projectile-versus-box collision, batched with NumPy
+
+Projectiles are tested along the whole segment they covered during a
+tick instead of at their end point, so nothing tunnels through a zombie
+however fast it moves or however long the frame was.
+"""
+import numpy as np
+
+
+def candidate_pairs(start, end, box_min, box_max):
+    """Index pairs (projectile, box) whose swept bounds overlap the box
+
+    start and end are (P, 2) arrays of segment end points; box_min and
+    box_max are (Z, 2) corners.  Boxes are sorted by left edge so each
+    projectile only looks at the band of boxes its x range can reach,
+    then candidates are filtered on y.
+    """
+    seg_min = np.minimum(start, end)
+    seg_max = np.maximum(start, end)
+    order = np.argsort(box_min[:, 0], kind="stable")
+    lefts = box_min[order, 0]
+    widest = (box_max[:, 0] - box_min[:, 0]).max(initial=0.0)
+    # Boxes whose left edge lies in [seg_min_x - widest, seg_max_x] may overlap in x
+    lo = np.searchsorted(lefts, seg_min[:, 0] - widest, side="left")
+    hi = np.searchsorted(lefts, seg_max[:, 0], side="right")
+    counts = hi - lo
+    projectiles = np.repeat(np.arange(len(start)), counts)
+    offsets = np.cumsum(counts) - counts
+    boxes = order[lo[projectiles] + np.arange(len(projectiles)) - offsets[projectiles]]
+    overlap = ((seg_min[projectiles] <= box_max[boxes]) &
+               (seg_max[projectiles] >= box_min[boxes])).all(axis=1)
+    return projectiles[overlap], boxes[overlap]
+
+
+def sweep(start, delta, box_min, box_max):
+    """Time of impact of start + t * delta (0 <= t <= 1) with each box, row by row
+
+    All arguments are (N, 2).  Uses the slab method: the segment is
+    inside the box where its x and y parameter intervals overlap.
+    Returns an (N,) array of entry times, 0 when the segment starts
+    inside the box and inf where it misses.
+    """
+    parallel = delta == 0
+    inside = (start >= box_min) & (start <= box_max)
+    step = np.where(parallel, 1.0, delta)
+    t1 = (box_min - start) / step
+    t2 = (box_max - start) / step
+    # An axis the segment doesn't move along either always or never overlaps
+    near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+    far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+    enter = near.max(axis=1)
+    leave = far.min(axis=1)
+    hit = (enter <= leave) & (leave >= 0) & (enter <= 1)
+    return np.where(hit, np.maximum(enter, 0.0), np.inf)
+
+
+def swept_hits(start, end, box_min, box_max):
+    """Every projectile/box hit over a tick, ordered by time of impact
+
+    Returns (projectile, box, t) arrays sorted by t.  A projectile's
+    first entry is its earliest hit; its later entries are the boxes it
+    would pass through next, in order, for piercing shots.
+    """
+    start = np.asarray(start, dtype=np.float64).reshape(-1, 2)
+    end = np.asarray(end, dtype=np.float64).reshape(-1, 2)
+    box_min = np.asarray(box_min, dtype=np.float64).reshape(-1, 2)
+    box_max = np.asarray(box_max, dtype=np.float64).reshape(-1, 2)
+    projectiles, boxes = candidate_pairs(start, end, box_min, box_max)
+    times = sweep(start[projectiles], end[projectiles] - start[projectiles],
+                  box_min[boxes], box_max[boxes])
+    hit = np.isfinite(times)
+    projectiles, boxes, times = projectiles[hit], boxes[hit], times[hit]
+    order = np.argsort(times, kind="stable")
+    return projectiles[order], boxes[order], times[order]
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    count_p, count_z = 2000, 2000
+    start = rng.uniform(0, 4000, (count_p, 2))
+    end = start + rng.uniform(-40, 40, (count_p, 2))
+    box_min = rng.uniform(0, 4000, (count_z, 2))
+    box_max = box_min + 48
+    t = time.perf_counter()
+    for _ in range(20):
+        p, z, times = swept_hits(start, end, box_min, box_max)
+    elapsed = (time.perf_counter() - t) / 20
+    print(f"{count_p} projectiles x {count_z} boxes: {len(p)} hits in {elapsed * 1000:.2f} ms")
@@ -0,0 +1,219 @@
+"""Developer console for load injection and live tuning
+
+Backquote opens it in any state.  Commands act directly on the Game:
+
+    spawn 2000 [zombies]       add zombies at the edge of the view
+    wave 40                    jump to a wave (also "set wave 40")
+    fire 500 [in a ring]       shoot a ring of projectiles around the player
+    select Cowboy              play as an owned character
+    toggle collision           switch a subsystem off or on (see SUBSYSTEMS)
+    quality low|medium|high|auto
+    clear                      remove every zombie and projectile
+    help
+
+After each command the console compares the average frame time before
+and after it, so the cost of a load is reported within a second.
+"""
+import collections
+
+import pygame
+
+from balance import CHARACTERS, WAVES
+from quality import QUALITY_LEVELS, quality_index
+from wave_director import next_wave_size
+
+# Game subsystems the console can switch off to isolate their cost
+SUBSYSTEMS = ("movement", "collision", "spawning", "particles", "render", "health_bars", "hud", "deferral")
+REPORT_FRAMES = 60    # Frames averaged before and after a command
+OUTPUT_LINES = 8
+HISTORY_LINES = 50
+LINE_HEIGHT = 22
+MAX_WAVE = 1000       # Highest wave the console jumps to
+MAX_WAVE_SIZE = 100000  # Planned zombies are capped here; later waves grow past what a match can hold
+FILLER_WORDS = {"set", "zombies", "zombie", "projectiles", "projectile", "in", "a", "ring"}
+
+
+class DevConsole:
+    """Toggleable command line drawn over the game"""
+
+    def __init__(self, game):
+        self.game = game
+        self.open = False
+        self.text = ""
+        self.output = collections.deque(maxlen=OUTPUT_LINES)
+        self.history = collections.deque(maxlen=HISTORY_LINES)
+        self.history_index = None
+        self.frame_times = collections.deque(maxlen=REPORT_FRAMES)
+        self.measuring = None  # [command, baseline ms, samples] while a report is pending
+        self.commands = {
+            "spawn": self.spawn,
+            "wave": self.wave,
+            "fire": self.fire,
+            "select": self.select,
+            "toggle": self.toggle,
+            "quality": self.quality,
+            "clear": self.clear,
+            "help": self.help,
+        }
+        self.print("Developer console - type help for commands")
+
+    def print(self, line):
+        self.output.append(line)
+        self.game.dirty = True
+
+    def handle_event(self, event):
+        """Process a key event; returns True if the console consumed it"""
+        if event.type != pygame.KEYDOWN:
+            return False
+        if event.key == pygame.K_BACKQUOTE:
+            self.open = not self.open
+            self.game.dirty = True
+            return True
+        if not self.open:
+            return False
+        if event.key == pygame.K_ESCAPE:
+            self.open = False
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            if self.text.strip():
+                self.history.append(self.text)
+                self.execute(self.text)
+            self.text = ""
+            self.history_index = None
+        elif event.key == pygame.K_BACKSPACE:
+            self.text = self.text[:-1]
+        elif event.key in (pygame.K_UP, pygame.K_DOWN) and self.history:
+            step = -1 if event.key == pygame.K_UP else 1
+            index = len(self.history) if self.history_index is None else self.history_index
+            self.history_index = max(0, min(len(self.history) - 1, index + step))
+            self.text = self.history[self.history_index]
+        elif event.unicode and event.unicode.isprintable():
+            self.text += event.unicode
+        self.game.dirty = True
+        return True
+
+    def execute(self, line):
+        """Run one command line and start measuring its frame time impact"""
+        self.print(f"> {line}")
+        words = [word for word in line.split() if word.lower() not in FILLER_WORDS]
+        if not words:
+            return
+        command = self.commands.get(words[0].lower())
+        if command is None:
+            self.print(f"Unknown command: {words[0]} (try help)")
+            return
+        try:
+            result = command(*words[1:])
+        except (TypeError, ValueError, ArithmeticError, MemoryError) as e:
+            self.print(f"{words[0]}: {e}")
+            return
+        if result:
+            self.print(result)
+        if self.game.state == "playing" and command != self.help:
+            baseline = sum(self.frame_times) / len(self.frame_times) if self.frame_times else None
+            self.measuring = [line, baseline, []]
+
+    def frame(self, frame_ms):
+        """Feed a gameplay frame's work time"""
+        self.frame_times.append(frame_ms)
+        if self.measuring is None:
+            return
+        line, baseline, samples = self.measuring
+        samples.append(frame_ms)
+        if len(samples) < REPORT_FRAMES:
+            return
+        after = sum(samples) / len(samples)
+        if baseline is None:
+            self.print(f"{line}: {after:.1f} ms/frame")
+        else:
+            self.print(f"{line}: {baseline:.1f} -> {after:.1f} ms/frame ({after - baseline:+.1f})")
+        self.measuring = None
+
+    def require_match(self):
+        if self.game.state != "playing":
+            raise ValueError("start a match first")
+
+    # Commands
+
+    def spawn(self, count):
+        self.require_match()
+        sim = self.game.sim
+        count = sim.spawn_many(int(count))
+        return f"Spawned {count} zombies ({len(sim.zombies)} alive)"
+
+    def wave(self, number):
+        self.require_match()
+        number = int(number)
+        if number < 1:
+            raise ValueError("waves start at 1")
+        if number > MAX_WAVE:
+            raise ValueError(f"waves go up to {MAX_WAVE}")
+        size = WAVES["first_wave_size"]
+        for wave in range(2, number + 1):
+            size = min(next_wave_size(wave, size), MAX_WAVE_SIZE)
+        self.game.sim.set_wave(number, size)
+        capped = " (capped)" if size == MAX_WAVE_SIZE else ""
+        return f"Wave {number}: {size} zombies planned{capped}"
+
+    def fire(self, count):
+        self.require_match()
+        count = int(count)
+        sim = self.game.sim
+        sim.fire_ring(self.game.player_id, count)
+        return f"Fired {count} projectiles ({len(sim.projectiles)} in flight)"
+
+    def select(self, name):
+        matches = [key for key in CHARACTERS if key.lower() == name.lower()]
+        if not matches:
+            raise ValueError(f"unknown character {name}; one of {', '.join(CHARACTERS)}")
+        game = self.game
+        if matches[0] not in game.owned_characters:
+            # The selection is saved with the slot, so it can't hand out characters
+            raise ValueError(f"{matches[0]} isn't owned; one of {', '.join(game.owned_characters)}")
+        game.selected_character = matches[0]
+        game.player_img = game.character_imgs[matches[0]]
+        return f"Playing as {matches[0]}"
+
+    def toggle(self, name):
+        if name not in SUBSYSTEMS:
+            raise ValueError(f"unknown subsystem {name}; one of {', '.join(SUBSYSTEMS)}")
+        subsystems = self.game.subsystems
+        subsystems[name] = not subsystems[name]
+        if name in self.game.sim.subsystems:
+            self.game.sim.set_subsystem(name, subsystems[name])
+        return f"{name} {'on' if subsystems[name] else 'off'}"
+
+    def quality(self, name):
+        governor = self.game.quality
+        if name.lower() == "auto":
+            governor.pinned = False
+        else:
+            governor.index = quality_index(name)
+            governor.pinned = True
+        if self.game.sprite_cache is not None:
+            # Match assets were only built for the quality setting at the time
+            self.game.prepare_render_scales([governor.level] if governor.pinned else QUALITY_LEVELS)
+        return f"Quality {governor.label}"
+
+    def clear(self):
+        self.require_match()
+        self.game.sim.clear()
+        return "Cleared zombies and projectiles"
+
+    def help(self):
+        for line in ("spawn N | wave N | fire N | select OWNED_CHARACTER | clear",
+                     f"toggle {'|'.join(SUBSYSTEMS)}",
+                     f"quality {'|'.join(level['name'].lower() for level in QUALITY_LEVELS)}|auto"):
+            self.print(line)
+
+    def draw(self, screen, font):
+        """Output lines and the prompt in a translucent band at the top of the screen"""
+        height = (OUTPUT_LINES + 1) * LINE_HEIGHT + 10
+        band = pygame.Surface((screen.get_width(), height), pygame.SRCALPHA)
+        band.fill((0, 0, 0, 190))
+        screen.blit(band, (0, 0))
+        y = 5
+        for line in self.output:
+            screen.blit(font.render(line, True, (220, 220, 220)), (10, y))
+            y += LINE_HEIGHT
+        y = height - LINE_HEIGHT - 5
+        screen.blit(font.render(f"> {self.text}_", True, (255, 255, 0)), (10, y))
@@ -3,159 +3,51 @@ import sys
 import math
 import random
 import os
-import json
+import sqlite3
+import time
+import argparse
+import logging
+import logging.handlers
+from sprite_cache import SpriteCache
+from quality import QualityGovernor, QUALITY_LEVELS
+from particles import ParticleSystem, PARTICLE_KINDS
+from world import Camera, ChunkCache
+from recorder import FrameRecorder, available_modes
+from telemetry import MatchTelemetry, OUTCOMES, OUTCOME_CLEARED, OUTCOME_DIED, OUTCOME_QUIT
+from simulation import Simulation, AI_BUDGET, PLAYER_SIZE
+from sim_process import SimulationProcess
+from balance import (RARITIES, CHARACTERS, TABLE_FILES, DEFAULT_CHARACTER,
+                     BalanceError, ensure_loaded, load_table)
+from hot_reload import FileWatcher
+from profiles import ProfileStore, DEFAULT_PROFILE, DEFAULT_SLOT
+from console import DevConsole, SUBSYSTEMS
+from metrics import GameMetrics
+from scheduler import FrameScheduler
+from player_input import (PlayerInput, FramePacer, LatencyProbe, PACING_MODES, PLAYING_EVENTS,
+                          PROBE_EVENT)
 
-# Initialize Pygame and audio
-pygame.init()
-pygame.mixer.init()
+log = logging.getLogger("wild_rails")
 
 # Constants
 SCREEN_WIDTH, SCREEN_HEIGHT = 1024, 768
 FPS = 60
-PLAYER_SPEED = 1.5
-PROJECTILE_SPEED = 8
-PROJECTILE_DAMAGE = 10
-ZOMBIE_SPEED = 0.8
+LOG_BUFFER_RECORDS = 256  # Log records held in memory before being written out
+STARTUP_MARKER = "first-frame"  # Printed by --exit-after-first-frame for startup benchmarks
+ALT_IMAGE_FOLDER = "C:\\Users\\kevin\\code\\wild-rails\\Wild Rails"
+MUSIC_FILE = "o-bom-o-mal-e-o-feio-velho-oeste-desafio-dont-talk-duelo-desafio-armas.mp3"
+SHOOT_SOUND_FILE = "westernsilah-online-audio-converter.mp3"
 MAX_INVENTORY = 4  # Maximum number of characters in inventory
+WALK_FRAME_TICKS = 8  # Frames each walk cycle image is shown for
+HEALTH_BAR_FOCUS_RADIUS = 250  # Distance from player/crosshair that keeps health bars at reduced quality
+IDLE_WAKE_MS = 1000  # Longest a static screen sleeps before checking timers again
+RESTOCK_SECONDS = 5 * 60  # Shop restock interval
 
-# Rarity system
-RARITIES = {
-    "Common": {"color": (200, 200, 200), "chance": 0.40},
-    "Rare": {"color": (30, 144, 255), "chance": 0.30},
-    "Epic": {"color": (138, 43, 226), "chance": 0.15},
-    "Legendary": {"color": (255, 165, 0), "chance": 0.10},
-    "Mythic": {"color": (255, 0, 255), "chance": 0.04},
-    "Godly": {"color": (255, 215, 0), "chance": 0.01}
-}
-
-# Character definitions
-CHARACTERS = {
-    "Torcher": {
-        "name": "Torcher",
-        "image": "Torcher.png",
-        "damage": PROJECTILE_DAMAGE,
-        "projectiles": 1,
-        "price": 0,  # Free/default character
-        "rarity": "Common",
-        "description": "Default character with basic attack"
-    },
-    "Cowboy": {
-        "name": "Cowboy",
-        "image": "boy cow.png",
-        "damage": PROJECTILE_DAMAGE * 2,
-        "projectiles": 1,
-        "price": 25,
-        "rarity": "Rare",
-        "description": "Higher damage than Torcher"
-    },
-    "Shotgunner": {
-        "name": "Shotgunner",
-        "image": "Shotgunner.png",
-        "damage": PROJECTILE_DAMAGE * 3,
-        "projectiles": 1,
-        "price": 50,
-        "rarity": "Epic",
-        "description": "Higher damage than Cowboy"
-    },
-    "Mummy": {
-        "name": "Mummy",
-        "image": "Mummy.png",
-        "damage": PROJECTILE_DAMAGE * 3,
-        "projectiles": 1,
-        "price": 50,
-        "rarity": "Epic",
-        "description": "Same power as Shotgunner"
-    },
-    "Horse": {
-        "name": "Horse",
-        "image": "Horse.png",
-        "damage": PROJECTILE_DAMAGE * 5,
-        "projectiles": 1,
-        "price": 100,
-        "rarity": "Legendary",
-        "description": "Single high-damage bullet"
-    },
-    "Vampire": {
-        "name": "Vampire",
-        "image": "Vampire.png",
-        "damage": PROJECTILE_DAMAGE * 4,
-        "projectiles": 1,
-        "price": 100,
-        "rarity": "Legendary",
-        "description": "Fast melee with red sword slash",
-        "is_melee": True,
-        "melee_range": 100,
-        "melee_color": (255, 0, 0)
-    },
-    "Werewolf": {
-        "name": "Werewolf",
-        "image": "Werewolf.png",
-        "damage": PROJECTILE_DAMAGE * 7,
-        "projectiles": 1,
-        "price": 200,
-        "rarity": "Mythic",
-        "description": "Large AOE damage",
-        "is_aoe": True,
-        "aoe_radius": 150
-    },
-    "Tesla": {
-        "name": "Nikola Tesla",
-        "image": "Nicola Tesla.png",
-        "damage": PROJECTILE_DAMAGE * 10,
-        "projectiles": 1,
-        "price": 500,
-        "rarity": "Godly",
-        "description": "Largest AOE, highest damage",
-        "is_aoe": True,
-        "aoe_radius": 200
-    }
-}
-
-# Enemy types based on character rarities
-ENEMY_TYPES = {
-    "Zombie": {
-        "name": "Zombie",
-        "image": "Zombie.png",
-        "base_hp": 35,
-        "rarity": "Common",
-        "speed_multiplier": 1.0
-    },
-    "HorseZombie": {
-        "name": "Horse Zombie",
-        "image": "Zombie.png",  # Reusing image until new ones are added
-        "base_hp": 70,
-        "rarity": "Legendary",
-        "speed_multiplier": 1.2
-    },
-    "MummyZombie": {
-        "name": "Mummy Zombie",
-        "image": "Zombie.png",  # Reusing image until new ones are added
-        "base_hp": 50,
-        "rarity": "Epic",
-        "speed_multiplier": 0.8
-    },
-    "VampireZombie": {
-        "name": "Vampire Zombie",
-        "image": "Zombie.png",  # Reusing image until new ones are added
-        "base_hp": 65,
-        "rarity": "Legendary",
-        "speed_multiplier": 1.5
-    },
-    "WerewolfZombie": {
-        "name": "Werewolf Zombie",
-        "image": "Zombie.png",  # Reusing image until new ones are added
-        "base_hp": 90,
-        "rarity": "Mythic",
-        "speed_multiplier": 1.3
-    },
-    "TeslaZombie": {
-        "name": "Tesla Zombie",
-        "image": "Zombie.png",  # Reusing image until new ones are added
-        "base_hp": 120,
-        "rarity": "Godly",
-        "speed_multiplier": 1.1
-    }
-}
+# Event types each state reacts to; everything else is dropped by SDL
+# before it reaches the queue, so it can't wake an idle screen
+BASE_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN,
+               pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED]
+STATE_EVENTS = {"shop": BASE_EVENTS + [pygame.MOUSEMOTION],  # Hover highlights
+                "playing": BASE_EVENTS + PLAYING_EVENTS}      # Aim and held fire
 
 # Colors
 COLORS = {
@@ -172,291 +64,433 @@ COLORS = {
     'blue': (30, 144, 255)
 }
 
-# Currency system
-BONDS_PER_ZOMBIE = 10  # Bonds earned per zombie kill
+def configure_logging(level=None):
+    """Send diagnostics to stderr through an in-memory buffer
+
+    Only warnings are shown unless a level is passed or set in the
+    WILD_RAILS_LOG environment variable.  Records are written out by a
+    chore in the slack at the end of a frame (or when the buffer fills),
+    and straight away for errors.
+    """
+    level = (level or os.environ.get("WILD_RAILS_LOG") or "WARNING").upper()
+    log.setLevel(level)
+    if log.handlers:
+        return
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    log.addHandler(logging.handlers.MemoryHandler(LOG_BUFFER_RECORDS, logging.ERROR, stream))
+    log.propagate = False
+
+def log_buffered():
+    """Whether log records are waiting in the buffer"""
+    return any(getattr(handler, "buffer", None) for handler in log.handlers)
+
+def flush_log():
+    for handler in log.handlers:
+        handler.flush()
+
+def init_subsystems():
+    """Initialise only the pygame modules the game uses; safe to call again
+
+    Returns False when there is no usable audio device, in which case the
+    game runs without sound.
+    """
+    pygame.display.init()
+    pygame.font.init()
+    if pygame.mixer.get_init():
+        return True
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        log.warning("Audio disabled: %s", e)
+        return False
+    return True
+
+def find_image_folder():
+    """The asset folder next to the game, or the alternative path if that is missing"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    folder = os.path.normpath(os.path.join(script_dir, "Wild Rails"))
+    if not os.path.exists(folder) and os.path.exists(ALT_IMAGE_FOLDER):
+        log.info("Using alternative image folder path %s", ALT_IMAGE_FOLDER)
+        folder = ALT_IMAGE_FOLDER
+    log.debug("Image folder: %s", folder)
+    return folder
+
+def load_image(folder, filename, size, fallback_color):
+    """Load an image from an asset folder at size, or a plain square if it can't be loaded"""
+    path = os.path.join(folder, filename)
+    if not os.path.exists(path) and os.path.exists(os.path.join(ALT_IMAGE_FOLDER, filename)):
+        path = os.path.join(ALT_IMAGE_FOLDER, filename)
+    try:
+        image = pygame.image.load(path)
+        try:
+            image = image.convert_alpha()
+        except pygame.error as e:
+            log.warning("convert_alpha failed for %s: %s", filename, e)
+        log.debug("Loaded %s (%d bytes)", path, os.path.getsize(path))
+        return pygame.transform.scale(image, size)
+    except (pygame.error, OSError) as e:
+        log.warning("Could not load %s, using a placeholder: %s", path, e)
+        image = pygame.Surface(size, pygame.SRCALPHA)
+        image.fill(fallback_color)
+        return image
+
+def load_sprite_images(folder):
+    """Every character's image and the zombie's, by sprite name"""
+    images = {character_id: load_image(folder, os.path.basename(character_data["image"]),
+                                       (PLAYER_SIZE, PLAYER_SIZE), (255, 100, 100))
+              for character_id, character_data in CHARACTERS.items()}
+    images["Zombie"] = load_image(folder, "Zombie.png", (48, 48), (0, 150, 0))
+    return images
 
 class Game:
-    def __init__(self):
+    def __init__(self, quality=None, record=None, replay_seconds=None, telemetry=True,
+                 hot_reload=False, sim_process=False, seed=None, profile=DEFAULT_PROFILE,
+                 slot=DEFAULT_SLOT, pacing="tick", latency_probe=False, ai_budget=AI_BUDGET,
+                 metrics_port=None, data_folder=None):
         # Setup display
+        self.audio = init_subsystems()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Wild Rails - Zombie Survival")
         self.clock = pygame.time.Clock()
         self.running = True
+        
+        # Input is sampled at the start of each frame, right after the pacer wakes
+        self.input = PlayerInput()
+        self.events_arrived = 0  # get_ticks() when the last events were drained
+        self.pacer = FramePacer(self.clock, FPS, pacing)
+        self.latency_probe = LatencyProbe() if latency_probe else None
+        
+        # Chores that can wait (autosaves, restocks, telemetry and log
+        # writes) run in the time left at the end of frames; see scheduler.py
+        self.scheduler = FrameScheduler()
+        
+        # Developer console (backquote) and the subsystems it can switch off
+        self.subsystems = dict.fromkeys(SUBSYSTEMS, True)
+        self.console = DevConsole(self)
+        
+        # Adaptive quality: None lets the governor choose, a level name pins it
+        self.quality = QualityGovernor(FPS, pinned=quality)
+        
+        # Scrolling world: the camera follows the player along the railway and
+        # chunk backgrounds are rendered once into a view-sized LRU cache
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.chunk_cache = ChunkCache(SCREEN_WIDTH, SCREEN_HEIGHT)
+        
+        # Gameplay capture: F10 toggles recording, F9 saves the instant replay
+        self.recordings_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+        self.record_mode = record or "png"
+        self.recorder = None
+        if replay_seconds:
+            self.recorder = FrameRecorder(self.screen, self.recordings_folder, FPS,
+                                          replay_seconds=replay_seconds)
+            log.info("Instant replay keeps the last %.1fs (F9 to save)", self.recorder.replay_seconds)
+        elif record:
+            self.toggle_recording()
+        
+        # Per-match telemetry appended to telemetry/ (see telemetry_report.py)
+        self.telemetry = None
+        if telemetry:
+            self.telemetry = MatchTelemetry(
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry"))
+        
+        # Live metrics for dashboards on http://127.0.0.1:PORT/metrics (see metrics.py)
+        self.metrics = None
+        if metrics_port is not None:
+            try:
+                self.metrics = GameMetrics(self, metrics_port)
+            except OSError as e:
+                log.error("Could not serve metrics on port %d: %s", metrics_port, e)
         self.save_button_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 + 200, 200, 40)
         self.load_button_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 + 250, 200, 40)
         
-        # Load sounds
-        self.background_music = pygame.mixer.Sound(os.path.join(os.path.dirname(os.path.abspath(__file__)), 
-                                                  "Wild Rails", "o-bom-o-mal-e-o-feio-velho-oeste-desafio-dont-talk-duelo-desafio-armas.mp3"))
-        self.shoot_sound = pygame.mixer.Sound(os.path.join(os.path.dirname(os.path.abspath(__file__)), 
-                                             "Wild Rails", "westernsilah-online-audio-converter.mp3"))
+        # Asset folder, resolved before the save file is loaded from it
+        self.image_folder = find_image_folder()
         
-        # Set background music to loop forever
-        self.background_music.play(-1)  # -1 means loop indefinitely
+        # Balance tables (characters, rarities, enemies, waves) live next to the images
+        ensure_loaded(self.image_folder)
+        
+        # Sounds: music streams from disk instead of being decoded up front,
+        # and the shot sound is loaded with the other match assets
+        self.shoot_sound = None
+        if self.audio:
+            try:
+                self.play_music()
+            except pygame.error as e:
+                log.warning("Could not play background music: %s", e)
         
         # Game state
         self.state = "menu"  # "menu", "playing", "game_over", "shop"
         
+        # Static screens are only redrawn when something on them changed
+        self.dirty = True
+        self.drawn_state = None
+        self.event_filter_state = None
+        self.shown_countdown = None
+        
         # Player
-        self.player_pos = [SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2]
-        self.player_size = 64
-        self.player_rect = pygame.Rect(self.player_pos[0], self.player_pos[1], 
-                                     self.player_size, self.player_size)
+        self.player_size = PLAYER_SIZE
         
         # Character selection and ownership
         self.owned_characters = ["Torcher"]  # Start with only Torcher
         self.selected_character = "Torcher"  # Default character
         
-        # Shop system
-        self.restock_timer = 0
-        self.restock_interval = 5 * 60 * FPS  # 5 minutes in frames (at 60 FPS)
+        # Shop system; the restock countdown runs on the wall clock because
+        # static screens don't update every frame
+        self.restock_at = time.monotonic() + RESTOCK_SECONDS
         self.available_characters = []
         self.shop_clickable_areas = {}  # Track clickable areas for characters
         self.shop_hover = None  # Track which character is being hovered
         
-        # Load saved game data if available
+        # Profiles, save slots and run history (Wild Rails/wild_rails.db unless
+        # data_folder is given); load saved game data if available, including
+        # total bonds across all matches
+        self.profiles = ProfileStore(data_folder or self.image_folder, profile)
+        self.slot = slot
+        self.match_started = time.monotonic()
+        self.best_runs = []
+        self.recent_runs = []
+        self.permanent_bonds = 0
         self.load_game()
+        self.refresh_run_history()
         
         # Initialize shop
         self.restock_shop()  # Initial shop stock
         
-        # Game objects
-        self.projectiles = []  # [x, y, vel_x, vel_y, active]
-        self.zombies = []      # [x, y, hp, max_hp, rect]
-        
-        # Wave management and currency
-        self.wave = 1
-        self.match_bonds = 0  # Bonds earned in current match
-        self.permanent_bonds = 0  # Total bonds across all matches
-        self.zombies_per_wave = 5
-        self.zombies_spawned = 0
-        self.spawn_timer = 0
-        self.spawn_delay = 120  # 2 seconds at 60 FPS
-        
-        # Attack cooldown
-        self.attack_cooldown = 0
-        self.max_cooldown = 60  # 1 second at 60 FPS
-        
-        # Load assets
-        # Create base folder path for images
-        # Make sure to normalize path for Windows
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        print(f"Script directory: {script_dir}")
-        
-        # Try both relative and absolute paths for better compatibility
-        self.image_folder = os.path.normpath(os.path.join(script_dir, "Wild Rails"))
-        print(f"Primary image folder path: {self.image_folder}")
-        print(f"Images directory exists: {os.path.exists(self.image_folder)}")
-        
-        # Alternative path (just in case)
-        alt_image_folder = os.path.normpath("C:\\Users\\kevin\\code\\wild-rails\\Wild Rails")
-        print(f"Alternative image folder path: {alt_image_folder}")
-        print(f"Alternative path exists: {os.path.exists(alt_image_folder)}")
-        
-        # Use the alternative path if the primary one doesn't exist
-        if not os.path.exists(self.image_folder) and os.path.exists(alt_image_folder):
-            print("Using alternative image folder path")
-            self.image_folder = alt_image_folder
-        
-        # List files in the directory for debugging
-        try:
-            files_in_dir = os.listdir(self.image_folder)
-            print(f"Files in directory: {files_in_dir}")
-            
-            # Check if expected image files exist
-            expected_files = ["boy cow.png", "Torcher.png", "Zombie.png"]
-            for file in expected_files:
-                file_path = os.path.join(self.image_folder, file)
-                if os.path.exists(file_path):
-                    print(f"Found expected file: {file}")
-                    print(f"File size: {os.path.getsize(file_path)} bytes")
-                else:
-                    print(f"WARNING: Expected file not found: {file}")
-        except Exception as e:
-            print(f"Error listing directory: {e}")
-        
-        # Load character images
-        self.character_imgs = {}
-        for character_id, character_data in CHARACTERS.items():
-            image_path = character_data["image"]
-            try:
-                # Get the file name from the path
-                filename = os.path.basename(image_path)
-                # Create absolute path to the image
-                abs_path = os.path.normpath(os.path.join(self.image_folder, filename))
-                print(f"\nLoading {character_id} image from: {abs_path}")
-                
-                # Check if file exists before trying to load it
-                if not os.path.exists(abs_path):
-                    print(f"WARNING: File does not exist: {abs_path}")
-                    
-                    # Try direct hardcoded path as last resort
-                    if character_id == "Cowboy":
-                        direct_path = "C:\\Users\\kevin\\code\\wild-rails\\Wild Rails\\boy cow.png"
-                        print(f"Trying direct path for Cowboy: {direct_path}")
-                        if os.path.exists(direct_path):
-                            print(f"Direct path exists, using it instead")
-                            abs_path = direct_path
-                    elif character_id == "Torcher":
-                        direct_path = "C:\\Users\\kevin\\code\\wild-rails\\Wild Rails\\Torcher.png"
-                        print(f"Trying direct path for Torcher: {direct_path}")
-                        if os.path.exists(direct_path):
-                            print(f"Direct path exists, using it instead")
-                            abs_path = direct_path
-                
-                print(f"Final path: {abs_path}")
-                print(f"File exists: {os.path.exists(abs_path)}")
-                if os.path.exists(abs_path):
-                    print(f"File size: {os.path.getsize(abs_path)} bytes")
-                
-                # Try to load the image with detailed error handling
-                print("Attempting to load image...")
-                try:
-                    # First try loading without convert_alpha
-                    original_img = pygame.image.load(abs_path)
-                    print("Basic image loading successful")
-                    
-                    # Then try convert_alpha
-                    try:
-                        original_img = original_img.convert_alpha()
-                        print("Convert alpha successful")
-                    except Exception as conv_error:
-                        print(f"Warning: convert_alpha failed: {conv_error}")
-                        # Continue with unconverted image
-                        
-                    # Finally scale the image
-                    self.character_imgs[character_id] = pygame.transform.scale(
-                        original_img,
-                        (self.player_size, self.player_size)
-                    )
-                    print(f"Successfully loaded and scaled {character_id} image")
-                    
-                except pygame.error as pe:
-                    print(f"Pygame error during image loading: {pe}")
-                    raise pe
-                    
-            except pygame.error as pe:
-                print(f"Pygame error loading {character_id} image: {pe}")
-                # Fallback colored rectangle if image not found
-                temp_img = pygame.Surface((self.player_size, self.player_size), pygame.SRCALPHA)
-                temp_img.fill((255, 100, 100))
-                self.character_imgs[character_id] = temp_img
-            except FileNotFoundError as fnf:
-                print(f"File not found for {character_id} image: {fnf}")
-                temp_img = pygame.Surface((self.player_size, self.player_size), pygame.SRCALPHA)
-                temp_img.fill((255, 0, 0))
-                self.character_imgs[character_id] = temp_img
-            except Exception as e:
-                print(f"Unexpected error loading {character_id} image: {e}")
-                temp_img = pygame.Surface((self.player_size, self.player_size), pygame.SRCALPHA)
-                temp_img.fill((255, 100, 100))
-                self.character_imgs[character_id] = temp_img
-        
-        # Set current player image
-        self.player_img = self.character_imgs[self.selected_character]
+        # The match: player, zombies, projectiles, waves and bonds earned
+        # (see simulation.py).  Each wave's spawns are planned up front from
+        # the match seed, so a fixed seed replays the same waves; the
+        # player's view is the camera.
+        # The match rules, optionally stepped in a worker process while frames are drawn
+        self.sim_process = sim_process
+        if sim_process:
+            self.sim = SimulationProcess(seed, self.chunk_cache.seed, (SCREEN_WIDTH, SCREEN_HEIGHT),
+                                         ai_budget, self.image_folder)
+        else:
+            self.sim = Simulation(seed, self.chunk_cache.seed, (SCREEN_WIDTH, SCREEN_HEIGHT), ai_budget)
+        self.player_id = self.sim.add_player(self.selected_character, self.camera)
+        self.player = self.sim.players[self.player_id]
+        self.particles = ParticleSystem()
         
-        # Load zombie image
-        zombie_path = os.path.normpath(os.path.join(self.image_folder, "Zombie.png"))
-        print(f"\nLoading zombie image from: {zombie_path}")
-        print(f"Zombie image exists: {os.path.exists(zombie_path)}")
+        # Load character and zombie images; the rotated sprite caches are
+        # built when the first match starts (see prepare_match_assets)
+        self.character_imgs = load_sprite_images(self.image_folder)
+        self.zombie_img = self.character_imgs.pop("Zombie")
+        self.player_img = self.character_imgs[self.selected_character]
         
-        # Try direct hardcoded path as last resort if needed
-        if not os.path.exists(zombie_path):
-            direct_path = "C:\\Users\\kevin\\code\\wild-rails\\Wild Rails\\Zombie.png"
-            print(f"Trying direct path for Zombie: {direct_path}")
-            if os.path.exists(direct_path):
-                print(f"Direct path exists, using it instead")
-                zombie_path = direct_path
+        self.sprite_caches = {}
+        self.render_surfaces = {}
+        self.sprite_cache = None
         
-        print(f"Final zombie path: {zombie_path}")
-        print(f"File exists: {os.path.exists(zombie_path)}")
-        
-        if os.path.exists(zombie_path):
-            print(f"File size: {os.path.getsize(zombie_path)} bytes")
-            
-        try:
-            print("Attempting to load zombie image...")
-            # First try loading without convert_alpha
-            try:
-                original_zombie = pygame.image.load(zombie_path)
-                print("Basic zombie image loading successful")
-                
-                # Then try convert_alpha
-                try:
-                    original_zombie = original_zombie.convert_alpha()
-                    print("Zombie convert alpha successful")
-                except Exception as conv_error:
-                    print(f"Warning: zombie convert_alpha failed: {conv_error}")
-                    # Continue with unconverted image
-                
-                # Finally scale the image
-                self.zombie_img = pygame.transform.scale(
-                    original_zombie,
-                    (48, 48)
-                )
-                print("Successfully loaded and scaled zombie image")
-                
-            except pygame.error as pe:
-                print(f"Pygame error during zombie image loading: {pe}")
-                raise pe
-                
-        except pygame.error as pe:
-            print(f"Pygame error loading zombie image: {pe}")
-            # Fallback to basic colored shape
-            self.zombie_img = pygame.Surface((48, 48), pygame.SRCALPHA)
-            self.zombie_img.fill((0, 150, 0))
-        except FileNotFoundError as fnf:
-            print(f"File not found for zombie image: {fnf}")
-            self.zombie_img = pygame.Surface((48, 48), pygame.SRCALPHA)
-            self.zombie_img.fill((0, 150, 0))
-        except Exception as e:
-            print(f"Unexpected error loading zombie image: {e}")
-            # Fallback to basic colored shape
-            self.zombie_img = pygame.Surface((48, 48), pygame.SRCALPHA)
-            self.zombie_img.fill((0, 150, 0))
+        # Development hot reload: edited balance tables and assets are picked
+        # up between frames without a restart
+        self.watcher = None
+        if hot_reload:
+            self.watcher = FileWatcher(self.watched_paths())
         
         # Fonts
         self.font = pygame.font.Font(None, 36)
         self.big_font = pygame.font.Font(None, 72)
+        self.small_font = pygame.font.Font(None, 24)
+    
+    def load_image(self, filename, size, fallback_color):
+        """Load an image from the asset folder at size, or a plain square if it can't be loaded"""
+        return load_image(self.image_folder, filename, size, fallback_color)
+    
+    def prepare_match_assets(self):
+        """Build what only gameplay needs: sprite caches, playfield surfaces, shot sound
+        
+        Deferred from startup so the menu appears as soon as possible; later
+        calls do nothing.
+        """
+        if self.sprite_cache is not None:
+            return
+        # Pre-render facing angles and walk frames so drawing needs no transforms,
+        # with one cache and playfield surface per reachable quality render scale
+        self.prepare_render_scales([self.quality.level] if self.quality.pinned else QUALITY_LEVELS)
+        self.sprite_cache = self.sprite_caches[1.0]
+        
+        # Obstacles on the navigation grid zombies steer around
+        self.sim.prepare()
+        
+        if self.audio:
+            try:
+                self.shoot_sound = pygame.mixer.Sound(os.path.join(self.image_folder, SHOOT_SOUND_FILE))
+            except pygame.error as e:
+                log.warning("Could not load shot sound: %s", e)
+    
+    def prepare_render_scales(self, levels):
+        """Build the sprite cache and playfield surface of each level's render scale not built yet"""
+        for scale in {level["render_scale"] for level in levels} | {1.0}:
+            if scale in self.sprite_caches:
+                continue
+            self.sprite_caches[scale] = self.build_sprite_cache(scale)
+            log.debug("%s", self.sprite_caches[scale].report())
+            if scale != 1.0:
+                self.render_surfaces[scale] = pygame.Surface(
+                    (int(SCREEN_WIDTH * scale), int(SCREEN_HEIGHT * scale))).convert()
+    
+    def build_sprite_cache(self, scale):
+        """Pre-render every character and zombie sprite at a render scale"""
+        cache = SpriteCache()
+        images = dict(self.character_imgs)
+        images["Zombie"] = self.zombie_img
+        for name, img in images.items():
+            cache.add(name, self.scale_sprite(img, scale))
+        return cache
+    
+    def scale_sprite(self, img, scale):
+        """Image resized for a render scale"""
+        if scale == 1.0:
+            return img
+        width, height = img.get_size()
+        return pygame.transform.smoothscale(img, (max(1, int(width * scale)),
+                                                  max(1, int(height * scale))))
+    
+    def play_music(self):
+        """(Re)start the background music, looping forever"""
+        pygame.mixer.music.load(os.path.join(self.image_folder, MUSIC_FILE))
+        pygame.mixer.music.play(-1)  # -1 means loop indefinitely
+    
+    def watched_paths(self):
+        """Balance tables and every asset they reference"""
+        names = list(TABLE_FILES) + ["Zombie.png", MUSIC_FILE, SHOOT_SOUND_FILE]
+        names += [os.path.basename(character["image"]) for character in CHARACTERS.values()]
+        return [os.path.join(self.image_folder, name) for name in names]
+    
+    def apply_hot_reload(self):
+        """Reload just the balance tables and assets that changed on disk"""
+        for path in self.watcher.poll():
+            start = time.perf_counter()
+            filename = os.path.basename(path)
+            try:
+                if filename in TABLE_FILES:
+                    table = TABLE_FILES[filename]
+                    old_images = {char_id: char["image"] for char_id, char in CHARACTERS.items()}
+                    load_table(table, self.image_folder)
+                    if self.sim_process:
+                        self.sim.load_table(table, self.image_folder)
+                    if table == "characters":
+                        self.characters_reloaded(old_images)
+                else:
+                    self.reload_asset(filename)
+            except BalanceError as e:
+                log.error("Keeping the previous %s: %s", filename, e)
+                continue
+            except pygame.error as e:
+                log.error("Could not reload %s: %s", filename, e)
+                continue
+            log.info("Reloaded %s in %.0f ms", filename, (time.perf_counter() - start) * 1000)
+            self.dirty = True
+    
+    def reload_asset(self, filename):
+        """Reload one image or sound and whatever was derived from it"""
+        if filename == MUSIC_FILE:
+            if self.audio:
+                self.play_music()
+        elif filename == SHOOT_SOUND_FILE:
+            if self.audio and self.shoot_sound is not None:
+                self.shoot_sound = pygame.mixer.Sound(os.path.join(self.image_folder, filename))
+        else:
+            if filename == "Zombie.png":
+                self.reload_sprite("Zombie")
+            for char_id, character in CHARACTERS.items():
+                if os.path.basename(character["image"]) == filename:
+                    self.reload_sprite(char_id)
+    
+    def reload_sprite(self, name):
+        """Reload a character's (or the zombie's) image and re-render only its cache entries"""
+        if name == "Zombie":
+            img = self.zombie_img = self.load_image("Zombie.png", (48, 48), (0, 150, 0))
+        else:
+            img = self.load_image(os.path.basename(CHARACTERS[name]["image"]),
+                                  (self.player_size, self.player_size), (255, 100, 100))
+            self.character_imgs[name] = img
+            if name == self.selected_character:
+                self.player_img = img
+        for scale, cache in self.sprite_caches.items():
+            cache.add(name, self.scale_sprite(img, scale))
+    
+    def characters_reloaded(self, old_images):
+        """Bring images, caches, inventory and shop in line with a new characters table"""
+        for char_id in [c for c in self.character_imgs if c not in CHARACTERS]:
+            del self.character_imgs[char_id]
+            for cache in self.sprite_caches.values():
+                cache.remove(char_id)
+        for char_id, character in CHARACTERS.items():
+            if old_images.get(char_id) != character["image"]:
+                self.reload_sprite(char_id)
+        
+        self.owned_characters = [c for c in self.owned_characters if c in CHARACTERS] or [DEFAULT_CHARACTER]
+        self.available_characters = [c for c in self.available_characters if c in CHARACTERS]
+        if self.selected_character not in CHARACTERS:
+            self.selected_character = self.owned_characters[0]
+        self.player_img = self.character_imgs[self.selected_character]
+        self.watcher.watch(self.watched_paths())
+    
+    def end_match(self, outcome):
+        """Record how the current match ended in telemetry and the run history
+        
+        The run is written with the next save.
+        """
+        if self.telemetry is not None:
+            self.telemetry.end_match(self.sim.wave, self.sim.match_bonds, outcome, write=False)
+            self.defer("telemetry", self.telemetry.flush)
+        self.profiles.record_run(self.slot, self.selected_character, self.sim.wave, self.sim.match_bonds,
+                                 time.monotonic() - self.match_started, OUTCOMES[outcome])
+    
+    def toggle_recording(self):
+        """Start or stop writing gameplay frames to the recordings folder"""
+        if self.recorder is None:
+            self.recorder = FrameRecorder(self.screen, self.recordings_folder, FPS, mode=self.record_mode)
+        self.recorder.toggle()
     
     def save_game(self):
-        """Save game data to Wild Rails/Settings.json"""
-        save_data = {
-            "permanent_bonds": self.permanent_bonds,
-            "owned_characters": self.owned_characters,
-            "selected_character": self.selected_character
-        }
+        """Save game data and finished runs to the profile's save slot"""
         try:
-            settings_path = os.path.join(self.image_folder, "Settings.json")
-            with open(settings_path, "w") as f:
-                json.dump(save_data, f, indent=4)
-            print("Game saved successfully to Wild Rails/Settings.json")
-            return True
-        except Exception as e:
-            print(f"Error saving game: {e}")
+            self.profiles.save_slot(self.slot, self.permanent_bonds, self.owned_characters,
+                                    self.selected_character)
+            log.info("Game saved to slot %d of %s", self.slot, self.profiles.path)
+        except sqlite3.Error as e:
+            log.error("Error saving game: %s", e)
             return False
+        self.refresh_run_history()
+        return True
     
     def load_game(self):
-        """Load game data from Wild Rails/Settings.json"""
+        """Load game data from the profile's save slot"""
+        self.scheduler.flush()  # A deferred autosave goes in before the slot is read
         try:
-            settings_path = os.path.join(self.image_folder, "Settings.json")
-            with open(settings_path, "r") as f:
-                data = json.load(f)
-                self.permanent_bonds = data.get("permanent_bonds", 0)
-                self.owned_characters = data.get("owned_characters", ["Torcher"])
-                self.selected_character = data.get("selected_character", "Torcher")
-                print("Game loaded successfully from Wild Rails/Settings.json")
-        except FileNotFoundError:
-            print("No save file found, using default values")
-            self.permanent_bonds = 0
-            self.owned_characters = ["Torcher"]
-            self.selected_character = "Torcher"
-        except Exception as e:
-            print(f"Error loading game: {e}")
-            # Use default values on error
+            saved = self.profiles.load_slot(self.slot)
+        except (sqlite3.Error, ValueError) as e:
+            log.error("Error loading game: %s", e)
+            saved = None
+        if saved is None:
+            log.info("No saved game in slot %d, using default values", self.slot)
             self.permanent_bonds = 0
-            self.owned_characters = ["Torcher"]
-            self.selected_character = "Torcher"
+            self.owned_characters = [DEFAULT_CHARACTER]
+            self.selected_character = DEFAULT_CHARACTER
+            return
+        self.permanent_bonds, self.owned_characters, self.selected_character = saved
+        # Characters removed from the balance tables since the save are dropped
+        self.owned_characters = [c for c in self.owned_characters if c in CHARACTERS] or [DEFAULT_CHARACTER]
+        if self.selected_character not in self.owned_characters:
+            self.selected_character = self.owned_characters[0]
+        log.info("Game loaded from slot %d", self.slot)
+    
+    def refresh_run_history(self):
+        """Re-read the menu's best and recent runs"""
+        try:
+            self.best_runs = self.profiles.top_runs()
+            self.recent_runs = self.profiles.recent_runs()
+        except sqlite3.Error as e:
+            log.error("Error reading run history: %s", e)
+        self.dirty = True
+    
+    def restock_countdown(self):
+        """(minutes, seconds) until the shop restocks"""
+        remaining = max(0, int(self.restock_at - time.monotonic()))
+        return remaining // 60, remaining % 60
     
     def restock_shop(self):
         """Restock the shop with new random characters based on rarity"""
@@ -474,12 +508,19 @@ class Game:
                 chance = RARITIES[rarity]["chance"]
                 char_chances.append((char, chance))
             
-            # Normalize chances
+            # Normalize chances; only the rarities with a chance can be stocked,
+            # and if none of the unowned characters have one they all can
             total_chance = sum(chance for _, chance in char_chances)
+            if total_chance > 0:
+                char_chances = [(char, chance) for char, chance in char_chances if chance > 0]
+            else:
+                char_chances = [(char, 1) for char, _ in char_chances]
+                total_chance = len(char_chances)
             normalized_chances = [(char, chance/total_chance) for char, chance in char_chances]
+            available_slots = min(available_slots, len(char_chances))
             
             # Select random characters based on their chances
-            while len(self.available_characters) < available_slots and unowned:
+            while len(self.available_characters) < available_slots:
                 # Random selection with weights
                 rand_val = random.random()
                 cumulative = 0
@@ -490,198 +531,78 @@ class Game:
                         break
         
         # Reset restock timer
-        self.restock_timer = 0
+        self.restock_at = time.monotonic() + RESTOCK_SECONDS
+        self.dirty = True
     
     def reset_game(self):
         """Reset game state for a new game"""
-        self.wave = 1
-        self.match_bonds = 0  # Reset match bonds but keep permanent bonds
-        self.zombies_per_wave = 5
-        self.zombies_spawned = 0
-        self.spawn_timer = 0
-        self.projectiles = []
-        self.zombies = []
-        self.player_pos = [SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2]
-        self.player_rect.x, self.player_rect.y = self.player_pos
-        self.attack_cooldown = 0
+        self.sim.set_character(self.player_id, self.selected_character)
+        self.sim.restart()
+        log.info("Match seed %d", self.sim.match_seed)
+        self.particles.clear()
+        self.match_started = time.monotonic()
+        self.prepare_match_assets()
         self.state = "playing"
+        if self.telemetry is not None:
+            self.telemetry.start_match(self.selected_character)
         
         # Update player image based on selected character
         self.player_img = self.character_imgs[self.selected_character]
     
-    def spawn_zombie(self):
-        """Create a zombie at a random edge of the screen"""
-        if self.zombies_spawned >= self.zombies_per_wave:
-            return
-        
-        # Randomly select an edge to spawn from
-        side = random.randint(0, 3)
-        if side == 0:  # Top
-            x, y = random.randint(0, SCREEN_WIDTH), -50
-        elif side == 1:  # Right
-            x, y = SCREEN_WIDTH + 50, random.randint(0, SCREEN_HEIGHT)
-        elif side == 2:  # Bottom
-            x, y = random.randint(0, SCREEN_WIDTH), SCREEN_HEIGHT + 50
-        else:  # Left
-            x, y = -50, random.randint(0, SCREEN_HEIGHT)
-        
-        # Create zombie with stats scaled to current wave
-        # Exponential health scaling that makes zombies much tougher in later waves
-        # Base health is 35 for wave 1 (same as original), then grows exponentially
-        if self.wave == 1:
-            max_hp = 35  # Keep original health for wave 1
-        else:
-            max_hp = int(35 * (1.25 ** (self.wave - 1)))  # 25% increase per wave
-        zombie_rect = pygame.Rect(x, y, 48, 48)
-        self.zombies.append([x, y, max_hp, max_hp, zombie_rect])
-        self.zombies_spawned += 1
-        self.spawn_timer = 0
-    
-    def shoot(self):
-        """Create a projectile aimed at the mouse cursor"""
-        if self.attack_cooldown <= 0:
-            # Get player center and mouse position
-            player_center = (self.player_pos[0] + self.player_size // 2, 
-                           self.player_pos[1] + self.player_size // 2)
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            
-            # Calculate direction vector
-            dx = mouse_x - player_center[0]
-            dy = mouse_y - player_center[1]
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > 0:
-                vel_x = (dx / distance) * PROJECTILE_SPEED
-                vel_y = (dy / distance) * PROJECTILE_SPEED
-                
-                # Get character-specific shooting behavior
-                character = CHARACTERS[self.selected_character]
-                num_projectiles = character["projectiles"]
-                
-                if num_projectiles == 1:
-                    # Single projectile (Torcher)
-                    # Store projectile as [x, y, vel_x, vel_y, active, damage]
-                    self.projectiles.append([
-                        player_center[0], player_center[1], 
-                        vel_x, vel_y, True, character["damage"]
-                    ])
-                elif num_projectiles == 2:
-                    # Two projectiles (Cowboy)
-                    # Calculate perpendicular vector for spread
-                    spread_distance = 10
-                    perp_x, perp_y = -vel_y, vel_x  # Perpendicular to direction
-                    # Normalize and scale for spread
-                    perp_magnitude = math.sqrt(perp_x*perp_x + perp_y*perp_y)
-                    perp_x = (perp_x / perp_magnitude) * spread_distance
-                    perp_y = (perp_y / perp_magnitude) * spread_distance
-                    
-                    # Add two projectiles with slight offset
-                    self.projectiles.append([
-                        player_center[0] + perp_x/2, player_center[1] + perp_y/2,
-                        vel_x, vel_y, True, character["damage"]
-                    ])
-                    self.projectiles.append([
-                        player_center[0] - perp_x/2, player_center[1] - perp_y/2,
-                        vel_x, vel_y, True, character["damage"]
-                    ])
-                
-                # Play shoot sound
-                self.shoot_sound.play()
-                
-                self.attack_cooldown = self.max_cooldown
+    def emit_effect(self, kind, x, y, direction=None, spread=math.pi):
+        """Emit a particle burst thinned by the current quality level"""
+        count = int(PARTICLE_KINDS[kind]["count"] * self.quality.level["effects"])
+        if count > 0:
+            self.particles.emit(kind, x, y, count, direction, spread)
     
     def update(self):
         """Update game state for one frame"""
         # Update shop restock timer
-        self.restock_timer += 1
-        if self.restock_timer >= self.restock_interval:
-            self.restock_shop()
+        if time.monotonic() >= self.restock_at:
+            self.defer("restock", self.restock_shop)
         
         if self.state != "playing":
             return
         
-        # Update cooldown
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= 1
-        
-        # Update player position based on keyboard input
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
-            self.player_pos[1] -= PLAYER_SPEED
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            self.player_pos[1] += PLAYER_SPEED
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            self.player_pos[0] -= PLAYER_SPEED
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            self.player_pos[0] += PLAYER_SPEED
-        
-        # Keep player on screen
-        self.player_pos[0] = max(0, min(self.player_pos[0], SCREEN_WIDTH - self.player_size))
-        self.player_pos[1] = max(0, min(self.player_pos[1], SCREEN_HEIGHT - self.player_size))
-        self.player_rect.x, self.player_rect.y = self.player_pos
-        
-        # Update projectiles
-        for proj in self.projectiles[:]:
-            # Move projectile
-            proj[0] += proj[2]  # x += vel_x
-            proj[1] += proj[3]  # y += vel_y
-            
-            # Deactivate if off screen
-            if (proj[0] < 0 or proj[0] > SCREEN_WIDTH or 
-                proj[1] < 0 or proj[1] > SCREEN_HEIGHT):
-                proj[4] = False
-                self.projectiles.remove(proj)
-        
-        # Update zombies and check collisions
-        for zombie in self.zombies[:]:
-            # Move zombie towards player
-            player_center = (self.player_pos[0] + self.player_size // 2, 
-                           self.player_pos[1] + self.player_size // 2)
-            dx = player_center[0] - zombie[0]
-            dy = player_center[1] - zombie[1]
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > 0:
-                zombie[0] += (dx / distance) * ZOMBIE_SPEED
-                zombie[1] += (dy / distance) * ZOMBIE_SPEED
-                zombie[4].x = int(zombie[0])
-                zombie[4].y = int(zombie[1])
-            
-            # Check projectile hits
-            for proj in self.projectiles[:]:
-                if proj[4] and zombie[4].collidepoint(proj[0], proj[1]):
-                    zombie[2] -= proj[5]  # Use projectile's damage value
-                    proj[4] = False
-                    self.projectiles.remove(proj)
-                    break
-            
-            # Remove dead zombies and award bonds
-            if zombie[2] <= 0:
-                self.match_bonds += BONDS_PER_ZOMBIE  # Add bonds when zombie is killed
-                self.zombies.remove(zombie)
-                continue
-            
-            # Check player collision (game over if zombie touches player)
-            if zombie[4].colliderect(self.player_rect):
-                self.state = "game_over"
-                return
-        
-        # Spawn new zombies
-        self.spawn_timer += 1
-        if self.spawn_timer >= self.spawn_delay and self.zombies_spawned < self.zombies_per_wave:
-            self.spawn_zombie()
-        
-        # Check wave completion - now endless
-        if len(self.zombies) == 0 and self.zombies_spawned >= self.zombies_per_wave:
-            self.wave += 1
-            # Multiplicative scaling for zombie spawn count
-            if self.wave == 2:
-                self.zombies_per_wave += 2  # Keep original increment for wave 2
-            else:
-                # Multiply by 1.3 for exponential growth in later waves
-                self.zombies_per_wave = int(self.zombies_per_wave * 1.3)
-            self.zombies_spawned = 0
-            self.spawn_timer = 0
+        # Step the match with the input sampled at the start of the frame;
+        # fire shoots when pressed or held, as soon as the cooldown allows
+        sim = self.sim
+        aim_x, aim_y = self.camera.to_world(*self.input.aim())
+        sim.set_input(self.player_id, self.input.move[0], self.input.move[1], self.input.wants_fire(),
+                      aim_x, aim_y)
+        self.particles.begin_frame()
+        sim.step()
+        
+        # Effects, sound and counts for what happened during the tick
+        for x, y, vel_x, vel_y in sim.shots:
+            # Muzzle flash towards the cursor
+            self.emit_effect("muzzle", x, y, (vel_x, vel_y), 0.35)
+            if self.shoot_sound is not None:
+                self.shoot_sound.play()
+        for x, y, direction_x, direction_y in sim.hits:
+            self.emit_effect("hit", x, y, (direction_x, direction_y), 1.0)
+        for x, y in sim.deaths:
+            if self.telemetry is not None:
+                self.telemetry.kill()
+            if self.metrics is not None:
+                self.metrics.kills.inc()
+            self.emit_effect("death", x, y)
+        for wave in sim.cleared:
+            if self.telemetry is not None:
+                self.telemetry.end_wave(wave, sim.match_bonds, OUTCOME_CLEARED)
+            if self.metrics is not None:
+                self.metrics.waves.inc()
+        
+        # Game over once a zombie touches the player
+        if sim.game_over:
+            self.state = "game_over"
+            # Add match bonds to permanent bonds when game over
+            self.permanent_bonds += sim.match_bonds
+            self.end_match(OUTCOME_DIED)
+            return
+        
+        if self.subsystems["particles"]:
+            self.particles.update()
     
     def draw_menu(self):
         """Draw the main menu screen"""
@@ -716,47 +637,117 @@ class Game:
         load_text = self.font.render("Load Game (L)", True, COLORS['white'])
         load_text_rect = load_text.get_rect(center=self.load_button_rect.center)
         self.screen.blit(load_text, load_text_rect)
+        
+        # Run history in two columns above the title
+        columns = [
+            (20, "Best Runs", [f"{i}. Wave {wave} - {bonds} Bonds ({character})"
+                               for i, (character, wave, bonds, _) in enumerate(self.best_runs, 1)]),
+            (SCREEN_WIDTH // 2 + 20, "Recent Runs", [f"Wave {wave} - {bonds} Bonds ({character}, {outcome})"
+                                                     for character, wave, bonds, outcome in self.recent_runs]),
+        ]
+        for x, heading, lines in columns:
+            y = 20
+            self.screen.blit(self.font.render(heading, True, COLORS['black']), (x, y))
+            for line in lines or ["No runs yet"]:
+                y += 26
+                self.screen.blit(self.small_font.render(line, True, COLORS['black']), (x, y))
     
     def draw_game(self):
         """Draw the main gameplay screen"""
-        # Draw game objects
-        self.screen.blit(self.player_img, self.player_pos)
+        level = self.quality.level
+        scale = level["render_scale"]
+        cache = self.sprite_caches[scale]
+        # Reduced quality renders the playfield to a smaller surface and upscales it
+        target = self.render_surfaces.get(scale, self.screen)
+        
+        # Background chunks under the camera, then everything in view on top
+        self.chunk_cache.draw(target, self.camera, scale)
+        view = self.camera.rect
+        cam_x, cam_y = self.camera.x, self.camera.y
+        
+        # Draw game objects from the pre-rendered sprite cache
+        sim = self.sim
+        player_center = self.player.center
+        player_sprite, (off_x, off_y) = cache.get(
+            self.selected_character, self.player.facing,
+            self.player.walk // WALK_FRAME_TICKS)
+        target.blit(player_sprite, (int((player_center[0] - cam_x) * scale) + off_x,
+                                    int((player_center[1] - cam_y) * scale) + off_y))
         
         # Draw active projectiles
-        for proj in self.projectiles:
+        radius = max(1, int(6 * scale))
+        render = self.subsystems["render"]
+        for proj in sim.projectiles if render else ():
             if proj[4]:  # if active
-                pygame.draw.circle(self.screen, COLORS['yellow'], 
-                                 (int(proj[0]), int(proj[1])), 6)
+                pygame.draw.circle(target, COLORS['yellow'], 
+                                 (int((proj[0] - cam_x) * scale), int((proj[1] - cam_y) * scale)),
+                                 radius)
         
         # Draw zombies with health bars
-        for zombie in self.zombies:
-            self.screen.blit(self.zombie_img, (int(zombie[0]), int(zombie[1])))
+        walk_tick = sim.match_tick // WALK_FRAME_TICKS
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        cursor_x, cursor_y = self.camera.to_world(mouse_x, mouse_y)
+        focus_sq = HEALTH_BAR_FOCUS_RADIUS * HEALTH_BAR_FOCUS_RADIUS
+        bar_width = max(1, int(48 * scale))
+        bar_height = max(1, int(6 * scale))
+        visible = view.inflate(96, 96)
+        # Every zombie near the view is awake, so the sleepers needn't be
+        # looked at; with movement switched off nothing keeps that list up
+        zombies = sim.awake_zombies if sim.subsystems["movement"] else sim.zombies
+        for zombie in zombies if render else ():
+            # Cull zombies outside the view (plus a sprite's margin)
+            if not visible.collidepoint(zombie[0], zombie[1]):
+                continue
+            zx = int((zombie[0] - cam_x) * scale)
+            zombie_sprite, (off_x, off_y) = cache.get(
+                "Zombie", zombie[5], walk_tick + zombie[6])
+            target.blit(zombie_sprite, (int((zombie[0] + 24 - cam_x) * scale) + off_x,
+                                        int((zombie[1] + 24 - cam_y) * scale) + off_y))
+            
+            if not self.subsystems["health_bars"]:
+                continue
+            
+            # Off-focus zombies skip their health bar at reduced quality
+            if level["focus_health_bars"]:
+                near_player = ((zombie[0] - player_center[0]) ** 2 +
+                               (zombie[1] - player_center[1]) ** 2) <= focus_sq
+                near_cursor = ((zombie[0] - cursor_x) ** 2 +
+                               (zombie[1] - cursor_y) ** 2) <= focus_sq
+                if not (near_player or near_cursor):
+                    continue
             
             # Health bar
-            bar_width = 48
-            pygame.draw.rect(self.screen, COLORS['red'],
-                           (zombie[0], zombie[1] - 10, bar_width, 6))
+            bar_y = int((zombie[1] - 10 - cam_y) * scale)
+            pygame.draw.rect(target, COLORS['red'],
+                           (zx, bar_y, bar_width, bar_height))
             health_width = int((zombie[2] / zombie[3]) * bar_width)
-            pygame.draw.rect(self.screen, COLORS['green'],
-                           (zombie[0], zombie[1] - 10, health_width, 6))
+            pygame.draw.rect(target, COLORS['green'],
+                           (zx, bar_y, health_width, bar_height))
+        
+        # Hit, death and muzzle particles in one batched draw
+        if self.subsystems["particles"]:
+            self.particles.draw(target, scale, (cam_x, cam_y), fraction=level["effects"])
+        
+        if target is not self.screen:
+            pygame.transform.scale(target, self.screen.get_size(), self.screen)
         
         # Draw UI
         texts = [
-            (f"Wave: {self.wave}", COLORS['black']),
-            (f"Match Bonds: {self.match_bonds}", COLORS['gold']),
-            (f"Total Bonds: {self.permanent_bonds + self.match_bonds}", COLORS['gold']),
-            (f"Zombies: {len(self.zombies)}", COLORS['black']),
+            (f"Wave: {sim.wave}", COLORS['black']),
+            (f"Match Bonds: {sim.match_bonds}", COLORS['gold']),
+            (f"Total Bonds: {self.permanent_bonds + sim.match_bonds}", COLORS['gold']),
+            (f"Zombies: {len(sim.zombies)}", COLORS['black']),
             (f"Character: {self.selected_character}", COLORS['black']),
-            (f"{'READY TO FIRE' if self.attack_cooldown <= 0 else f'Cooldown: {self.attack_cooldown/60:.1f}s'}", 
-             COLORS['green'] if self.attack_cooldown <= 0 else COLORS['red'])
+            (f"{'READY TO FIRE' if self.player.cooldown <= 0 else f'Cooldown: {self.player.cooldown/FPS:.1f}s'}", 
+             COLORS['green'] if self.player.cooldown <= 0 else COLORS['red']),
+            (f"Quality: {self.quality.label}", COLORS['black'])
         ]
         
-        for i, (text, color) in enumerate(texts):
+        for i, (text, color) in enumerate(texts if self.subsystems["hud"] else ()):
             surf = self.font.render(text, True, color)
             self.screen.blit(surf, (10, 10 + i * 40))
         
         # Draw crosshair at mouse position
-        mouse_x, mouse_y = pygame.mouse.get_pos()
         pygame.draw.line(self.screen, COLORS['red'],
                        (mouse_x - 10, mouse_y), (mouse_x + 10, mouse_y), 2)
         pygame.draw.line(self.screen, COLORS['red'],
@@ -764,13 +755,10 @@ class Game:
     
     def draw_game_over(self):
         """Draw the game over screen with statistics"""
-        # Add match bonds to permanent bonds when game over
-        self.permanent_bonds += self.match_bonds
-        
         texts = [
             ("GAME OVER", self.big_font, COLORS['red'], -100),
-            (f"Wave Reached: {self.wave}", self.font, COLORS['black'], -50),
-            (f"Bonds Earned This Run: {self.match_bonds}", self.font, COLORS['gold'], 0),
+            (f"Wave Reached: {self.sim.wave}", self.font, COLORS['black'], -50),
+            (f"Bonds Earned This Run: {self.sim.match_bonds}", self.font, COLORS['gold'], 0),
             (f"Total Bonds: {self.permanent_bonds}", self.font, COLORS['gold'], 50),
             ("Press SPACE to return to Menu", self.font, COLORS['black'], 150),
             ("Press ESC to Quit", self.font, COLORS['black'], 200)
@@ -797,8 +785,7 @@ class Game:
         self.screen.blit(inventory_text, (SCREEN_WIDTH//2 - 100, 170))
         
         # Display restock timer
-        restock_minutes = (self.restock_interval - self.restock_timer) // (60 * FPS)
-        restock_seconds = ((self.restock_interval - self.restock_timer) % (60 * FPS)) // FPS
+        restock_minutes, restock_seconds = self.shown_countdown = self.restock_countdown()
         timer_text = self.font.render(f"Restock in: {restock_minutes}:{restock_seconds:02d}", True, COLORS['black'])
         self.screen.blit(timer_text, (SCREEN_WIDTH//2 - 100, 210))
         
@@ -965,9 +952,47 @@ class Game:
             no_stock_text = self.font.render("No characters available. Wait for restock.", True, COLORS['red'])
             self.screen.blit(no_stock_text, (SCREEN_WIDTH//2 - 180, 540))
     
+    def shop_action(self, area_data):
+        """Select, buy or sell from a clicked shop area"""
+        if area_data["type"] == "select":
+            # Select owned character
+            self.selected_character = area_data["character"]
+            self.player_img = self.character_imgs[self.selected_character]
+            log.info("Selected character: %s", self.selected_character)
+        
+        elif area_data["type"] == "buy" and area_data["can_afford"] and area_data["has_space"]:
+            # Buy new character
+            char_id = area_data["character"]
+            char_price = CHARACTERS[char_id]["price"]
+        
+            self.permanent_bonds -= char_price
+            self.owned_characters.append(char_id)
+            self.available_characters.remove(char_id)
+            self.selected_character = char_id
+            self.player_img = self.character_imgs[char_id]
+            log.info("Purchased character: %s", char_id)
+        
+            # Auto-save after purchase
+            self.defer("save", self.save_game)
+        
+        elif area_data["type"] == "sell":
+            # Sell character
+            char_id = area_data["character"]
+            sell_price = area_data["price"]
+        
+            # Remove from owned characters and add bonds
+            self.owned_characters.remove(char_id)
+            self.permanent_bonds += sell_price
+            log.info("Sold character %s for %d bonds", char_id, sell_price)
+        
+            # Auto-save after selling
+            self.defer("save", self.save_game)
+    
     def draw(self):
         """Render the current game state"""
-        self.screen.fill(COLORS['sand'])
+        if self.state != "playing":
+            # The playfield fills its own render target
+            self.screen.fill(COLORS['sand'])
         
         if self.state == "menu":
             self.draw_menu()
@@ -978,137 +1003,260 @@ class Game:
         elif self.state == "shop":
             self.draw_shop()
         
+        if self.console.open:
+            self.console.draw(self.screen, self.small_font)
+        
         pygame.display.flip()
     
-    def run(self):
+    def apply_event_filter(self):
+        """Let through only the event types the current state handles"""
+        if self.state == self.event_filter_state:
+            return
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(STATE_EVENTS.get(self.state, BASE_EVENTS))
+        if self.latency_probe is not None:
+            pygame.event.set_allowed(PROBE_EVENT)
+        self.event_filter_state = self.state
+    
+    def defer(self, name, job):
+        """Queue a chore for the end of a frame, or run it now while deferral is toggled off"""
+        if self.subsystems["deferral"]:
+            self.scheduler.defer(name, job)
+        else:
+            job()
+    
+    def queue_chores(self):
+        """Queue buffered writes that have become worth doing"""
+        if not self.subsystems["deferral"]:
+            return  # The buffers write themselves out when they fill
+        if log_buffered():
+            self.scheduler.defer("log", flush_log)
+        if self.telemetry is not None and self.telemetry.should_flush():
+            self.scheduler.defer("telemetry", self.telemetry.flush)
+    
+    def needs_redraw(self):
+        return self.state == "playing" or self.dirty or self.state != self.drawn_state
+    
+    def idle_timeout_ms(self):
+        """How long a static screen can sleep before a timer changes something"""
+        if self.scheduler.pending():
+            return 0  # Deferred chores, e.g. a save queued by the last match frame, run now
+        timeout = IDLE_WAKE_MS
+        if self.watcher is not None:
+            timeout = min(timeout, int(self.watcher.interval * 1000))
+        if self.state == "shop":
+            # Wake when the restock countdown reaches its next whole second
+            timeout = min(timeout, int((self.restock_at - time.monotonic()) % 1 * 1000) + 1)
+        return timeout
+    
+    def next_events(self):
+        """This iteration's events; blocks while a static screen has nothing to redraw"""
+        timeout = 0 if self.needs_redraw() else self.idle_timeout_ms()
+        if timeout == 0:  # event.wait(0) would block until an event came
+            events = pygame.event.get()
+            self.events_arrived = pygame.time.get_ticks()
+            return events
+        event = pygame.event.wait(timeout)
+        self.events_arrived = pygame.time.get_ticks()
+        if event.type == pygame.NOEVENT:
+            if self.state == "shop" and self.restock_countdown() != self.shown_countdown:
+                self.dirty = True
+            return []
+        return [event] + pygame.event.get()
+    
+    def run(self, exit_after_first_frame=False):
         """Main game loop"""
         while self.running:
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                
-                # Handle mouse movement for hover effects in shop
-                elif event.type == pygame.MOUSEMOTION and self.state == "shop":
-                    mouse_pos = pygame.mouse.get_pos()
-                    self.shop_hover = None
-                    
-                    # Check if mouse is over any clickable area
-                    for area_id, area_data in self.shop_clickable_areas.items():
-                        if area_data["rect"].collidepoint(mouse_pos):
-                            self.shop_hover = area_id
-                            break
-                
-                # Handle mouse clicks in menu (for save/load buttons)
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.state == "menu":
-                    mouse_pos = pygame.mouse.get_pos()
-                    if self.save_button_rect.collidepoint(mouse_pos):
-                        if self.save_game():
-                            print("Game saved successfully!")
-                    elif self.load_button_rect.collidepoint(mouse_pos):
-                        self.load_game()
-                        print("Game loaded successfully!")
-                        # Update player image after loading
-                        self.player_img = self.character_imgs[self.selected_character]
+            self.run_frame(exit_after_first_frame)
+        
+        # A match still running when the window closes counts as quit
+        if self.state == "playing":
+            self.end_match(OUTCOME_QUIT)
+        
+        # Deferred saves and writes that haven't had a chance to run yet
+        self.scheduler.flush()
+        
+        if self.watcher is not None:
+            self.watcher.close()
+        
+        if self.sim_process:
+            self.sim.close()
+        
+        self.profiles.close()
+        
+        if self.metrics is not None:
+            self.metrics.close()
+        
+        if self.latency_probe is not None:
+            self.latency_probe.close()
+            print(self.latency_probe.report())
+        
+        # Finish writing any captured frames
+        if self.recorder is not None:
+            self.recorder.close()
+        
+        # Stop music before quitting
+        pygame.mixer.quit()
+        pygame.quit()
+        sys.exit()
+    
+    def run_frame(self, exit_after_first_frame=False):
+        """One pass of the main loop: input, update, draw, then wait for the next frame"""
+        # Handle events
+        self.apply_event_filter()
+        events = self.next_events()
+        for event in events:
+            if event.type == PROBE_EVENT:
+                self.latency_probe.received(event)
+                continue
+            
+            if event.type != pygame.MOUSEMOTION:
+                self.dirty = True
+            
+            if self.console.handle_event(event):
+                continue
+            
+            if event.type == pygame.QUIT:
+                self.running = False
+            
+            # Handle mouse movement for hover effects in shop
+            elif event.type == pygame.MOUSEMOTION and self.state == "shop":
+                mouse_pos = pygame.mouse.get_pos()
+                hover = self.shop_hover
+                self.shop_hover = None
                 
-                # Handle mouse clicks in shop
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.state == "shop":
-                    mouse_pos = pygame.mouse.get_pos()
-                    
-                    # Check if any clickable area was clicked
-                    for area_id, area_data in self.shop_clickable_areas.items():
-                        if area_data["rect"].collidepoint(mouse_pos):
-                            if area_data["type"] == "select":
-                                # Select owned character
-                                self.selected_character = area_data["character"]
-                                self.player_img = self.character_imgs[self.selected_character]
-                                print(f"Selected character: {self.selected_character}")
-                            
-                            elif area_data["type"] == "buy" and area_data["can_afford"] and area_data["has_space"]:
-                                # Buy new character
-                                char_id = area_data["character"]
-                                char_price = CHARACTERS[char_id]["price"]
-                                
-                                self.permanent_bonds -= char_price
-                                self.owned_characters.append(char_id)
-                                self.available_characters.remove(char_id)
-                                self.selected_character = char_id
-                                self.player_img = self.character_imgs[char_id]
-                                print(f"Purchased character: {char_id}")
-                                
-                                # Auto-save after purchase
-                                self.save_game()
-                            
-                            elif area_data["type"] == "sell":
-                                # Sell character
-                                char_id = area_data["character"]
-                                sell_price = area_data["price"]
-                                
-                                # Remove from owned characters and add bonds
-                                self.owned_characters.remove(char_id)
-                                self.permanent_bonds += sell_price
-                                print(f"Sold character {char_id} for {sell_price} bonds")
-                                
-                                # Auto-save after selling
-                                self.save_game()
-                            break
+                # Check if mouse is over any clickable area
+                for area_id, area_data in self.shop_clickable_areas.items():
+                    if area_data["rect"].collidepoint(mouse_pos):
+                        self.shop_hover = area_id
+                        break
+                if self.shop_hover != hover:
+                    self.dirty = True
+            
+            # Handle mouse clicks in menu (for save/load buttons)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.state == "menu":
+                mouse_pos = pygame.mouse.get_pos()
+                if self.save_button_rect.collidepoint(mouse_pos):
+                    self.save_game()
+                elif self.load_button_rect.collidepoint(mouse_pos):
+                    self.load_game()
+                    # Update player image after loading
+                    self.player_img = self.character_imgs[self.selected_character]
+            
+            # Handle mouse clicks in shop
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.state == "shop":
+                mouse_pos = pygame.mouse.get_pos()
                 
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        if self.state == "playing":
-                            # Add match bonds to permanent bonds when returning to menu
-                            self.permanent_bonds += self.match_bonds
-                            self.match_bonds = 0
-                            self.state = "menu"
-                            # Auto-save when returning to menu
-                            self.save_game()
-                        elif self.state == "shop":
-                            self.state = "menu"
-                            # Auto-save when leaving shop
-                            self.save_game()
-                        else:
-                            # Auto-save before quitting
-                            self.save_game()
-                            self.running = False
-                    elif event.key == pygame.K_SPACE:
-                        if self.state == "menu":
-                            self.reset_game()
-                        elif self.state == "game_over":
-                            self.state = "menu"
-                        elif self.state == "playing":
-                            self.shoot()
-                    elif event.key == pygame.K_s and self.state == "menu":
-                        self.state = "shop"
-                    elif event.key == pygame.K_k and self.state == "menu":
-                        # Save game with K key
+                # Check if any clickable area was clicked
+                for area_id, area_data in self.shop_clickable_areas.items():
+                    if area_data["rect"].collidepoint(mouse_pos):
+                        self.shop_action(area_data)
+                        break
+            
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F10 and (self.recorder is None or not self.recorder.replay):
+                    self.toggle_recording()
+                elif event.key == pygame.K_F9 and self.recorder is not None:
+                    self.recorder.save_replay()
+                elif event.key == pygame.K_ESCAPE:
+                    if self.state == "playing":
+                        self.end_match(OUTCOME_QUIT)
+                        # Add match bonds to permanent bonds when returning to menu
+                        self.permanent_bonds += self.sim.match_bonds
+                        self.sim.match_bonds = 0
+                        self.state = "menu"
+                        # Auto-save when returning to menu
+                        self.defer("save", self.save_game)
+                    elif self.state == "shop":
+                        self.state = "menu"
+                        # Auto-save when leaving shop
+                        self.defer("save", self.save_game)
+                    else:
+                        # Auto-save before quitting
                         self.save_game()
-                    elif event.key == pygame.K_l and self.state == "menu":
-                        # Load game with L key
-                        self.load_game()
-                        # Update player image after loading
-                        self.player_img = self.character_imgs[self.selected_character]
+                        self.running = False
+                elif event.key == pygame.K_SPACE:
+                    if self.state == "menu":
+                        self.reset_game()
+                        self.input.consume_fire()  # The key that started the match isn't a shot
+                    elif self.state == "game_over":
+                        self.state = "menu"
+                        # Auto-save so the bonds and the run are kept
+                        self.defer("save", self.save_game)
+                elif event.key == pygame.K_s and self.state == "menu":
+                    self.state = "shop"
+                elif event.key == pygame.K_k and self.state == "menu":
+                    # Save game with K key
+                    self.save_game()
+                elif event.key == pygame.K_l and self.state == "menu":
+                    # Load game with L key
+                    self.load_game()
+                    # Update player image after loading
+                    self.player_img = self.character_imgs[self.selected_character]
+                    
+                # Handle shop interactions with keyboard
+                if self.state == "shop":
+                    if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]:
+                        # Convert key to index (K_1 -> 0, K_2 -> 1, etc.)
+                        char_index = event.key - pygame.K_1
                         
-                    # Handle shop interactions with keyboard
-                    if self.state == "shop":
-                        if event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9]:
-                            # Convert key to index (K_1 -> 0, K_2 -> 1, etc.)
-                            char_index = event.key - pygame.K_1
-                            
-                            # Only use number keys for selecting owned characters
-                            if char_index < len(self.owned_characters):
-                                char_id = self.owned_characters[char_index]
-                                self.selected_character = char_id
-                                self.player_img = self.character_imgs[char_id]
-                                print(f"Selected character: {char_id}")
-            
+                        # Only use number keys for selecting owned characters
+                        if char_index < len(self.owned_characters):
+                            char_id = self.owned_characters[char_index]
+                            self.selected_character = char_id
+                            self.player_img = self.character_imgs[char_id]
+                            log.info("Selected character: %s", char_id)
+        
+        self.input.begin_frame(events, self.events_arrived)
+        if self.console.open:
+            self.input.clear()  # Typing doesn't move or shoot
+        
+        if self.watcher is not None:
+            self.apply_hot_reload()
+        
+        if not self.needs_redraw():
+            # Static screen with nothing new to show: just run the timers,
+            # and the chores with all the time they need
             self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            self.queue_chores()
+            self.scheduler.drain()
+            return
         
-        # Stop music before quitting
-        pygame.mixer.quit()
-        pygame.quit()
-        sys.exit()
+        frame_start = time.perf_counter()
+        self.update()
+        draw_start = time.perf_counter()
+        self.draw()
+        if self.latency_probe is not None:
+            if self.state == "playing":
+                self.latency_probe.displayed()
+            else:
+                self.latency_probe.discard()
+        self.dirty = False
+        self.drawn_state = self.state
+        if self.recorder is not None:
+            # Copy the finished frame out for the writer thread
+            self.recorder.capture(self.screen)
+        if exit_after_first_frame:
+            # The first menu frame is on screen; tell bench_startup.py and stop
+            print(STARTUP_MARKER, flush=True)
+            self.running = False
+        if self.state == "playing":
+            # Only gameplay frames are judged against the frame budget
+            frame_ms = (time.perf_counter() - frame_start) * 1000
+            self.quality.sample(frame_ms)
+            self.console.frame(frame_ms)
+            if self.telemetry is not None:
+                self.telemetry.tick(self.sim.match_tick, frame_ms, self.sim.wave, len(self.sim.zombies),
+                                    len(self.sim.projectiles), self.quality.index)
+            if self.metrics is not None:
+                self.metrics.frames.inc()
+                self.metrics.frame_seconds.observe(frame_ms / 1000)
+                self.metrics.update_seconds.observe(draw_start - frame_start)
+                self.metrics.draw_seconds.observe(frame_ms / 1000 - (draw_start - frame_start))
+        # Chores get whatever is left of the frame budget
+        self.queue_chores()
+        self.scheduler.drain(self.pacer.next_deadline())
+        self.pacer.wait()
 
 if __name__ == "__main__":
     # Print emoji instructions for copying
@@ -1118,7 +1266,7 @@ if __name__ == "__main__":
 
 📋 Controls:
 🎯 WASD: Move character
-🔫 SPACE: Shoot at mouse cursor
+🔫 SPACE or left click: Shoot at mouse cursor (hold to keep firing)
 🛍️ S: Open shop from menu
 💾 L: Load saved game
 💾 K: Save game
@@ -1151,7 +1299,53 @@ Survive endless waves and collect Bonds! 💰
 - Max 4 characters in inventory
 - Can sell characters for bonds
 """
-    print(emoji_instructions)
-    print("Starting game...")
+    parser = argparse.ArgumentParser(description="Wild Rails - Zombie Survival")
+    parser.add_argument("--quality", choices=[level["name"].lower() for level in QUALITY_LEVELS],
+                        help="Pin the render quality level instead of adapting to frame time")
+    capture = parser.add_mutually_exclusive_group()
+    capture.add_argument("--record", choices=available_modes(),
+                         help="Record gameplay from launch (F10 toggles recording)")
+    capture.add_argument("--replay-seconds", type=float,
+                         help="Keep the last N seconds in memory for instant replay (F9 saves)")
+    parser.add_argument("--no-telemetry", action="store_true",
+                        help="Don't record match telemetry to the telemetry folder")
+    parser.add_argument("--hot-reload", action="store_true",
+                        help="Reload edited balance tables and assets in Wild Rails/ while running")
+    parser.add_argument("--sim-process", action="store_true",
+                        help="Run the match simulation in a separate process")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for wave spawn schedules, to replay the same waves")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE,
+                        help="Player profile to load and save (created if new)")
+    parser.add_argument("--slot", type=int, default=DEFAULT_SLOT,
+                        help="Save slot within the profile (default: %(default)s)")
+    parser.add_argument("--data-folder",
+                        help="Keep saves and run history in this folder instead of Wild Rails/")
+    parser.add_argument("--pacing", choices=PACING_MODES, default="tick",
+                        help="How to wait for the next frame: tick sleeps, busy spins for accuracy, "
+                             "hybrid sleeps then spins the last couple of milliseconds")
+    parser.add_argument("--latency-probe", action="store_true",
+                        help="Measure input-to-display latency and print it on exit")
+    parser.add_argument("--ai-budget", type=int, default=AI_BUDGET,
+                        help="Zombie heading updates per tick beyond those close to the player "
+                             "(default: %(default)s)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error"],
+                        help="Diagnostics to show on stderr (default: warning, or $WILD_RAILS_LOG)")
+    parser.add_argument("--exit-after-first-frame", action="store_true",
+                        help="Quit once the menu has been drawn; used by bench_startup.py")
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    
+    if not args.exit_after_first_frame:
+        print(emoji_instructions)
+        print("Starting game...")
     
-    Game().run()
+    Game(quality=args.quality, record=args.record, replay_seconds=args.replay_seconds,
+         telemetry=not args.no_telemetry, hot_reload=args.hot_reload,
+         sim_process=args.sim_process, seed=args.seed,
+         profile=args.profile, slot=args.slot, pacing=args.pacing, latency_probe=args.latency_probe,
+         ai_budget=args.ai_budget,
+         metrics_port=args.metrics_port,
+         data_folder=args.data_folder).run(exit_after_first_frame=args.exit_after_first_frame)
@@ -0,0 +1,74 @@
+import os
+import queue
+import threading
+
+POLL_INTERVAL = 0.25  # Seconds between checks of the watched files
+
+
+def _stamp(path):
+    """(modification time, size) of path, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """Polls a set of files on a thread and queues the ones that change
+
+    Polling works the same on every platform and a few dozen stat()
+    calls per interval cost nothing.  A change is only reported once the
+    file has looked the same for a whole interval, so editors that save
+    in several writes don't hand out half-written files.
+    """
+
+    def __init__(self, paths=(), interval=POLL_INTERVAL):
+        self.interval = interval
+        self.changes = queue.SimpleQueue()
+        self.stamps = {}    # path -> last reported stamp
+        self.settling = {}  # path -> stamp seen changing, waiting to settle
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.watch(paths)
+        self.thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self.thread.start()
+
+    def watch(self, paths):
+        """Start watching paths; files already watched keep their state"""
+        with self.lock:
+            for path in paths:
+                if path not in self.stamps:
+                    self.stamps[path] = _stamp(path)
+
+    def poll(self):
+        """Paths that changed since the last call, without blocking"""
+        changed = []
+        while True:
+            try:
+                path = self.changes.get_nowait()
+            except queue.Empty:
+                return changed
+            if path not in changed:
+                changed.append(path)
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                watched = list(self.stamps.items())
+            for path, reported in watched:
+                stamp = _stamp(path)
+                if stamp == reported:
+                    self.settling.pop(path, None)
+                elif self.settling.get(path) != stamp:
+                    self.settling[path] = stamp  # Changed; report once it holds still
+                else:
+                    del self.settling[path]
+                    with self.lock:
+                        self.stamps[path] = stamp
+                    if stamp is not None:
+                        self.changes.put(path)
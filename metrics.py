@@ -0,0 +1,240 @@
+"""Live metrics in Prometheus text format over HTTP
+
+Opt-in with --metrics-port.  An exporter thread serves /metrics on the
+loopback interface, so a dashboard agent on the kiosk can scrape frame
+times, entity counts, wave and bonds without an overlay on screen.
+
+The game thread never waits for the exporter.  A counter is one add
+and a histogram observation is a bisect and two adds on plain Python
+numbers, with no lock.  The exporter reads them as they stand when it is
+scraped; a scrape that lands mid-observation is off by one sample.
+Gauges such as the zombie count are read from the game by the exporter
+at scrape time, so they cost the frame nothing at all.
+
+    python metrics.py --self-test    # scrape a local exporter and check the output
+"""
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger("wild_rails.metrics")
+
+HOST = "127.0.0.1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; the frame budget at 60 FPS is about 0.0167
+FRAME_BUCKETS = (0.001, 0.002, 0.004, 0.008, 0.012, 0.0167, 0.020, 0.025, 0.033, 0.050, 0.100, 0.250)
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """A value read through a callable whenever it is scraped"""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {self.read()}"]
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=FRAME_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self):
+        counts = list(self.counts)  # One consistent set of buckets for this scrape
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        total = 0
+        for bound, count in zip(self.bounds, counts):
+            total += count
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {total}')
+        total += counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f"{self.name}_sum {self.sum:.6f}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """The whole exposition as Prometheus text"""
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:  # A gauge reading the game mid-change; skip it this scrape
+                log.debug("Could not read %s: %s", metric.name, e)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+
+class MetricsExporter:
+    """Serves a registry on http://HOST:port/metrics from a daemon thread"""
+
+    def __init__(self, registry, port, host=HOST):
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.registry = registry
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+        log.info("Serving metrics on http://%s:%d/metrics", host, self.port)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+class GameMetrics:
+    """The game's metrics and their exporter"""
+
+    def __init__(self, game, port):
+        registry = self.registry = MetricsRegistry()
+        self.frame_seconds = registry.add(Histogram(
+            "wild_rails_frame_seconds", "Update and draw time of gameplay frames"))
+        self.update_seconds = registry.add(Histogram(
+            "wild_rails_update_seconds", "Update time of gameplay frames"))
+        self.draw_seconds = registry.add(Histogram(
+            "wild_rails_draw_seconds", "Draw time of gameplay frames"))
+        self.frames = registry.add(Counter("wild_rails_frames_total", "Gameplay frames run"))
+        self.kills = registry.add(Counter("wild_rails_kills_total", "Zombies killed"))
+        self.waves = registry.add(Counter("wild_rails_waves_cleared_total", "Waves cleared"))
+        for name, help_text, read in (
+                ("wild_rails_playing", "1 while a match is being played",
+                 lambda: int(game.state == "playing")),
+                ("wild_rails_zombies", "Zombies alive", lambda: len(game.sim.zombies)),
+                ("wild_rails_awake_zombies", "Zombies near enough to the view to move every tick",
+                 lambda: len(game.sim.awake_zombies)),
+                ("wild_rails_projectiles", "Projectiles in flight", lambda: len(game.sim.projectiles)),
+                ("wild_rails_wave", "Current wave", lambda: game.sim.wave),
+                ("wild_rails_match_bonds", "Bonds earned this match", lambda: game.sim.match_bonds),
+                ("wild_rails_permanent_bonds", "Bonds banked in the save slot", lambda: game.permanent_bonds),
+                ("wild_rails_quality_level", "Render quality level index", lambda: game.quality.index),
+                ("wild_rails_chores_queued", "Deferred chores waiting for frame time",
+                 lambda: game.scheduler.pending())):
+            registry.add(Gauge(name, help_text, read))
+        self.exporter = MetricsExporter(registry, port)
+
+    def close(self):
+        self.exporter.close()
+
+
+def self_test():
+    """Scrape a local exporter with sample values and check what comes back"""
+    import time
+    import urllib.error
+    import urllib.request
+
+    registry = MetricsRegistry()
+    frames = registry.add(Counter("test_frames_total", "Frames"))
+    frame_seconds = registry.add(Histogram("test_frame_seconds", "Frame time"))
+    registry.add(Gauge("test_zombies", "Zombies", lambda: 42))
+    for seconds in (0.0005, 0.010, 0.010, 0.040, 1.0):
+        frames.inc()
+        frame_seconds.observe(seconds)
+
+    exporter = MetricsExporter(registry, 0)
+    try:
+        url = f"http://{HOST}:{exporter.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            content_type = response.headers["Content-Type"]
+            text = response.read().decode("utf-8")
+        samples = {}
+        for line in text.splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        expected = {
+            "test_frames_total": 5,
+            "test_zombies": 42,
+            'test_frame_seconds_bucket{le="0.001"}': 1,
+            'test_frame_seconds_bucket{le="0.012"}': 3,
+            'test_frame_seconds_bucket{le="0.05"}': 4,
+            'test_frame_seconds_bucket{le="+Inf"}': 5,
+            "test_frame_seconds_count": 5,
+        }
+        failures = [f"{name}: expected {value}, got {samples.get(name)}"
+                    for name, value in expected.items() if samples.get(name) != value]
+        if not content_type.startswith("text/plain"):
+            failures.append(f"content type {content_type}")
+        if abs(samples.get("test_frame_seconds_sum", 0) - 1.0605) > 1e-6:
+            failures.append(f"test_frame_seconds_sum: got {samples.get('test_frame_seconds_sum')}")
+        try:
+            urllib.request.urlopen(f"http://{HOST}:{exporter.port}/other", timeout=5)
+            failures.append("/other did not return 404")
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                failures.append(f"/other returned {e.code}")
+    finally:
+        exporter.close()
+
+    # What the game thread pays per frame: a few observations and increments
+    start = time.perf_counter()
+    for _ in range(100000):
+        frame_seconds.observe(0.010)
+        frames.inc()
+    cost_ns = (time.perf_counter() - start) / 100000 * 1e9
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"scraped {len(samples)} samples from {url}; observe + inc cost {cost_ns:.0f} ns")
+    return not failures
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Wild Rails metrics exporter")
+    parser.add_argument("--self-test", action="store_true", help="Scrape a local exporter and check the output")
+    args = parser.parse_args()
+    if not args.self_test:
+        parser.print_help()
+        sys.exit(0)
+    sys.exit(0 if self_test() else 1)
@@ -0,0 +1,214 @@
+"""Navigation grid and a shared flow field towards the player
+
+Rocks and wagons are rasterised once into a grid of CELL_SIZE cells
+covering the whole world.  Around the view, a flow field is built from
+that grid: a breadth-first distance map out from the player's cell,
+then one heading per cell.  Cells with a clear line to the player head
+straight for it; the others head for their neighbour nearest the
+player, which leads around obstacles.
+
+Every zombie steers by looking up the cell it stands in, so the cost of
+pathfinding depends on the size of the field, not the size of the
+horde.  The field is only rebuilt when the player moves to another cell
+or the view moves to another chunk.
+"""
+import numpy as np
+
+from sprite_cache import FACING_ANGLES
+from world import chunk_obstacles, CHUNK_SIZE, WORLD_CHUNKS_X, WORLD_CHUNKS_Y
+
+CELL_SIZE = 32
+CLEARANCE = 16  # Obstacles are grown by this much, about half a zombie
+# Neighbour steps (dx, dy), straight ones first so they win ties
+STEPS = ((1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, 1), (-1, -1), (1, -1))
+UNREACHED = np.iinfo(np.int32).max
+
+
+def shifted(a, dx, dy, fill=False):
+    """a moved by (dx, dy) cells: out[y, x] = a[y - dy, x - dx], fill where that is outside"""
+    h, w = a.shape
+    out = np.full_like(a, fill)
+    out[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] = \
+        a[max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)]
+    return out
+
+
+class NavGrid:
+    """Which CELL_SIZE cells of the world are blocked by obstacles"""
+
+    def __init__(self, seed=0):
+        per_chunk = CHUNK_SIZE // CELL_SIZE
+        self.blocked = np.zeros((WORLD_CHUNKS_Y * per_chunk, WORLD_CHUNKS_X * per_chunk), dtype=bool)
+        for chunk_y in range(WORLD_CHUNKS_Y):
+            for chunk_x in range(WORLD_CHUNKS_X):
+                for kind, rect in chunk_obstacles(chunk_x, chunk_y, seed):
+                    rect = rect.inflate(CLEARANCE * 2, CLEARANCE * 2)
+                    self.blocked[max(0, rect.top // CELL_SIZE):(rect.bottom - 1) // CELL_SIZE + 1,
+                                 max(0, rect.left // CELL_SIZE):(rect.right - 1) // CELL_SIZE + 1] = True
+        self.rows = self.blocked.tolist()  # For quick single-cell lookups
+
+    def is_blocked(self, x, y):
+        """Whether a world position is inside an obstacle; outside the world is open"""
+        row = int(y) // CELL_SIZE
+        col = int(x) // CELL_SIZE
+        return 0 <= row < len(self.rows) and 0 <= col < len(self.rows[0]) and self.rows[row][col]
+
+    def window(self, col, row, cols, rows):
+        """Blocked cells of a window of the grid, open beyond the world edges"""
+        out = np.zeros((rows, cols), dtype=bool)
+        h, w = self.blocked.shape
+        top, left = max(row, 0), max(col, 0)
+        bottom, right = min(row + rows, h), min(col + cols, w)
+        if top < bottom and left < right:
+            out[top - row:bottom - row, left - col:right - col] = self.blocked[top:bottom, left:right]
+        return out
+
+
+class FlowField:
+    """Per-cell headings towards a goal over a window of the nav grid
+
+    rows[row][col] is (heading_x, heading_y, facing, clear, near) for the
+    cell at (origin_col + col, origin_row + row).  Clear cells can see the
+    goal; near cells are in or next to an obstacle.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.key = None
+        self.origin_col = self.origin_row = 0
+        self.cols = self.rows_count = 0
+        self.rows = []
+        self.builds = 0
+
+    def update(self, window, goal_x, goal_y):
+        """Rebuild for a world-rect window and goal if either changed cell; True if rebuilt"""
+        col = window.left // CELL_SIZE
+        row = window.top // CELL_SIZE
+        cols = -(-window.width // CELL_SIZE)
+        rows = -(-window.height // CELL_SIZE)
+        goal_col = int(goal_x) // CELL_SIZE - col
+        goal_row = int(goal_y) // CELL_SIZE - row
+        key = (col, row, cols, rows, goal_col, goal_row)
+        if key == self.key:
+            return False
+        self.key = key
+        self.origin_col, self.origin_row, self.cols, self.rows_count = col, row, cols, rows
+        if not (0 <= goal_col < cols and 0 <= goal_row < rows):
+            self.rows = []  # Goal outside the window: everything heads straight for it
+            return True
+        blocked = self.grid.window(col, row, cols, rows)
+        near = blocked.copy()
+        for dx, dy in STEPS:
+            near |= shifted(blocked, dx, dy)
+        blocked[goal_row, goal_col] = False
+        heading_x, heading_y, clear = self.build(~blocked, goal_col, goal_row,
+                                                 goal_x - col * CELL_SIZE, goal_y - row * CELL_SIZE)
+        # Same rounding as SpriteCache.angle_index, for the whole field at once
+        facing = np.rint(np.degrees(np.arctan2(-heading_y, heading_x)) / (360.0 / FACING_ANGLES))
+        facing = facing.astype(np.int64) % FACING_ANGLES
+        self.rows = [list(zip(*columns)) for columns in
+                     zip(heading_x.tolist(), heading_y.tolist(), facing.tolist(), clear.tolist(), near.tolist())]
+        self.builds += 1
+        return True
+
+    def build(self, free, goal_col, goal_row, goal_x, goal_y):
+        """(heading_x, heading_y, clear) arrays for a window; goal_x/y in window pixels"""
+        rows, cols = free.shape
+        # Diagonal steps may not cut the corner of a blocked cell
+        diagonal_ok = {(dx, dy): shifted(free, dx, 0) & shifted(free, 0, dy) for dx, dy in STEPS[4:]}
+
+        # Breadth-first distance in steps from the goal.  The frontier is
+        # copied into a padded array so each neighbour is a slice of it.
+        distance = np.full(free.shape, UNREACHED, dtype=np.int32)
+        distance[goal_row, goal_col] = 0
+        frontier = np.zeros(free.shape, dtype=bool)
+        frontier[goal_row, goal_col] = True
+        unvisited = free.copy()
+        unvisited[goal_row, goal_col] = False
+        padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+        def moved(dx, dy):
+            return padded[1 - dy:rows + 1 - dy, 1 - dx:cols + 1 - dx]
+        steps = 0
+        while True:
+            padded[1:-1, 1:-1] = frontier
+            grown = moved(1, 0) | moved(-1, 0) | moved(0, 1) | moved(0, -1)
+            for (dx, dy), ok in diagonal_ok.items():
+                grown |= moved(dx, dy) & ok
+            frontier = grown & unvisited
+            if not frontier.any():
+                break
+            steps += 1
+            distance[frontier] = steps
+            unvisited &= ~frontier
+
+        # Cells with a clear line to the goal head straight for it.  A cell
+        # can see the goal if the next cell along the line back to it can,
+        # so rings of cells around the goal are settled from the inside out.
+        ys, xs = np.mgrid[0:rows, 0:cols]
+        dx = xs - goal_col
+        dy = ys - goal_row
+        ring = np.maximum(np.abs(dx), np.abs(dy)).ravel()
+        order = np.argsort(ring, kind="stable")
+        bounds = np.searchsorted(ring[order], np.arange(ring.max() + 2))
+        scale = np.maximum(ring, 1)
+        back = ((ys.ravel() - np.rint(dy.ravel() / scale).astype(np.int64)) * cols +
+                xs.ravel() - np.rint(dx.ravel() / scale).astype(np.int64))
+        visible = np.zeros(rows * cols, dtype=bool)
+        visible[goal_row * cols + goal_col] = True
+        open_cells = free.ravel()
+        for radius in range(1, len(bounds) - 1):
+            cells = order[bounds[radius]:bounds[radius + 1]]
+            visible[cells] = open_cells[cells] & visible[back[cells]]
+        visible = visible.reshape(rows, cols)
+
+        heading_x = goal_x - (xs + 0.5) * CELL_SIZE
+        heading_y = goal_y - (ys + 0.5) * CELL_SIZE
+        # The rest head for the neighbour nearest the goal
+        best = distance.copy()
+        step = np.full(free.shape, -1)
+        for index, (sx, sy) in enumerate(STEPS):
+            neighbour = shifted(distance, -sx, -sy, fill=UNREACHED)
+            if index >= 4:
+                neighbour = np.where(diagonal_ok[(-sx, -sy)], neighbour, UNREACHED)
+            closer = neighbour < best
+            best = np.where(closer, neighbour, best)
+            step[closer] = index
+        around = ~visible & (step >= 0)
+        steps_x = np.array([sx for sx, sy in STEPS], dtype=np.float64)
+        steps_y = np.array([sy for sx, sy in STEPS], dtype=np.float64)
+        heading_x[around] = steps_x[step[around]]
+        heading_y[around] = steps_y[step[around]]
+
+        length = np.maximum(np.hypot(heading_x, heading_y), 1e-9)
+        return heading_x / length, heading_y / length, visible
+
+    def heading(self, x, y):
+        """(heading_x, heading_y, facing, clear, near) for a world position, or None outside the field"""
+        row = int(y) // CELL_SIZE - self.origin_row
+        col = int(x) // CELL_SIZE - self.origin_col
+        if 0 <= row < len(self.rows) and 0 <= col < self.cols:
+            return self.rows[row][col]
+        return None
+
+
+if __name__ == "__main__":
+    # Build time for a field the size of the simulated area, with the
+    # obstacles at a stretch of track
+    import time
+
+    import pygame
+
+    start = time.perf_counter()
+    grid = NavGrid()
+    print(f"nav grid: {grid.blocked.shape[1]}x{grid.blocked.shape[0]} cells, "
+          f"{grid.blocked.mean() * 100:.1f}% blocked, built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    field = FlowField(grid)
+    window = pygame.Rect(20 * CHUNK_SIZE, 2 * CHUNK_SIZE, 6 * CHUNK_SIZE, 5 * CHUNK_SIZE)
+    times = []
+    for i in range(50):
+        start = time.perf_counter()
+        field.update(window, window.centerx + (i % 10) * CELL_SIZE, window.centery)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    print(f"flow field: {field.cols}x{field.rows_count} cells, median {times[len(times) // 2]:.2f} ms, "
+          f"max {times[-1]:.2f} ms per rebuild")
@@ -0,0 +1,168 @@
+"""Co-op client: sends local input and draws the server's replicated state
+
+    python net_client.py --host 127.0.0.1 --port 47800 --character Cowboy
+"""
+import argparse
+import socket
+
+import pygame
+
+import netcode
+from balance import CHARACTERS, DEFAULT_CHARACTER, ensure_loaded
+from simulation import PLAYER_SIZE
+from sprite_cache import SpriteCache
+from world import Camera, ChunkCache
+
+
+class NetClient:
+    """Non-blocking UDP connection to a MatchServer, polled once per frame"""
+
+    def __init__(self, host, port, character=DEFAULT_CHARACTER):
+        self.addr = (host, port)
+        self.character = character
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.player_id = None
+        self.world = netcode.ClientWorld()
+        self.seq = 0
+
+    def connect(self):
+        """(Re)send the join request; call until player_id is set"""
+        self.sock.sendto(netcode.encode_hello(self.character), self.addr)
+
+    def send_input(self, move_x, move_y, fire, aim_x, aim_y):
+        if self.player_id is None:
+            self.connect()
+            return
+        self.seq += 1
+        self.sock.sendto(netcode.encode_input(self.seq, self.world.latest_tick,
+                                              move_x, move_y, fire, aim_x, aim_y), self.addr)
+
+    def poll(self):
+        """Drain every waiting datagram; returns True if new state arrived"""
+        updated = False
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(65536)
+            except (BlockingIOError, InterruptedError):
+                return updated
+            except ConnectionError:
+                continue  # ICMP port unreachable while the server is starting
+            kind = data[:1]
+            if kind == netcode.WELCOME:
+                self.player_id, _ = netcode.decode_welcome(data)
+            elif kind == netcode.SNAPSHOT:
+                updated |= self.world.apply(netcode.decode_snapshot(data))
+
+    def close(self):
+        try:
+            self.sock.sendto(netcode.BYE, self.addr)
+        finally:
+            self.sock.close()
+
+
+def run_client(host, port, character):
+    # The game's sprites and backgrounds, without its saves, telemetry or sound
+    from game import (COLORS, FPS, SCREEN_WIDTH, SCREEN_HEIGHT, WALK_FRAME_TICKS, configure_logging,
+                      find_image_folder, load_sprite_images)
+
+    configure_logging()
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Wild Rails - Co-op")
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 36)
+    folder = find_image_folder()
+    ensure_loaded(folder)
+    cache = SpriteCache()
+    for name, img in load_sprite_images(folder).items():
+        cache.add(name, img)
+    chunk_cache = ChunkCache(SCREEN_WIDTH, SCREEN_HEIGHT)  # The server's world seed
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+    if character not in CHARACTERS:
+        character = DEFAULT_CHARACTER
+    client = NetClient(host, port, character)
+    client.connect()
+    facing = {}  # zombie id -> (last position, facing index)
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+
+        keys = pygame.key.get_pressed()
+        move_x = (keys[pygame.K_d] or keys[pygame.K_RIGHT]) - (keys[pygame.K_a] or keys[pygame.K_LEFT])
+        move_y = (keys[pygame.K_s] or keys[pygame.K_DOWN]) - (keys[pygame.K_w] or keys[pygame.K_UP])
+        aim_x, aim_y = camera.to_world(*pygame.mouse.get_pos())
+        client.send_input(move_x, move_y, bool(keys[pygame.K_SPACE]), aim_x, aim_y)
+        client.poll()
+
+        snapshot = client.world.latest
+        if snapshot is None or client.player_id not in snapshot["players"]:
+            screen.fill(COLORS['sand'])
+            text = font.render("Connecting to co-op server...", True, COLORS['black'])
+            screen.blit(text, text.get_rect(center=screen.get_rect().center))
+            pygame.display.flip()
+            clock.tick(FPS)
+            continue
+
+        players = {player_id: netcode.dequantize(x, y) + (alive,)
+                   for player_id, (x, y, alive) in snapshot["players"].items()}
+        me = players[client.player_id]
+        camera.follow(me[0] + PLAYER_SIZE // 2, me[1] + PLAYER_SIZE // 2)
+        cam_x, cam_y = camera.x, camera.y
+        chunk_cache.draw(screen, camera)
+
+        for player_id, (x, y, alive) in players.items():
+            name = character if player_id == client.player_id else DEFAULT_CHARACTER
+            sprite, (off_x, off_y) = cache.get(name if alive else "Zombie")
+            screen.blit(sprite, (int(x - cam_x) + PLAYER_SIZE // 2 + off_x,
+                                      int(y - cam_y) + PLAYER_SIZE // 2 + off_y))
+
+        for proj_x, proj_y in client.world.projectiles.values():
+            x, y = netcode.dequantize(proj_x, proj_y)
+            pygame.draw.circle(screen, COLORS['yellow'], (int(x - cam_x), int(y - cam_y)), 6)
+
+        walk_tick = pygame.time.get_ticks() * FPS // 1000 // WALK_FRAME_TICKS
+        zombies = client.world.zombies
+        for zombie_id, (zombie_x, zombie_y, health) in zombies.items():
+            x, y = netcode.dequantize(zombie_x, zombie_y)
+            # Derive facing from replicated movement instead of sending it
+            last, index = facing.get(zombie_id, ((x, y), 0))
+            if (x, y) != last:
+                index = cache.angle_index(x - last[0], y - last[1])
+            facing[zombie_id] = ((x, y), index)
+            sprite, (off_x, off_y) = cache.get("Zombie", index, walk_tick + zombie_id)
+            screen_x, screen_y = int(x - cam_x), int(y - cam_y)
+            screen.blit(sprite, (screen_x + 24 + off_x, screen_y + 24 + off_y))
+            pygame.draw.rect(screen, COLORS['red'], (screen_x, screen_y - 10, 48, 6))
+            pygame.draw.rect(screen, COLORS['green'], (screen_x, screen_y - 10, health * 48 // 255, 6))
+        for zombie_id in [z for z in facing if z not in zombies]:
+            del facing[zombie_id]
+
+        texts = [f"Co-op player {client.player_id}", f"Wave: {snapshot['wave']}",
+                 f"Team Bonds: {snapshot['bonds']}", f"Players: {len(players)}"]
+        if snapshot["flags"] & netcode.FLAG_GAME_OVER:
+            texts.append("GAME OVER - press ESC")
+        for i, text in enumerate(texts):
+            screen.blit(font.render(text, True, COLORS['black']), (10, 10 + i * 40))
+        pygame.display.flip()
+        clock.tick(FPS)
+
+    client.close()
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wild Rails co-op client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=netcode.DEFAULT_PORT)
+    parser.add_argument("--character", default=DEFAULT_CHARACTER)
+    args = parser.parse_args()
+    run_client(args.host, args.port, args.character)
+
+
+if __name__ == "__main__":
+    main()
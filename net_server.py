@@ -0,0 +1,318 @@
+"""Authoritative co-op server
+
+Runs the match Simulation on an asyncio loop over UDP on localhost.
+Clients send their latest input each frame and acknowledge the newest
+snapshot they have; the server answers with snapshots delta-compressed
+against that acknowledged state and limited to the area around each
+client's player.
+
+    python net_server.py                      # serve a match on 127.0.0.1
+    python net_server.py --bench --zombies 1000 --clients 2
+"""
+import argparse
+import asyncio
+import heapq
+import math
+import random
+import statistics
+import time
+
+import netcode
+from balance import CHARACTERS, DEFAULT_CHARACTER
+from simulation import Simulation, VIEW_WIDTH, VIEW_HEIGHT
+from world import CHUNK_SIZE
+
+TICK_RATE = 60           # Simulation ticks per second
+SNAPSHOT_INTERVAL = 2    # Ticks between snapshots (30 snapshots per second)
+INTEREST_MARGIN = CHUNK_SIZE  # Extra pixels around a client's view that are replicated
+CLIENT_TIMEOUT = 5.0     # Seconds of silence before a client is dropped
+PENDING_SNAPSHOTS = 32   # Unacknowledged snapshot states kept per client (about 1 s)
+RESTART_DELAY = 5.0      # Seconds the game over screen shows before a new match starts
+
+
+class ClientSession:
+    """Server-side bookkeeping for one connected client"""
+
+    def __init__(self, addr, player_id):
+        self.addr = addr
+        self.player_id = player_id
+        self.last_seq = -1
+        self.ack_tick = 0
+        self.last_heard = time.monotonic()
+        # tick -> (zombies, projectiles) the client holds once it applies that snapshot
+        self.sent = {0: ({}, {})}
+        self.bytes_sent = 0
+        self.snapshots_sent = 0
+
+
+class MatchServer(asyncio.DatagramProtocol):
+    """Ticks the simulation and replicates it to every client"""
+
+    def __init__(self, simulation):
+        self.sim = simulation
+        self.sessions = {}  # addr -> ClientSession
+        self.transport = None
+        self.tick_times = []
+        self.game_over_at = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        kind = data[:1]
+        session = self.sessions.get(addr)
+        if kind == netcode.HELLO:
+            if session is None:
+                character = netcode.decode_hello(data)
+                if character not in CHARACTERS:
+                    character = DEFAULT_CHARACTER
+                player_id = self.sim.add_player(character)
+                if player_id is None:
+                    return  # Server full
+                session = ClientSession(addr, player_id)
+                self.sessions[addr] = session
+            self.transport.sendto(netcode.encode_welcome(session.player_id, self.sim.tick), addr)
+        elif kind == netcode.INPUT and session is not None:
+            seq, ack_tick, move_x, move_y, fire, aim_x, aim_y = netcode.decode_input(data)
+            session.last_heard = time.monotonic()
+            if seq <= session.last_seq:
+                return  # Stale or duplicated datagram
+            session.last_seq = seq
+            if ack_tick in session.sent:
+                session.ack_tick = ack_tick
+            self.sim.set_input(session.player_id, max(-1, min(1, move_x)),
+                               max(-1, min(1, move_y)), fire, aim_x, aim_y)
+        elif kind == netcode.BYE and session is not None:
+            self.drop(addr)
+
+    def drop(self, addr):
+        session = self.sessions.pop(addr, None)
+        if session is not None:
+            self.sim.remove_player(session.player_id)
+
+    def tick(self):
+        """One server tick: step the simulation, then replicate if due"""
+        start = time.perf_counter()
+        self.sim.step()
+        if self.sim.tick % SNAPSHOT_INTERVAL == 0:
+            self.send_snapshots()
+        self.tick_times.append(time.perf_counter() - start)
+
+        now = time.monotonic()
+        for addr in [a for a, s in self.sessions.items() if now - s.last_heard > CLIENT_TIMEOUT]:
+            self.drop(addr)
+
+        # Once everyone is down, show game over for a while, then play again
+        if not self.sim.game_over:
+            self.game_over_at = None
+        elif self.game_over_at is None:
+            self.game_over_at = now
+        elif now - self.game_over_at >= RESTART_DELAY:
+            self.sim.restart()
+            self.game_over_at = None
+
+    def send_snapshots(self):
+        sim = self.sim
+        # Quantise every entity once per snapshot, shared by all clients
+        offset = netcode.POSITION_OFFSET
+        zombies = {z[14]: (int(z[0]) + offset, int(z[1]) + offset, max(0, int(255 * z[2] / z[3])))
+                   for z in sim.zombies}
+        projectiles = {p[7]: netcode.quantize(p[0], p[1]) for p in sim.projectiles}
+        players = {player_id: netcode.quantize(*p.pos) + (int(p.alive),)
+                   for player_id, p in sim.players.items()}
+        flags = netcode.FLAG_GAME_OVER if sim.game_over else 0
+
+        for session in self.sessions.values():
+            packet, known = self.build_snapshot(session, players, zombies, projectiles, flags)
+            session.sent[sim.tick] = known
+            # Forget states older than the acknowledged one; they can never be a base again
+            for old_tick in [t for t in session.sent if t and t < session.ack_tick]:
+                del session.sent[old_tick]
+            # A client that stops acknowledging only holds up PENDING_SNAPSHOTS
+            # states; once its acknowledged state is gone it gets full snapshots
+            while len(session.sent) > PENDING_SNAPSHOTS + 1:
+                del session.sent[next(t for t in session.sent if t)]
+            self.transport.sendto(packet, session.addr)
+            session.bytes_sent += len(packet)
+            session.snapshots_sent += 1
+
+    def build_snapshot(self, session, players, zombies, projectiles, flags):
+        """Encode one client's snapshot; returns (packet, state the client will hold)"""
+        player = self.sim.players.get(session.player_id)
+        center_x, center_y = netcode.quantize(*player.center)
+        half_w = VIEW_WIDTH // 2 + INTEREST_MARGIN
+        half_h = VIEW_HEIGHT // 2 + INTEREST_MARGIN
+
+        # Interest management: only what is near this client's player
+        left, right = center_x - half_w, center_x + half_w
+        top, bottom = center_y - half_h, center_y + half_h
+        visible_zombies = {i: s for i, s in zombies.items()
+                           if left <= s[0] <= right and top <= s[1] <= bottom}
+        visible_projectiles = {i: s for i, s in projectiles.items()
+                               if left <= s[0] <= right and top <= s[1] <= bottom}
+
+        base_zombies, base_projectiles = session.sent.get(session.ack_tick, session.sent[0])
+        base_tick = session.ack_tick if session.ack_tick in session.sent else 0
+
+        def distance(state):
+            return abs(state[0] - center_x) + abs(state[1] - center_y)
+
+        # Byte budget: header, all players, then removals, projectiles and zombies
+        room = (netcode.MAX_SNAPSHOT_BYTES - netcode.SNAPSHOT_HEADER.size
+                - netcode.REMOVED_HEADER.size - len(players) * netcode.PLAYER_ENTRY.size)
+        removed_room = room // 4 // netcode.REMOVED_ENTRY.size
+        zombie_ids, removed_zombies = netcode.diff_entities(visible_zombies, base_zombies)
+        projectile_ids, removed_projectiles = netcode.diff_entities(visible_projectiles, base_projectiles)
+        removed_zombies = removed_zombies[:removed_room]
+        removed_projectiles = removed_projectiles[:max(0, removed_room - len(removed_zombies))]
+        room -= (len(removed_zombies) + len(removed_projectiles)) * netcode.REMOVED_ENTRY.size
+
+        # Over budget, the entities closest to the player go first and the
+        # rest stay stale until a later snapshot
+        projectile_room = min(len(projectile_ids), room // 3 // netcode.PROJECTILE_ENTRY.size)
+        if projectile_room < len(projectile_ids):
+            projectile_ids = heapq.nsmallest(projectile_room, projectile_ids,
+                                             key=lambda i: distance(visible_projectiles[i]))
+        room -= projectile_room * netcode.PROJECTILE_ENTRY.size
+        zombie_room = room // netcode.ZOMBIE_ENTRY.size
+        if zombie_room < len(zombie_ids):
+            zombie_ids = heapq.nsmallest(zombie_room, zombie_ids,
+                                         key=lambda i: distance(visible_zombies[i]))
+
+        packet = netcode.encode_snapshot(
+            self.sim.tick, base_tick, self.sim.wave, self.sim.match_bonds, flags, players,
+            visible_zombies, zombie_ids, visible_projectiles, projectile_ids,
+            removed_zombies, removed_projectiles)
+
+        known_zombies = dict(base_zombies)
+        known_zombies.update((i, visible_zombies[i]) for i in zombie_ids)
+        for i in removed_zombies:
+            known_zombies.pop(i, None)
+        known_projectiles = dict(base_projectiles)
+        known_projectiles.update((i, visible_projectiles[i]) for i in projectile_ids)
+        for i in removed_projectiles:
+            known_projectiles.pop(i, None)
+        return packet, (known_zombies, known_projectiles)
+
+
+async def tick_loop(server, duration=None):
+    """Tick at TICK_RATE until duration seconds pass (or forever)"""
+    interval = 1.0 / TICK_RATE
+    start = time.perf_counter()
+    next_tick = start
+    while duration is None or time.perf_counter() - start < duration:
+        server.tick()
+        next_tick += interval
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+
+
+async def serve(host, port, seed=None):
+    loop = asyncio.get_running_loop()
+    server = MatchServer(Simulation(seed))
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(host, port))
+    print(f"Co-op server listening on {host}:{port}")
+    try:
+        await tick_loop(server)
+    finally:
+        transport.close()
+
+
+class StandInClient(asyncio.DatagramProtocol):
+    """Headless client for benchmarks: random inputs, full snapshot decoding"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.world = netcode.ClientWorld()
+        self.transport = None
+        self.seq = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+        self.applied = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.sendto(netcode.encode_hello("Torcher"))
+
+    def datagram_received(self, data, addr):
+        if data[:1] == netcode.SNAPSHOT:
+            self.bytes_received += len(data)
+            self.snapshots += 1
+            if self.world.apply(netcode.decode_snapshot(data)):
+                self.applied += 1
+
+    def send_input(self):
+        self.seq += 1
+        angle = self.rng.uniform(0, 2 * math.pi)
+        self.transport.sendto(netcode.encode_input(
+            self.seq, self.world.latest_tick, self.rng.choice((-1, 0, 1)),
+            self.rng.choice((-1, 0, 1)), True, 2000 * math.cos(angle), 1024 + 2000 * math.sin(angle)))
+
+
+async def benchmark(port, zombies, clients, seconds):
+    loop = asyncio.get_running_loop()
+    sim = Simulation(seed=1)
+    sim.invulnerable = True
+    server = MatchServer(sim)
+    server_transport, _ = await loop.create_datagram_endpoint(lambda: server,
+                                                              local_addr=("127.0.0.1", port))
+    bots = []
+    for i in range(clients):
+        bot = StandInClient(seed=i)
+        await loop.create_datagram_endpoint(lambda bot=bot: bot, remote_addr=("127.0.0.1", port))
+        bots.append(bot)
+    await asyncio.sleep(0.1)  # Let the handshakes land
+    sim.spawn_many(zombies)
+
+    async def drive_inputs():
+        while True:
+            for bot in bots:
+                bot.send_input()
+            await asyncio.sleep(1.0 / TICK_RATE)
+
+    driver = asyncio.ensure_future(drive_inputs())
+    server.tick_times.clear()
+    await tick_loop(server, seconds)
+    driver.cancel()
+
+    times = sorted(t * 1000 for t in server.tick_times)
+    print(f"{len(sim.zombies)} zombies, {len(sim.projectiles)} projectiles, "
+          f"{len(server.sessions)} clients, {len(times)} ticks in {seconds}s")
+    print(f"server tick: mean {statistics.mean(times):.2f} ms, "
+          f"p99 {times[int(len(times) * 0.99) - 1]:.2f} ms, max {times[-1]:.2f} ms")
+    for i, bot in enumerate(bots):
+        applied = len(bot.world.zombies)
+        print(f"client {i + 1}: {bot.bytes_received / seconds / 1024:.1f} KiB/s, "
+              f"{bot.snapshots} snapshots ({bot.applied} applied), "
+              f"avg {bot.bytes_received / max(1, bot.snapshots):.0f} B, "
+              f"{applied} zombies replicated")
+
+    server_transport.close()
+    for bot in bots:
+        bot.transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wild Rails co-op server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=netcode.DEFAULT_PORT)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--bench", action="store_true", help="Benchmark with stand-in clients")
+    parser.add_argument("--zombies", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.bench:
+        asyncio.run(benchmark(args.port, args.zombies, args.clients, args.seconds))
+        return
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
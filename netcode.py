@@ -0,0 +1,172 @@
+"""Wire format for local co-op
+
+All messages are single UDP datagrams starting with a one-byte type.
+Snapshots are delta-compressed: each one names the base tick it was
+encoded against (0 for a full snapshot), and carries only the entities
+whose quantised state differs from that base, plus the ids that left the
+client's interest area.
+"""
+import struct
+
+DEFAULT_PORT = 47800
+MAX_SNAPSHOT_BYTES = 1200  # Stay under a typical MTU so datagrams never fragment
+POSITION_OFFSET = 1024     # Lets positions just past the world edge fit in uint16
+
+HELLO = b"H"
+WELCOME = b"W"
+INPUT = b"I"
+SNAPSHOT = b"S"
+BYE = b"B"
+
+HELLO_FORMAT = struct.Struct("!c16s")          # type, character name
+WELCOME_FORMAT = struct.Struct("!cBI")         # type, player id, server tick
+INPUT_FORMAT = struct.Struct("!cIIbb?ff")      # type, seq, acked tick, move x/y, fire, aim x/y
+SNAPSHOT_HEADER = struct.Struct("!cIIHIBHHH")  # type, tick, base tick, wave, bonds, flags,
+                                               # player, zombie and projectile entry counts
+REMOVED_HEADER = struct.Struct("!HH")          # removed zombie and projectile counts
+PLAYER_ENTRY = struct.Struct("!BHHB")          # id, x, y, alive
+ZOMBIE_ENTRY = struct.Struct("!IHHB")          # id, x, y, health (0-255 of max)
+PROJECTILE_ENTRY = struct.Struct("!IHH")       # id, x, y
+REMOVED_ENTRY = struct.Struct("!I")
+
+FLAG_GAME_OVER = 1
+
+
+def quantize(x, y):
+    """World position to the uint16 pair sent on the wire"""
+    return (max(0, min(65535, int(x) + POSITION_OFFSET)),
+            max(0, min(65535, int(y) + POSITION_OFFSET)))
+
+
+def dequantize(qx, qy):
+    return qx - POSITION_OFFSET, qy - POSITION_OFFSET
+
+
+def encode_hello(character):
+    return HELLO_FORMAT.pack(HELLO, character.encode("utf-8")[:16])
+
+
+def decode_hello(data):
+    _, name = HELLO_FORMAT.unpack_from(data)
+    return name.rstrip(b"\0").decode("utf-8", "replace")
+
+
+def encode_welcome(player_id, tick):
+    return WELCOME_FORMAT.pack(WELCOME, player_id, tick)
+
+
+def decode_welcome(data):
+    _, player_id, tick = WELCOME_FORMAT.unpack_from(data)
+    return player_id, tick
+
+
+def encode_input(seq, ack_tick, move_x, move_y, fire, aim_x, aim_y):
+    return INPUT_FORMAT.pack(INPUT, seq, ack_tick, move_x, move_y, fire, aim_x, aim_y)
+
+
+def decode_input(data):
+    _, seq, ack_tick, move_x, move_y, fire, aim_x, aim_y = INPUT_FORMAT.unpack_from(data)
+    return seq, ack_tick, move_x, move_y, fire, aim_x, aim_y
+
+
+def diff_entities(current, base):
+    """Changed entries and removed ids of current relative to base
+
+    current and base map id -> quantised tuple.
+    """
+    changed = [entity_id for entity_id, state in current.items() if base.get(entity_id) != state]
+    removed = [entity_id for entity_id in base if entity_id not in current]
+    return changed, removed
+
+
+def encode_snapshot(tick, base_tick, wave, bonds, flags, players, zombies, zombie_ids,
+                    projectiles, projectile_ids, removed_zombies, removed_projectiles):
+    """Pack one snapshot; zombies/projectiles map id -> quantised tuple"""
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT, tick, base_tick, wave, bonds, flags,
+                                  len(players), len(zombie_ids), len(projectile_ids))]
+    parts.extend(PLAYER_ENTRY.pack(player_id, *state) for player_id, state in players.items())
+    parts.extend(ZOMBIE_ENTRY.pack(zombie_id, *zombies[zombie_id]) for zombie_id in zombie_ids)
+    parts.extend(PROJECTILE_ENTRY.pack(proj_id, *projectiles[proj_id]) for proj_id in projectile_ids)
+    parts.append(REMOVED_HEADER.pack(len(removed_zombies), len(removed_projectiles)))
+    parts.extend(REMOVED_ENTRY.pack(entity_id) for entity_id in removed_zombies)
+    parts.extend(REMOVED_ENTRY.pack(entity_id) for entity_id in removed_projectiles)
+    return b"".join(parts)
+
+
+def decode_snapshot(data):
+    """Unpack a snapshot into a dict of its header fields and entity changes"""
+    (_, tick, base_tick, wave, bonds, flags,
+     player_count, zombie_count, projectile_count) = SNAPSHOT_HEADER.unpack_from(data)
+    offset = SNAPSHOT_HEADER.size
+    players = {}
+    for _ in range(player_count):
+        player_id, x, y, alive = PLAYER_ENTRY.unpack_from(data, offset)
+        players[player_id] = (x, y, alive)
+        offset += PLAYER_ENTRY.size
+    zombies = {}
+    for _ in range(zombie_count):
+        zombie_id, x, y, health = ZOMBIE_ENTRY.unpack_from(data, offset)
+        zombies[zombie_id] = (x, y, health)
+        offset += ZOMBIE_ENTRY.size
+    projectiles = {}
+    for _ in range(projectile_count):
+        proj_id, x, y = PROJECTILE_ENTRY.unpack_from(data, offset)
+        projectiles[proj_id] = (x, y)
+        offset += PROJECTILE_ENTRY.size
+    removed_zombie_count, removed_projectile_count = REMOVED_HEADER.unpack_from(data, offset)
+    offset += REMOVED_HEADER.size
+    removed_zombies = [REMOVED_ENTRY.unpack_from(data, offset + i * 4)[0]
+                       for i in range(removed_zombie_count)]
+    offset += removed_zombie_count * 4
+    removed_projectiles = [REMOVED_ENTRY.unpack_from(data, offset + i * 4)[0]
+                           for i in range(removed_projectile_count)]
+    return {"tick": tick, "base_tick": base_tick, "wave": wave, "bonds": bonds,
+            "flags": flags, "players": players, "zombies": zombies,
+            "projectiles": projectiles, "removed_zombies": removed_zombies,
+            "removed_projectiles": removed_projectiles}
+
+
+class ClientWorld:
+    """Replicated entity state kept by a client, one copy per snapshot tick
+
+    A delta is applied on top of the copy for its base tick, so lost or
+    reordered datagrams never corrupt the state.
+    """
+
+    HISTORY = 64
+
+    def __init__(self):
+        self.states = {0: ({}, {})}  # tick -> (zombies, projectiles)
+        self.latest_tick = 0
+        self.latest = None           # Most recent decoded snapshot header fields
+
+    def apply(self, snapshot):
+        """Apply a decoded snapshot; returns False if its base is unknown or stale"""
+        tick = snapshot["tick"]
+        base = self.states.get(snapshot["base_tick"])
+        if base is None or tick <= self.latest_tick:
+            return False
+        zombies = dict(base[0])
+        zombies.update(snapshot["zombies"])
+        for zombie_id in snapshot["removed_zombies"]:
+            zombies.pop(zombie_id, None)
+        projectiles = dict(base[1])
+        projectiles.update(snapshot["projectiles"])
+        for proj_id in snapshot["removed_projectiles"]:
+            projectiles.pop(proj_id, None)
+
+        self.states[tick] = (zombies, projectiles)
+        self.latest_tick = tick
+        self.latest = snapshot
+        # Keep the full-state base plus a window of recent ticks
+        for old_tick in [t for t in self.states if t and t < tick - self.HISTORY]:
+            del self.states[old_tick]
+        return True
+
+    @property
+    def zombies(self):
+        return self.states[self.latest_tick][0]
+
+    @property
+    def projectiles(self):
+        return self.states[self.latest_tick][1]
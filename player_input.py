@@ -0,0 +1,212 @@
+"""Input sampling, frame pacing and input-to-display latency measurement
+
+Input is read once at the start of each frame, straight after the pacer
+wakes, so the frame that is drawn next always reflects the newest input.
+A shot aims where the pointer was when fire was pressed rather than
+where it is when the event happens to be handled, and fire can be held
+down; the attack cooldown decides when a held fire shoots again.
+
+SDL's own event timestamps aren't exposed by pygame, so each event is
+stamped with pygame.time.get_ticks() when the game drains the queue.
+An event is therefore dated by the wake that picked it up, up to one
+frame after it really happened, and events drained together share a time.
+
+Pacing modes:
+    tick    sleep in Clock.tick (lowest CPU, wakes late by the OS timer slack)
+    busy    Clock.tick_busy_loop (accurate, spins a core)
+    hybrid  sleep until SPIN_MARGIN before the deadline, then spin
+"""
+import random
+import threading
+import time
+
+import pygame
+
+PACING_MODES = ["tick", "busy", "hybrid"]
+SPIN_MARGIN = 0.002        # Seconds hybrid pacing spins before a deadline
+PROBE_INTERVAL = (0.1, 0.3)  # Seconds between probe events, randomised
+FIRE_KEYS = (pygame.K_SPACE,)
+FIRE_BUTTON = 1
+PLAYING_EVENTS = [pygame.KEYUP, pygame.MOUSEMOTION, pygame.MOUSEBUTTONUP]  # Besides the base events
+PROBE_EVENT = pygame.event.custom_type()
+
+
+class PlayerInput:
+    """Input for one frame, sampled before the frame is updated"""
+
+    def __init__(self):
+        self.move = (0, 0)           # Direction, each -1, 0 or 1
+        self.pointer = (0, 0)        # Latest pointer position on screen
+        self.fire_pressed = False    # Fire went down during the last wait
+        self.fire_held = False
+        self.fire_aim = None         # Pointer position when fire went down
+        self.fire_consumed = False   # A press already used for something else, until released
+        self.events = []             # (arrival ticks, event) for this frame's events
+        self.fire_arrived = None     # Arrival ticks of the fire press
+
+    def begin_frame(self, events, arrived):
+        """Fold this frame's events, drained at get_ticks() time arrived, and the held keys into the snapshot"""
+        self.fire_pressed = False
+        self.fire_aim = None
+        self.fire_arrived = None
+        self.events = [(arrived, event) for event in events]
+        pointer = self.pointer
+        for event in events:
+            # Events arrive in order, so the pointer position seen when a
+            # fire event is reached is where the player was aiming
+            if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN):
+                pointer = event.pos
+            if ((event.type == pygame.KEYDOWN and event.key in FIRE_KEYS) or
+                    (event.type == pygame.MOUSEBUTTONDOWN and event.button == FIRE_BUTTON)):
+                if not self.fire_pressed:
+                    self.fire_pressed = True
+                    self.fire_aim = pointer
+                    self.fire_arrived = arrived
+        self.pointer = pygame.mouse.get_pos()
+
+        keys = pygame.key.get_pressed()
+        self.move = ((keys[pygame.K_d] or keys[pygame.K_RIGHT]) - (keys[pygame.K_a] or keys[pygame.K_LEFT]),
+                     (keys[pygame.K_s] or keys[pygame.K_DOWN]) - (keys[pygame.K_w] or keys[pygame.K_UP]))
+        self.fire_held = any(keys[key] for key in FIRE_KEYS) or pygame.mouse.get_pressed()[FIRE_BUTTON - 1]
+        if self.fire_consumed:
+            # Neither the consumed press nor holding it down fires; letting go ends that
+            self.fire_consumed = self.fire_held
+            self.fire_pressed = self.fire_held = False
+            self.fire_aim = self.fire_arrived = None
+
+    def consume_fire(self):
+        """This frame's fire press did something else (started a match); ignore it until released"""
+        self.fire_consumed = True
+
+    def clear(self):
+        """Drop this frame's movement and fire"""
+        self.move = (0, 0)
+        self.fire_pressed = self.fire_held = False
+        self.fire_aim = self.fire_arrived = None
+
+    def wants_fire(self):
+        return self.fire_pressed or self.fire_held
+
+    def aim(self):
+        """Screen position to shoot at"""
+        return self.fire_aim if self.fire_aim is not None else self.pointer
+
+
+class FramePacer:
+    """Waits out the rest of each frame in one of the PACING_MODES"""
+
+    def __init__(self, clock, fps, mode="tick"):
+        self.clock = clock
+        self.fps = fps
+        self.mode = mode
+        self.frame_time = 1.0 / fps
+        self.deadline = time.perf_counter() + self.frame_time
+        self.woke = time.perf_counter()
+
+    def next_deadline(self):
+        """perf_counter time by which the current frame should hand over to wait()"""
+        if self.mode == "hybrid":
+            return self.deadline
+        return self.woke + self.frame_time  # Clock.tick waits out frame_time from its last call
+
+    def wait(self):
+        if self.mode == "tick":
+            self.clock.tick(self.fps)
+            self.woke = time.perf_counter()
+            return
+        if self.mode == "busy":
+            self.clock.tick_busy_loop(self.fps)
+            self.woke = time.perf_counter()
+            return
+        remaining = self.deadline - time.perf_counter()
+        if remaining > SPIN_MARGIN:
+            time.sleep(remaining - SPIN_MARGIN)
+        while time.perf_counter() < self.deadline:
+            time.sleep(0)  # Spin, but let the audio and I/O threads have the GIL
+        now = time.perf_counter()
+        self.deadline += self.frame_time
+        if self.deadline < now:
+            self.deadline = now + self.frame_time  # A long frame; don't rush to catch up
+        self.clock.tick()  # Keep the clock's frame timing current
+
+
+class LatencyProbe:
+    """Measures input-to-display latency with synthetic input events
+
+    A thread posts timestamped PROBE_EVENTs at random moments, standing
+    in for a key press.  The game hands them to received() as it handles
+    its events and calls displayed() after the flip that first shows the
+    frame they fed into, so each sample covers the wait in the queue,
+    the update, the draw and the flip.
+    """
+
+    def __init__(self):
+        self.samples = []
+        self.pending = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="latency-probe", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        # Stamp the moment the probe was due rather than when this thread
+        # got to run, so time spent waiting for the GIL counts as latency
+        due = time.perf_counter()
+        while True:
+            due += random.uniform(*PROBE_INTERVAL)
+            if self.stopped.wait(max(0.0, due - time.perf_counter())):
+                return
+            pygame.event.post(pygame.event.Event(PROBE_EVENT, stamp=due))
+
+    def received(self, event):
+        self.pending.append(event.stamp)
+
+    def displayed(self):
+        now = time.perf_counter()
+        self.samples.extend(now - stamp for stamp in self.pending)
+        self.pending = []
+
+    def discard(self):
+        """Drop probes that arrived while nothing was being measured"""
+        self.pending = []
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def report(self):
+        """One-line summary of the samples, in milliseconds"""
+        if not self.samples:
+            return "input-to-display latency: no samples"
+        samples = sorted(self.samples)
+        def pct(q):
+            return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+        return (f"input-to-display latency: {len(samples)} samples, p50 {pct(0.5):.1f} ms, "
+                f"p95 {pct(0.95):.1f} ms, max {samples[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    # Compare pacing modes on a match running unattended
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Measure input latency per pacing mode")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--headless", action="store_true", help="Use SDL's dummy video and audio drivers")
+    args = parser.parse_args()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    import game
+
+    for mode in PACING_MODES:
+        g = game.Game(telemetry=False, pacing=mode, latency_probe=True)
+        g.reset_game()
+        end = time.perf_counter() + args.seconds
+        cpu = time.process_time()
+        while time.perf_counter() < end and g.state == "playing":
+            g.run_frame()
+        cpu = (time.process_time() - cpu) / args.seconds * 100
+        g.latency_probe.close()
+        print(f"{mode:>6}: {g.latency_probe.report()}, {cpu:.0f}% CPU")
+        g.profiles.close()
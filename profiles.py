@@ -0,0 +1,192 @@
+"""Profiles, save slots and run history in a local SQLite database
+
+The database lives next to the other data files in Wild Rails/.  It runs
+in WAL mode so saves append to the log instead of rewriting pages, and
+finished runs are queued and written together with the next save in one
+transaction.  Leaderboard and history queries read straight from
+indexes, so the menu stays quick however many runs are recorded.
+
+An existing Settings.json is imported into the first slot of the
+default profile the first time the database is created.
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+
+log = logging.getLogger("wild_rails.profiles")
+
+DATABASE_FILE = "wild_rails.db"
+LEGACY_SETTINGS = "Settings.json"
+DEFAULT_PROFILE = "default"
+DEFAULT_SLOT = 1
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slots (
+    profile_id INTEGER NOT NULL REFERENCES profiles(id),
+    slot INTEGER NOT NULL,
+    permanent_bonds INTEGER NOT NULL,
+    owned_characters TEXT NOT NULL,
+    selected_character TEXT NOT NULL,
+    saved REAL NOT NULL,
+    PRIMARY KEY (profile_id, slot)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles(id),
+    slot INTEGER NOT NULL,
+    character TEXT NOT NULL,
+    wave INTEGER NOT NULL,
+    bonds INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    ended REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_best ON runs (profile_id, wave DESC, bonds DESC);
+CREATE INDEX IF NOT EXISTS runs_character_best ON runs (profile_id, character, wave DESC, bonds DESC);
+CREATE INDEX IF NOT EXISTS runs_recent ON runs (profile_id, ended DESC);
+"""
+
+
+class ProfileStore:
+    """One profile's save slots and run history
+
+    Saves go through save_slot(); record_run() only queues a run, which
+    is written by the next save_slot() or flush().
+    """
+
+    def __init__(self, folder, profile=DEFAULT_PROFILE, path=None):
+        self.path = path or os.path.join(folder, DATABASE_FILE)
+        created = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash safe
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.profile_id = self.profile(profile)
+        self.pending = []  # Runs waiting for the next transaction
+        if created:
+            self.import_settings(os.path.join(folder, LEGACY_SETTINGS))
+
+    def profile(self, name):
+        """Id of a profile, creating it if needed"""
+        row = self.conn.execute("SELECT id FROM profiles WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        with self.conn:
+            return self.conn.execute("INSERT INTO profiles (name, created) VALUES (?, ?)",
+                                     (name, time.time())).lastrowid
+
+    def profiles(self):
+        return [name for name, in self.conn.execute("SELECT name FROM profiles ORDER BY name")]
+
+    def import_settings(self, settings_path):
+        """Copy a legacy Settings.json into the default profile's first slot"""
+        try:
+            with open(settings_path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning("Could not import %s: %s", settings_path, e)
+            return
+        profile_id = self.profile(DEFAULT_PROFILE)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO slots VALUES (?, ?, ?, ?, ?, ?)",
+                (profile_id, DEFAULT_SLOT, data.get("permanent_bonds", 0),
+                 json.dumps(data.get("owned_characters", [])), data.get("selected_character", ""),
+                 time.time()))
+        log.info("Imported %s into profile %s slot %d", settings_path, DEFAULT_PROFILE, DEFAULT_SLOT)
+
+    def load_slot(self, slot):
+        """(permanent_bonds, owned_characters, selected_character), or None if the slot is empty"""
+        row = self.conn.execute(
+            "SELECT permanent_bonds, owned_characters, selected_character FROM slots "
+            "WHERE profile_id = ? AND slot = ?", (self.profile_id, slot)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def save_slot(self, slot, permanent_bonds, owned_characters, selected_character):
+        """Write a slot and any queued runs in one transaction"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO slots VALUES (?, ?, ?, ?, ?, ?)",
+                (self.profile_id, slot, permanent_bonds, json.dumps(owned_characters),
+                 selected_character, time.time()))
+            self._write_pending()
+
+    def record_run(self, slot, character, wave, bonds, seconds, outcome):
+        self.pending.append((self.profile_id, slot, character, wave, bonds, seconds, outcome, time.time()))
+
+    def flush(self):
+        """Write queued runs"""
+        if self.pending:
+            with self.conn:
+                self._write_pending()
+
+    def _write_pending(self):
+        self.conn.executemany(
+            "INSERT INTO runs (profile_id, slot, character, wave, bonds, seconds, outcome, ended) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.pending)
+        self.pending = []
+
+    def top_runs(self, limit=5, character=None):
+        """Best runs by wave then bonds as (character, wave, bonds, ended) rows"""
+        if character is None:
+            return self.conn.execute(
+                "SELECT character, wave, bonds, ended FROM runs WHERE profile_id = ? "
+                "ORDER BY wave DESC, bonds DESC LIMIT ?", (self.profile_id, limit)).fetchall()
+        return self.conn.execute(
+            "SELECT character, wave, bonds, ended FROM runs WHERE profile_id = ? AND character = ? "
+            "ORDER BY wave DESC, bonds DESC LIMIT ?", (self.profile_id, character, limit)).fetchall()
+
+    def recent_runs(self, limit=5):
+        """Latest runs as (character, wave, bonds, outcome) rows"""
+        return self.conn.execute(
+            "SELECT character, wave, bonds, outcome FROM runs WHERE profile_id = ? "
+            "ORDER BY ended DESC LIMIT ?", (self.profile_id, limit)).fetchall()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    # Query times for the menu with a large run history
+    import argparse
+    import random
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark the profile database")
+    parser.add_argument("--runs", type=int, default=300000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = ProfileStore(folder)
+        characters = ["Torcher", "Cowboy", "Shotgunner", "Mummy", "Horse", "Vampire", "Werewolf", "Tesla"]
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for batch in range(0, args.runs, 1000):
+            for _ in range(min(1000, args.runs - batch)):
+                store.record_run(DEFAULT_SLOT, rng.choice(characters), rng.randint(1, 40),
+                                 rng.randint(0, 5000), rng.uniform(30, 1800), "died")
+            store.save_slot(DEFAULT_SLOT, 0, ["Torcher"], "Torcher")
+        print(f"recorded {args.runs} runs in {time.perf_counter() - start:.2f}s (1000 per transaction)")
+        for label, query in (("top runs", store.top_runs),
+                             ("top Cowboy runs", lambda: store.top_runs(character="Cowboy")),
+                             ("recent runs", store.recent_runs)):
+            start = time.perf_counter()
+            for _ in range(100):
+                query()
+            print(f"{label}: {(time.perf_counter() - start) * 10:.3f} ms")
+        store.close()
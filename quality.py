@@ -0,0 +1,93 @@
+import logging
+
+log = logging.getLogger("wild_rails.quality")
+
+# Quality levels from best to cheapest.  render_scale is the internal
+# resolution of the playfield relative to the window, focus_health_bars
+# limits health bars to zombies near the player or crosshair, and effects
+# is the fraction of visual effects that are kept.
+QUALITY_LEVELS = [
+    {"name": "High", "render_scale": 1.0, "focus_health_bars": False, "effects": 1.0},
+    {"name": "Medium", "render_scale": 0.75, "focus_health_bars": True, "effects": 0.5},
+    {"name": "Low", "render_scale": 0.5, "focus_health_bars": True, "effects": 0.25},
+]
+
+# Governor tuning
+SMOOTHING = 0.1          # Weight of the newest sample in the frame time average
+DOWN_RATIO = 0.9         # Step down when the average exceeds this share of the budget
+UP_RATIO = 0.5           # Step up when the average drops below this share of the budget
+DOWN_FRAMES = 30         # Frames over budget before stepping down (0.5s at 60 FPS)
+UP_FRAMES = 240          # Frames with headroom before stepping up (4s at 60 FPS)
+COOLDOWN_FRAMES = 120    # Frames to wait after any change before judging again
+
+
+def quality_index(name):
+    """Index of the quality level called name (case-insensitive)"""
+    for i, level in enumerate(QUALITY_LEVELS):
+        if level["name"].lower() == name.lower():
+            return i
+    raise ValueError(f"Unknown quality level: {name}")
+
+
+class QualityGovernor:
+    """Steps quality down under load and back up when headroom returns
+
+    Frame times are smoothed with an exponential moving average and
+    compared against the frame budget.  Stepping down is quick and
+    stepping up is slow, and every change is followed by a cooldown, so
+    the level does not oscillate around the threshold.
+    """
+
+    def __init__(self, fps, pinned=None):
+        self.budget_ms = 1000.0 / fps
+        self.pinned = pinned is not None
+        self.index = quality_index(pinned) if self.pinned else 0
+        self.average_ms = 0.0
+        self.over_frames = 0
+        self.under_frames = 0
+        self.cooldown = 0
+
+    @property
+    def level(self):
+        return QUALITY_LEVELS[self.index]
+
+    @property
+    def label(self):
+        return f"{self.level['name']} ({'pinned' if self.pinned else 'auto'})"
+
+    def sample(self, frame_ms):
+        """Feed one frame's work time; returns True if the level changed"""
+        if self.average_ms == 0.0:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += (frame_ms - self.average_ms) * SMOOTHING
+
+        if self.pinned:
+            return False
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return False
+
+        if self.average_ms > self.budget_ms * DOWN_RATIO:
+            self.over_frames += 1
+            self.under_frames = 0
+        elif self.average_ms < self.budget_ms * UP_RATIO:
+            self.under_frames += 1
+            self.over_frames = 0
+        else:
+            self.over_frames = 0
+            self.under_frames = 0
+
+        if self.over_frames >= DOWN_FRAMES and self.index < len(QUALITY_LEVELS) - 1:
+            return self._step(1)
+        if self.under_frames >= UP_FRAMES and self.index > 0:
+            return self._step(-1)
+        return False
+
+    def _step(self, direction):
+        self.index += direction
+        self.over_frames = 0
+        self.under_frames = 0
+        self.cooldown = COOLDOWN_FRAMES
+        log.info("Quality changed to %s (avg frame %.1f ms)", self.level["name"], self.average_ms)
+        return True
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+log = logging.getLogger("wild_rails.recorder")
+
+RING_FRAMES = 32                 # Frames buffered for the writer while recording
+REPLAY_FPS = 20                  # Frames per second kept by instant replay
+REPLAY_SCALE = 0.5               # Instant replay keeps half-resolution frames
+REPLAY_MEMORY_BUDGET = 128 * 1024 * 1024  # Max bytes held by the replay buffer
+PNG_COMPRESSION = 1              # zlib level: fast beats small for capture
+
+
+def encode_png(rgb, width, height):
+    """Encode an (height, width, 3) uint8 array as PNG bytes
+
+    Uses zlib directly instead of pygame.image.save, which holds the GIL
+    for the whole encode and would stall the game loop.
+    """
+    # Filter type 0 (none) at the start of every row
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return (struct.pack("!I", len(data)) + kind + data +
+                struct.pack("!I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    header = struct.pack("!IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), PNG_COMPRESSION)) + chunk(b"IEND", b""))
+
+
+class FrameRecorder:
+    """Copies finished frames into a ring of slots and writes them on a thread
+
+    capture() is the only work done by the game loop: one memcpy from the
+    surface's pixel buffer into a free slot.  When the writer falls behind
+    and no slot is free the frame is dropped instead of waiting.
+
+    In replay mode nothing is written while playing; the ring always
+    holds the most recent frames and save_replay() hands them to the
+    writer as a PNG sequence.
+    """
+
+    def __init__(self, surface, out_dir, fps, mode="png", replay_seconds=None):
+        self.out_dir = out_dir
+        self.fps = fps
+        self.mode = mode
+        self.replay = replay_seconds is not None
+        self.capture_every = max(1, fps // REPLAY_FPS) if self.replay else 1
+        self.scale = REPLAY_SCALE if self.replay else 1.0
+
+        width, height = surface.get_size()
+        self.size = (int(width * self.scale), int(height * self.scale))
+        # Frames are captured from a surface in the source's pixel format
+        self.staging = None
+        if self.scale != 1.0:
+            self.staging = pygame.Surface(self.size, 0, surface)
+        template = self.staging or surface
+        self.masks = template.get_masks()
+        self.bytesize = template.get_bytesize()
+        self.pitch = template.get_pitch()
+        self.frame_bytes = self.pitch * self.size[1]
+
+        if self.replay:
+            wanted = int(replay_seconds * fps / self.capture_every)
+            slots = max(1, min(wanted, REPLAY_MEMORY_BUDGET // self.frame_bytes))
+            self.replay_seconds = slots * self.capture_every / fps
+        else:
+            slots = RING_FRAMES
+        self.slots = [bytearray(self.frame_bytes) for _ in range(slots)]
+        self.free = queue.SimpleQueue()
+        for index in range(slots):
+            self.free.put(index)
+        self.pending = queue.Queue()
+        self.replay_order = []   # Slot indices from oldest to newest
+        self.replay_busy = threading.Event()
+
+        self.recording = False
+        self.frames_seen = 0
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.session_dir = None
+        self.raw_file = None
+        self.encoder = None
+        self.worker = threading.Thread(target=self._write_loop, name="frame-writer", daemon=True)
+        self.worker.start()
+
+    def start(self):
+        """Begin a new recording session in its own directory"""
+        if self.recording or self.replay:
+            return
+        base = os.path.join(self.out_dir, time.strftime("capture-%Y%m%d-%H%M%S"))
+        self.session_dir = base
+        suffix = 1
+        while os.path.exists(self.session_dir):  # Restarted within the same second
+            suffix += 1
+            self.session_dir = f"{base}-{suffix}"
+        os.makedirs(self.session_dir)
+        self.pending.put(("open", self.session_dir))
+        self.recording = True
+        log.info("Recording %s frames to %s", self.mode, self.session_dir)
+
+    def stop(self):
+        if self.recording:
+            self.recording = False
+            self.pending.put(("close", None))
+            log.info("Recording stopped: %d captured, %d dropped", self.captured, self.dropped)
+
+    def toggle(self):
+        self.stop() if self.recording else self.start()
+
+    def capture(self, surface):
+        """Copy the finished frame out of surface; never blocks"""
+        self.frames_seen += 1
+        if not (self.recording or self.replay) or self.frames_seen % self.capture_every:
+            return
+        if self.replay and self.replay_busy.is_set():
+            self.dropped += 1  # Replay is being saved; its slots are in use
+            return
+
+        if self.replay and len(self.replay_order) == len(self.slots):
+            index = self.replay_order.pop(0)  # Overwrite the oldest frame
+        else:
+            try:
+                index = self.free.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return
+
+        source = surface
+        if self.staging is not None:
+            pygame.transform.scale(surface, self.size, self.staging)
+            source = self.staging
+        # get_view("0") exposes the pixel memory directly, so this is one memcpy;
+        # padded surfaces fall back to the raw buffer, which includes the pitch
+        try:
+            view = source.get_view("0")
+        except ValueError:
+            view = source.get_buffer()
+        memoryview(self.slots[index])[:] = memoryview(view).cast("B")
+        del view  # Unlocks the surface
+        self.captured += 1
+
+        if self.replay:
+            self.replay_order.append(index)
+        else:
+            self.pending.put(("frame", index))
+
+    def save_replay(self):
+        """Write the frames currently in the replay buffer as a PNG sequence"""
+        if not self.replay or not self.replay_order or self.replay_busy.is_set():
+            return
+        self.replay_busy.set()
+        directory = os.path.join(self.out_dir, time.strftime("replay-%Y%m%d-%H%M%S"))
+        self.pending.put(("replay", (directory, list(self.replay_order))))
+        log.info("Saving last %.1fs of gameplay to %s",
+                 len(self.replay_order) * self.capture_every / self.fps, directory)
+
+    def close(self):
+        """Finish writing everything queued and stop the worker"""
+        self.stop()
+        self.pending.put(("quit", None))
+        self.worker.join()
+
+    # Worker thread
+
+    def _pixels(self, index):
+        """Slot contents as an (height, width, 3) RGB array"""
+        width, height = self.size
+        raw = np.frombuffer(self.slots[index], dtype=np.uint8).reshape(height, self.pitch)
+        pixels = raw[:, :width * self.bytesize].reshape(height, width, self.bytesize)
+        # Each channel's byte position comes from its mask (little-endian)
+        order = [(mask.bit_length() - 1) // 8 for mask in self.masks[:3]]
+        return pixels[:, :, order]
+
+    def _open(self, directory):
+        width, height = self.size
+        if self.mode == "raw":
+            self.raw_file = open(os.path.join(directory, "frames.raw"), "wb")
+            with open(os.path.join(directory, "frames.json"), "w") as f:
+                json.dump({"width": width, "height": height, "pixel_format": "rgb24",
+                           "fps": self.fps}, f, indent=4)
+        elif self.mode == "ffmpeg":
+            self.encoder = subprocess.Popen(
+                ["ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                 "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+                 "-pix_fmt", "yuv420p", os.path.join(directory, "capture.mp4")],
+                stdin=subprocess.PIPE)
+
+    def _close(self):
+        if self.raw_file is not None:
+            self.raw_file.close()
+            self.raw_file = None
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            self.encoder.wait()
+            self.encoder = None
+
+    def _write_frame(self, directory, number, index):
+        rgb = self._pixels(index)
+        if self.raw_file is not None:
+            self.raw_file.write(np.ascontiguousarray(rgb).tobytes())
+        elif self.encoder is not None:
+            self.encoder.stdin.write(np.ascontiguousarray(rgb).tobytes())
+        else:
+            with open(os.path.join(directory, f"frame{number:06d}.png"), "wb") as f:
+                f.write(encode_png(rgb, *self.size))
+        self.written += 1
+
+    def _write_loop(self):
+        # The session being written, which start() may already have moved
+        # on from while its last frames are still queued
+        directory = None
+        number = 0
+        while True:
+            command, payload = self.pending.get()
+            try:
+                if command == "open":
+                    directory = payload
+                    number = 0
+                    self._open(payload)
+                elif command == "frame":
+                    try:
+                        self._write_frame(directory, number, payload)
+                        number += 1
+                    finally:
+                        self.free.put(payload)
+                elif command == "close":
+                    self._close()
+                elif command == "replay":
+                    directory, order = payload
+                    os.makedirs(directory, exist_ok=True)
+                    for replay_number, index in enumerate(order):
+                        self._write_frame(directory, replay_number, index)
+                    self.replay_busy.clear()
+                elif command == "quit":
+                    self._close()
+                    return
+            except (OSError, ValueError) as e:
+                log.error("Frame writer error: %s", e)
+                self.replay_busy.clear()
+
+
+def available_modes():
+    """Output modes usable on this machine"""
+    modes = ["png", "raw"]
+    if shutil.which("ffmpeg"):
+        modes.append("ffmpeg")
+    return modes
@@ -0,0 +1,144 @@
+"""Frame-budget scheduler for chores that can wait a frame or two
+
+Saves, shop restocks, telemetry writes and log output don't need to
+happen in the frame that triggers them.  They are queued by name with
+defer() and the main loop drains the queue after the frame is drawn,
+running chores only while there is time left before the next frame is
+due.  A chore whose last run would not fit stays queued for a later
+frame with more slack.
+
+A chore is a callable.  If it returns a generator, each step of the
+generator is one slice of work and an unfinished chore resumes where it
+left off next frame.  Deferring a name that is already queued does
+nothing, so a condition that holds every frame queues its chore once.
+
+So that frames that never have slack (a huge horde) don't starve the
+queue, a chore that has waited MAX_WAIT_FRAMES runs anyway.
+
+    python scheduler.py    # frame times with chores inline and deferred
+"""
+import collections
+import logging
+import time
+
+log = logging.getLogger("wild_rails.scheduler")
+
+DEADLINE_MARGIN = 0.001  # Seconds left free before the deadline for the pacer to wake on time
+FIRST_COST = 0.002       # Assumed cost in seconds of a chore that hasn't run yet
+COST_DECAY = 0.8         # How slowly a chore's expected cost forgets a slow run
+MAX_WAIT_FRAMES = 120    # A chore waiting this long runs whatever the budget
+
+
+class FrameScheduler:
+    """Named low-priority chores run in the slack at the end of frames"""
+
+    def __init__(self, margin=DEADLINE_MARGIN, max_wait=MAX_WAIT_FRAMES):
+        self.margin = margin
+        self.max_wait = max_wait
+        self.queue = collections.OrderedDict()  # name -> [callable or generator, frame queued]
+        self.costs = {}                         # name -> expected seconds per run or slice
+        self.frame = 0
+        self.ran = 0
+        self.overdue = 0
+
+    def defer(self, name, job):
+        """Queue job to run when a frame has time; False if name is already queued"""
+        if name in self.queue:
+            return False
+        self.queue[name] = [job, self.frame]
+        return True
+
+    def pending(self):
+        return len(self.queue)
+
+    def drain(self, deadline=None):
+        """Run queued chores that fit before the perf_counter deadline; None runs them all"""
+        self.frame += 1
+        for name in list(self.queue):
+            entry = self.queue[name]
+            overdue = self.frame - entry[1] >= self.max_wait
+            while True:
+                if deadline is not None and not overdue:
+                    expected = self.costs.get(name, FIRST_COST)
+                    if time.perf_counter() + expected > deadline - self.margin:
+                        break
+                start = time.perf_counter()
+                try:
+                    finished = self.step(entry)
+                except Exception:
+                    log.exception("Chore %s failed", name)
+                    finished = True
+                cost = time.perf_counter() - start
+                previous = self.costs.get(name)
+                # Remember slow runs for a while so one fast run doesn't hide them
+                self.costs[name] = cost if previous is None else max(cost, previous * COST_DECAY)
+                if finished:
+                    del self.queue[name]
+                    self.ran += 1
+                    if overdue:
+                        self.overdue += 1
+                        log.debug("Chore %s ran overdue after %d frames", name, self.frame - entry[1])
+                    break
+                overdue = False  # Overdue chores get one slice, then wait for slack again
+            if deadline is None:
+                continue
+            if time.perf_counter() >= deadline - self.margin:
+                break
+
+    def step(self, entry):
+        """Run one slice of a queued chore; True once it has finished"""
+        job = entry[0]
+        if callable(job):
+            result = job()
+            if result is None or not hasattr(result, "__next__"):
+                return True
+            entry[0] = job = result
+        try:
+            next(job)
+        except StopIteration:
+            return True
+        return False
+
+    def flush(self):
+        """Run everything still queued to the end, e.g. before quitting"""
+        while self.queue:
+            self.drain()
+
+
+if __name__ == "__main__":
+    # A 60 FPS loop with 9 ms of frame work and a 9 ms chore (three 3 ms
+    # slices) every half second, with the chore run inline and deferred
+    FRAME = 1 / 60
+
+    def spin(seconds):
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+
+    def chore():
+        for _ in range(3):
+            spin(0.003)
+            yield
+
+    for deferred in (False, True):
+        scheduler = FrameScheduler()
+        intervals = []
+        deadline = time.perf_counter() + FRAME
+        for frame in range(600):
+            start = time.perf_counter()
+            spin(0.009)
+            if frame % 30 == 0:
+                if deferred:
+                    scheduler.defer("chore", chore)
+                else:
+                    for _ in chore():
+                        pass
+            scheduler.drain(deadline)
+            spin(max(0.0, deadline - time.perf_counter()))
+            deadline = max(deadline + FRAME, time.perf_counter())
+            intervals.append((time.perf_counter() - start) * 1000)
+        intervals.sort()
+        late = sum(interval > FRAME * 1000 + 0.5 for interval in intervals)
+        print(f"{'deferred' if deferred else 'inline':>8}: frame p50 {intervals[len(intervals) // 2]:.1f} ms, "
+              f"p99 {intervals[len(intervals) * 99 // 100]:.1f} ms, {late} frames late"
+              + (f"; chores run {scheduler.ran}, overdue {scheduler.overdue}" if deferred else ""))
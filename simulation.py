@@ -0,0 +1,558 @@
+"""The match rules, shared by the game, the co-op server and the worker process
+
+Everything that advances a match lives here: players moving and
+shooting their character's projectiles, zombies of the wave plan's
+enemy types steering by the flow field around rocks and wagons, swept
+projectile hits with pierce, and the waves themselves.  Whoever runs a
+Simulation draws it and adds sound, particles and telemetry; what
+happened during a tick is left in the event lists step() fills (shots,
+hits, deaths and cleared waves).
+
+Each player has a view the size of the game window that follows them.
+Zombies spawn just outside a living player's view, zombies near any
+view move every tick, and zombies left outside every player's
+simulated chunks go back into the wave plan.  Zombies and projectiles
+carry stable integer ids so the co-op server can delta-compress them.
+"""
+import math
+import random
+
+import numpy as np
+import pygame
+
+from balance import CHARACTERS, DEFAULT_CHARACTER, WAVES, ensure_loaded
+from collision import swept_hits
+from navgrid import NavGrid, FlowField, CELL_SIZE
+from sprite_cache import WALK_FRAMES, angle_index
+from wave_director import WavePlan, edge_positions, next_wave_size
+from world import Camera, WORLD_WIDTH, WORLD_HEIGHT, RAIL_Y
+
+PLAYER_SPEED = 1.5
+PROJECTILE_SPEED = 8
+PLAYER_SIZE = 64
+ZOMBIE_SIZE = 48
+ATTACK_COOLDOWN = 60    # 1 second at 60 FPS
+SHOT_SPREAD = 10        # Distance between the two projectiles of a double shot
+VIEW_WIDTH, VIEW_HEIGHT = 1024, 768  # What each player sees, the game's window size
+MAX_PLAYER_ID = 255     # Player ids are one byte in snapshots
+AI_BUDGET = 256         # Zombie heading updates per tick beyond those close to a player
+AI_CLOSE_RADIUS = 200   # Zombies this close to a player re-aim every tick
+AI_AWAKE_MARGIN = 100   # Zombies near a view move every tick (plus their reach between turns)
+AI_FIELD_TICKS = 4      # Ticks between flow field lookups for zombies in open ground
+SUBSYSTEMS = ("movement", "collision", "spawning")  # Rules the developer console can switch off
+
+
+class Player:
+    """One player: position, facing, shot cooldown and latest input"""
+
+    def __init__(self, player_id, character, camera):
+        self.id = player_id
+        self.character = character
+        self.camera = camera
+        self.pos = [0, 0]
+        self.rect = pygame.Rect(0, 0, PLAYER_SIZE, PLAYER_SIZE)
+        self.alive = True
+        self.cooldown = 0
+        self.facing = 0
+        self.walk = 0
+        self.input = (0, 0, False, 0.0, 0.0)  # Move x/y (-1..1), fire, aim point in the world
+        self.field = None  # Flow field towards this player, built on their first tick
+
+    @property
+    def center(self):
+        return self.pos[0] + PLAYER_SIZE // 2, self.pos[1] + PLAYER_SIZE // 2
+
+    def place(self, x, y):
+        """Move to a position and bring the view along"""
+        self.pos = [x, y]
+        self.rect.x, self.rect.y = x, y
+        self.camera.follow(*self.center)
+
+
+class Simulation:
+    """One match of any number of players, advanced a tick at a time by step()"""
+
+    def __init__(self, seed=None, world_seed=0, view_size=(VIEW_WIDTH, VIEW_HEIGHT), ai_budget=AI_BUDGET):
+        ensure_loaded()
+        self.seed = seed              # None picks a new seed for every match
+        self.world_seed = world_seed  # Obstacle layout, the same as the chunk backgrounds'
+        self.view_size = view_size
+        self.ai_budget = ai_budget
+        self.nav_grid = None          # Built on the first tick; see prepare()
+        self.subsystems = dict.fromkeys(SUBSYSTEMS, True)
+        self.invulnerable = False     # Benchmarks keep players alive
+        self.max_zombies = None       # Spawning waits while this many zombies are alive
+        self.players = {}             # player_id -> Player
+        self.next_player_id = 1
+        self.next_id = 1              # Zombie and projectile ids
+        self.tick = 0                 # Ticks across matches, for snapshots
+        self.restart()
+
+    def restart(self):
+        """Start a new match with the same players, all alive again at the track
+
+        Ticks and entity ids carry on, so co-op clients see the old
+        match's zombies and projectiles removed rather than reused.
+        """
+        self.match_seed = self.seed if self.seed is not None else random.getrandbits(32)
+        self.match_tick = 0
+        self.wave = 1
+        self.match_bonds = 0
+        self.zombies_per_wave = WAVES["first_wave_size"]
+        # Zombie records: [x, y, hp, max_hp, rect, facing, walk_phase, enemy_type, speed,
+        #                  heading_x, heading_y, last_moved_tick, awake, near_obstacle, id]
+        self.zombies = []
+        # Zombies near a view move every tick; headings are re-aimed for a
+        # round-robin slice of ai_budget zombies per tick (see update_zombie_ai)
+        self.awake_zombies = []
+        self.ai_cursor = 0
+        # Projectile records: [x, y, vel_x, vel_y, active, damage, pierce, id, ids of zombies hit]
+        self.projectiles = []
+        self.game_over = False
+        self.clear_events()
+        self.start_wave()
+        for index, player in enumerate(self.players.values()):
+            self.respawn(player, index)
+
+    def prepare(self):
+        """Build the navigation grid now rather than on the first tick"""
+        if self.nav_grid is None:
+            self.nav_grid = NavGrid(self.world_seed)
+
+    def clear_events(self):
+        self.shots = []    # (x, y, vel_x, vel_y) of each player's shot this tick
+        self.hits = []     # (x, y, direction_x, direction_y) where projectiles struck
+        self.deaths = []   # (x, y) centres of zombies killed
+        self.cleared = []  # Waves cleared
+
+    def _new_id(self):
+        entity_id = self.next_id
+        self.next_id += 1
+        return entity_id
+
+    def add_player(self, character=DEFAULT_CHARACTER, camera=None):
+        """Id of a new player, or None when every player id is taken
+
+        The player's view follows them with camera, or with a camera of
+        their own.
+        """
+        if len(self.players) >= MAX_PLAYER_ID:
+            return None
+        # Player ids only move forward so a leaver's id isn't handed to the
+        # next player while snapshots still carry it; they go in one byte on
+        # the wire, so past MAX_PLAYER_ID they wrap, skipping ids in use
+        player_id = self.next_player_id
+        while player_id in self.players:
+            player_id = player_id % MAX_PLAYER_ID + 1
+        self.next_player_id = player_id % MAX_PLAYER_ID + 1
+        player = Player(player_id, character, camera or Camera(*self.view_size))
+        self.respawn(player, len(self.players))
+        self.players[player_id] = player
+        return player_id
+
+    def remove_player(self, player_id):
+        self.players.pop(player_id, None)
+
+    def respawn(self, player, index):
+        """Put a player back at the start, spread along the track by join order"""
+        player.place(self.view_size[0] // 2 + index * PLAYER_SIZE * 2, RAIL_Y - PLAYER_SIZE // 2)
+        player.alive = True
+        player.cooldown = 0
+        player.facing = 0
+        player.walk = 0
+
+    def set_character(self, player_id, character):
+        self.players[player_id].character = character
+
+    def set_input(self, player_id, move_x, move_y, fire, aim_x, aim_y):
+        """Latest input for a player: move direction (-1..1), fire flag, aim point in the world"""
+        if player_id in self.players:
+            self.players[player_id].input = (move_x, move_y, fire, aim_x, aim_y)
+
+    def set_subsystem(self, name, on):
+        self.subsystems[name] = on
+
+    def character(self, player):
+        """Balance table entry of a player's character"""
+        return CHARACTERS.get(player.character) or CHARACTERS[DEFAULT_CHARACTER]
+
+    def start_wave(self):
+        """Plan the current wave's spawns"""
+        self.wave_plan = WavePlan(self.wave, self.zombies_per_wave, self.match_seed)
+        self.wave_tick = 0
+
+    def set_wave(self, wave, size):
+        """Jump to a wave of size zombies"""
+        self.wave = wave
+        self.zombies_per_wave = size
+        self.start_wave()
+
+    def step(self):
+        """Advance the match one tick"""
+        if self.game_over:
+            return
+        self.clear_events()
+        self.tick += 1
+        players = [player for player in self.players.values() if player.alive]
+        if not players:
+            return  # A server waiting for its first player
+        self.prepare()
+        self.match_tick += 1
+
+        # Players fire when asked, as soon as the cooldown allows, then move
+        for player in players:
+            if player.input[2] and player.cooldown <= 0:
+                self.fire(player)
+            if player.cooldown > 0:
+                player.cooldown -= 1
+            self.move_player(player)
+        views = [player.camera.rect for player in players]
+
+        # Move projectiles, remembering where each one started the tick
+        starts = []
+        for proj in self.projectiles:
+            starts.append((proj[0], proj[1]))
+            proj[0] += proj[2]  # x += vel_x
+            proj[1] += proj[3]  # y += vel_y
+
+        if self.subsystems["movement"]:
+            self.update_zombie_ai(players, views)
+
+        collision = self.subsystems["collision"]
+        if collision:
+            self.resolve_hits(starts)
+
+        # Drop spent projectiles and those that left every view
+        self.projectiles = [proj for proj in self.projectiles
+                            if proj[4] and any(view.collidepoint(proj[0], proj[1]) for view in views)]
+
+        # A zombie touching a player downs them; the match is over once everyone is down
+        if collision and not self.invulnerable:
+            rects = [zombie[4] for zombie in self.awake_zombies]
+            for player in players:
+                if player.rect.collidelist(rects) != -1:
+                    player.alive = False
+            if not any(player.alive for player in players):
+                self.game_over = True
+                return
+
+        # Spawn whatever the wave plan has due this tick
+        if self.subsystems["spawning"]:
+            self.wave_tick += 1
+            self.spawn_due([player for player in players if player.alive])
+
+        # Check wave completion - endless
+        if not self.zombies and self.wave_plan.done():
+            self.cleared.append(self.wave)
+            self.wave += 1
+            # Multiplicative scaling for zombie spawn count
+            self.zombies_per_wave = next_wave_size(self.wave, self.zombies_per_wave)
+            self.start_wave()
+
+    def move_player(self, player):
+        """Move a player by their input, kept inside the world and out of obstacles"""
+        move_x = player.input[0] * PLAYER_SPEED
+        move_y = player.input[1] * PLAYER_SPEED
+        start_x, start_y = player.pos
+        x = start_x + move_x
+        y = start_y + move_y
+
+        # Face the direction of travel and advance the walk cycle while moving
+        if move_x or move_y:
+            player.facing = angle_index(move_x, move_y)
+            player.walk += 1
+
+        x = max(0, min(x, WORLD_WIDTH - PLAYER_SIZE))
+        y = max(0, min(y, WORLD_HEIGHT - PLAYER_SIZE))
+        # Rocks and wagons block players too, who slide along them
+        half = PLAYER_SIZE // 2
+        is_blocked = self.nav_grid.is_blocked
+        if is_blocked(x + half, y + half):
+            if not is_blocked(start_x + half, y + half):
+                x = start_x
+            elif not is_blocked(x + half, start_y + half):
+                y = start_y
+            else:
+                x, y = start_x, start_y
+        player.place(x, y)
+
+    def fire(self, player):
+        """Shoot a player's character's projectiles at their aim point"""
+        center_x, center_y = player.center
+        dx = player.input[3] - center_x
+        dy = player.input[4] - center_y
+        distance = math.sqrt(dx * dx + dy * dy)
+        if distance <= 0:
+            return
+        vel_x = dx / distance * PROJECTILE_SPEED
+        vel_y = dy / distance * PROJECTILE_SPEED
+
+        character = self.character(player)
+        damage = character["damage"]
+        pierce = character.get("pierce", 0)  # Extra zombies each shot passes through
+        if character["projectiles"] == 1:
+            self.projectiles.append([center_x, center_y, vel_x, vel_y, True, damage, pierce,
+                                     self._new_id(), set()])
+        elif character["projectiles"] == 2:
+            # Two projectiles side by side, offset perpendicular to the shot
+            speed = math.sqrt(vel_x * vel_x + vel_y * vel_y)
+            perp_x = -vel_y / speed * SHOT_SPREAD
+            perp_y = vel_x / speed * SHOT_SPREAD
+            for side in (1, -1):
+                self.projectiles.append([center_x + side * perp_x / 2, center_y + side * perp_y / 2,
+                                         vel_x, vel_y, True, damage, pierce, self._new_id(), set()])
+        self.shots.append((center_x, center_y, vel_x, vel_y))
+        player.cooldown = ATTACK_COOLDOWN
+
+    def fire_ring(self, player_id, count):
+        """Shoot count of a player's projectiles outwards in a ring around them"""
+        player = self.players[player_id]
+        character = self.character(player)
+        center_x, center_y = player.center
+        for i in range(count):
+            angle = 2 * math.pi * i / count
+            self.projectiles.append([center_x, center_y,
+                                     math.cos(angle) * PROJECTILE_SPEED, math.sin(angle) * PROJECTILE_SPEED,
+                                     True, character["damage"], character.get("pierce", 0), self._new_id(),
+                                     set()])
+
+    def spawn_due(self, players):
+        """Add every zombie the wave plan has due"""
+        plan = self.wave_plan
+        sides, along, kinds = plan.take(self.wave_tick)
+        if self.max_zombies is not None:
+            # Spawns past the cap wait in the plan for room
+            room = max(0, self.max_zombies - len(self.zombies))
+            if room < len(kinds):
+                plan.requeued.extend(kinds[room:].tolist())
+                sides, along, kinds = sides[:room], along[:room], kinds[:room]
+        if len(kinds):
+            self.add_zombies(plan, sides, along, kinds, players)
+
+    def spawn_many(self, count):
+        """Add count zombies of the current wave's types at once, outside the wave pacing"""
+        if self.max_zombies is not None:
+            count = max(0, min(count, self.max_zombies - len(self.zombies)))
+        plan = self.wave_plan
+        rng = np.random.default_rng()
+        kinds = rng.choice(len(plan.names), count, p=plan.weights)
+        self.add_zombies(plan, rng.integers(0, 4, count), rng.random(count), kinds)
+        return count
+
+    def add_zombies(self, plan, sides, along, kinds, players=None):
+        """Add zombies of a plan's kinds just outside living players' views, in bulk
+
+        Players take the spawns in turn.
+        """
+        if players is None:
+            players = [player for player in self.players.values() if player.alive]
+        for index, player in enumerate(players):
+            share = slice(index, None, len(players))
+            player_kinds = kinds[share]
+            if not len(player_kinds):
+                continue
+            xs, ys = edge_positions(player.camera.rect, sides[share], along[share])
+            hps = (plan.max_hp * plan.hp_scale[player_kinds]).astype(int)
+            # Start out heading for the player, awake since they spawn beside the view
+            center_x, center_y = player.center
+            dxs = center_x - xs
+            dys = center_y - ys
+            distances = np.maximum(np.hypot(dxs, dys), 1e-9)
+            first_id = self.next_id
+            self.next_id += len(player_kinds)
+            added = [[x, y, hp, hp, pygame.Rect(x, y, ZOMBIE_SIZE, ZOMBIE_SIZE), angle_index(dx, dy),
+                      int(x + y) % WALK_FRAMES, plan.names[kind], speed, dx / distance, dy / distance,
+                      self.tick, True, False, zombie_id]
+                     for x, y, hp, kind, speed, dx, dy, distance, zombie_id in zip(
+                         xs.tolist(), ys.tolist(), hps.tolist(), player_kinds.tolist(),
+                         plan.speed[player_kinds].tolist(), dxs.tolist(), dys.tolist(),
+                         distances.tolist(), range(first_id, self.next_id))]
+            self.zombies.extend(added)
+            self.awake_zombies.extend(added)
+
+    def clear(self):
+        """Remove every zombie and projectile"""
+        self.zombies = []
+        self.awake_zombies = []
+        self.projectiles = []
+
+    def nearest_target(self, targets, zombie):
+        """The entry of targets whose player is closest to a zombie"""
+        return min(targets, key=lambda target: (target[0] - zombie[0]) ** 2 + (target[1] - zombie[1]) ** 2)
+
+    def update_zombie_ai(self, players, views):
+        """Move zombies towards the nearest player with level-of-detail AI
+
+        Zombies steer by their nearest player's flow field, which leads
+        around rocks and wagons; close to a player with nothing in the
+        way they re-aim exactly every tick.  Zombies well outside every
+        view sleep: they keep their heading and catch up along it when
+        their turn comes in a round-robin of ai_budget zombies per tick.
+        The cost per tick follows the field sizes, the budget and what is
+        on screen, not the horde.
+        """
+        tick = self.tick
+        zombie_speed = WAVES["zombie_speed"]
+        close_sq = AI_CLOSE_RADIUS * AI_CLOSE_RADIUS
+        is_blocked = self.nav_grid.is_blocked
+
+        # Zombies move every tick within reach of a view: as far as one
+        # could close on it between two of its turns, so a sleeper never
+        # walks into view on a stale position
+        count = len(self.zombies)
+        budget = max(1, min(self.ai_budget, count))
+        ticks_between_turns = -(-count // budget)
+        fastest = zombie_speed * float(self.wave_plan.speed.max())
+        reach = AI_AWAKE_MARGIN + int((fastest + PLAYER_SPEED) * ticks_between_turns)
+
+        # One flow field per player over their simulated chunks, rebuilt
+        # when they change cell; zombies look up the cell under their centre
+        targets = []
+        for player, view in zip(players, views):
+            if player.field is None:
+                player.field = FlowField(self.nav_grid)
+            field = player.field
+            center_x, center_y = player.center
+            active = player.camera.active_rect()
+            field.update(active, center_x, center_y)
+            targets.append((center_x, center_y, field, view.inflate(reach * 2, reach * 2), active))
+        single = targets[0] if len(targets) == 1 else None
+
+        recycled = set()  # Ids of zombies going back into the wave plan
+        if count:
+            start = self.ai_cursor % count
+            turn = self.zombies[start:start + budget]
+            if start + budget > count:
+                turn += self.zombies[:start + budget - count]
+            self.ai_cursor = start + budget
+            for zombie in turn:
+                center_x, center_y, field, awake_rect, active = single or self.nearest_target(targets, zombie)
+                if not zombie[12]:
+                    step = zombie_speed * zombie[8] * (tick - zombie[11])
+                    zombie[0] += zombie[9] * step
+                    zombie[1] += zombie[10] * step
+                    zombie[11] = tick
+                    # Zombies left behind outside the simulated chunks go back
+                    # into the wave plan and re-enter at the edge of a view
+                    if not (active.collidepoint(zombie[0], zombie[1]) or single is None and any(
+                            target[4].collidepoint(zombie[0], zombie[1]) for target in targets)):
+                        recycled.add(zombie[14])
+                        self.wave_plan.requeue(zombie[7])
+                        continue
+                    zombie[4].x = int(zombie[0])
+                    zombie[4].y = int(zombie[1])
+                    if awake_rect.collidepoint(zombie[0], zombie[1]) or single is None and any(
+                            target[3].collidepoint(zombie[0], zombie[1]) for target in targets):
+                        zombie[12] = True
+                        self.awake_zombies.append(zombie)
+                cell = field.heading(zombie[0] + 24, zombie[1] + 24)
+                if cell is not None:
+                    zombie[9], zombie[10], zombie[5] = cell[0], cell[1], cell[2]
+                    continue
+                dx = center_x - zombie[0]
+                dy = center_y - zombie[1]
+                distance = math.sqrt(dx * dx + dy * dy)
+                if distance > 0:
+                    zombie[9] = dx / distance
+                    zombie[10] = dy / distance
+                    zombie[5] = angle_index(dx, dy)
+            if recycled:
+                self.zombies = [zombie for zombie in self.zombies if zombie[14] not in recycled]
+
+        if single is not None:
+            center_x, center_y, field, awake_rect, _ = single
+            cells, origin_col, origin_row = field.rows, field.origin_col, field.origin_row
+            field_rows, field_cols = len(cells), field.cols
+        awake = []
+        for index, zombie in enumerate(self.awake_zombies):
+            if single is None:
+                center_x, center_y, field, awake_rect, _ = self.nearest_target(targets, zombie)
+                cells, origin_col, origin_row = field.rows, field.origin_col, field.origin_row
+                field_rows, field_cols = len(cells), field.cols
+            dx = center_x - zombie[0]
+            dy = center_y - zombie[1]
+            close = dx * dx + dy * dy <= close_sq
+            # Headings change slowly in open ground, so the field is sampled
+            # every AI_FIELD_TICKS there and every tick near the player or
+            # an obstacle
+            cell = None
+            if close or zombie[13] or (index + tick) % AI_FIELD_TICKS == 0:
+                row = int(zombie[1] + 24) // CELL_SIZE - origin_row  # Zombie centre
+                col = int(zombie[0] + 24) // CELL_SIZE - origin_col
+                if 0 <= row < field_rows and 0 <= col < field_cols:
+                    cell = cells[row][col]
+                zombie[13] = cell is not None and cell[4]
+            if close and (cell is None or cell[3]):
+                distance = math.sqrt(dx * dx + dy * dy)
+                if distance > 0:
+                    zombie[9] = dx / distance
+                    zombie[10] = dy / distance
+                    zombie[5] = angle_index(dx, dy)
+            elif cell is not None:
+                zombie[9], zombie[10], zombie[5] = cell[0], cell[1], cell[2]
+            if zombie[11] != tick:  # Zombies woken this tick have already moved
+                speed = zombie_speed * zombie[8]
+                x = zombie[0] + zombie[9] * speed
+                y = zombie[1] + zombie[10] * speed
+                # Obstacles stop zombies, who slide along them
+                if zombie[13] and is_blocked(x + 24, y + 24) and not is_blocked(zombie[0] + 24, zombie[1] + 24):
+                    if not is_blocked(x + 24, zombie[1] + 24):
+                        y = zombie[1]
+                    elif not is_blocked(zombie[0] + 24, y + 24):
+                        x = zombie[0]
+                    else:
+                        x, y = zombie[0], zombie[1]
+                zombie[0] = x
+                zombie[1] = y
+                zombie[11] = tick
+                zombie[4].x = int(x)
+                zombie[4].y = int(y)
+            if awake_rect.collidepoint(zombie[0], zombie[1]) or single is None and any(
+                    target[3].collidepoint(zombie[0], zombie[1]) for target in targets):
+                awake.append(zombie)
+            else:
+                zombie[12] = False
+        self.awake_zombies = awake
+
+    def resolve_hits(self, starts):
+        """Damage zombies hit by projectiles over this tick and remove the dead
+
+        Each projectile's whole path this tick is swept against the
+        zombies' boxes, so fast shots can't tunnel through.  Projectiles
+        never leave the views, so only awake zombies can be hit.
+        """
+        awake = self.awake_zombies
+        if not (self.projectiles and awake):
+            return
+        ends = [(proj[0], proj[1]) for proj in self.projectiles]
+        corners = [(zombie[4].x, zombie[4].y) for zombie in awake]
+        hit_projs, hit_zombies, times = swept_hits(
+            starts, ends, corners, [(x + zombie[4].w, y + zombie[4].h)
+                                    for (x, y), zombie in zip(corners, awake)])
+        # Resolve in time-of-impact order; a piercing projectile carries
+        # on to the next zombie on its path.  It is still inside a zombie
+        # it passed through on the ticks after, so each projectile only
+        # hits a zombie once
+        for proj_index, zombie_index, t in zip(hit_projs.tolist(), hit_zombies.tolist(), times.tolist()):
+            proj = self.projectiles[proj_index]
+            zombie = awake[zombie_index]
+            if not proj[4] or zombie[2] <= 0 or zombie[14] in proj[8]:
+                continue
+            proj[8].add(zombie[14])
+            zombie[2] -= proj[5]  # Use projectile's damage value
+            start_x, start_y = starts[proj_index]
+            self.hits.append((start_x + proj[2] * t, start_y + proj[3] * t, -proj[2], -proj[3]))
+            if proj[6] > 0:
+                proj[6] -= 1
+            else:
+                proj[4] = False
+
+        # Remove dead zombies and award bonds
+        # Each list is rebuilt once rather than searched for every kill
+        dead = [awake[i] for i in set(hit_zombies.tolist()) if awake[i][2] <= 0]
+        for zombie in dead:
+            self.match_bonds += WAVES["bonds_per_zombie"]  # Add bonds when zombie is killed
+            self.deaths.append((zombie[0] + 24, zombie[1] + 24))
+        if dead:
+            self.zombies = [zombie for zombie in self.zombies if zombie[2] > 0]
+            self.awake_zombies = [zombie for zombie in awake if zombie[2] > 0]
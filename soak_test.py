@@ -0,0 +1,214 @@
+"""Soak test: many consecutive matches with an autopilot, watching memory
+
+    python soak_test.py --matches 50
+    python soak_test.py --headless --matches 200 --max-growth-kb 1024
+
+The game runs through its real main loop, unthrottled.  An autopilot
+plays each match (kiting the nearest zombie and shooting at it) until it
+dies or --match-frames runs out, then returns to the menu, visits the
+shop (restock, select, buy or sell), saves and starts the next match.
+Menu, shop and game over are driven with posted key events; gameplay
+input goes through a PlayerInput whose movement and fire the autopilot
+sets.
+
+Saves and run history go to a temporary folder (profile "soak"), so the
+player's own save file is never touched.
+
+tracemalloc snapshots are taken between matches once the warm-up
+matches have built the lazily created caches.  If memory retained since
+the first snapshot grows past --max-growth-kb, the test fails (exit
+status 1).  Either way the allocation sites that grew most are listed
+by file and line.
+"""
+import argparse
+import gc
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pygame
+
+from player_input import PlayerInput
+
+PROFILE = "soak"     # Profile the autopilot plays as, in a throwaway save file
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>",
+                 "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def post_key(key):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+
+
+class AutopilotInput(PlayerInput):
+    """Player input whose movement and fire come from the autopilot"""
+
+    def __init__(self, game, rng):
+        super().__init__()
+        self.game = game
+        self.rng = rng
+        self.wander = (1, 0)
+
+    def begin_frame(self, events, arrived):
+        super().begin_frame(events, arrived)
+        game = self.game
+        if game.state != "playing":
+            return
+        center_x, center_y = game.player.center
+        nearest = min(game.sim.zombies, default=None,
+                      key=lambda z: (z[0] + 24 - center_x) ** 2 + (z[1] + 24 - center_y) ** 2)
+        if game.sim.match_tick % 90 == 0:
+            self.wander = (self.rng.choice((-1, 0, 1)), self.rng.choice((-1, 0, 1)))
+        move = self.wander
+        self.fire_held = nearest is not None
+        if nearest is not None:
+            dx = nearest[0] + 24 - center_x
+            dy = nearest[1] + 24 - center_y
+            if math.hypot(dx, dy) < 160:
+                move = (-(dx > 0) + (dx < 0), -(dy > 0) + (dy < 0))  # Back away
+            view = game.camera.rect
+            self.fire_aim = (nearest[0] + 24 - view.x, nearest[1] + 24 - view.y)
+        self.move = move
+
+
+class Autopilot:
+    """Steps a Game through match, game over, menu and shop"""
+
+    def __init__(self, game, match_frames, rng):
+        self.game = game
+        self.match_frames = match_frames
+        self.rng = rng
+        self.matches = 0
+        self.shopped_after = 0  # Matches played when the shop was last visited
+        self.shop_steps = []
+
+    def step(self):
+        """Run one frame, posting this state's next key press; True once a match has ended"""
+        game = self.game
+        ended = False
+        # A state change flushes queued events, so only post once a frame
+        # has run in the current state
+        if game.event_filter_state == game.state:
+            if game.state == "playing" and game.sim.match_tick >= self.match_frames:
+                post_key(pygame.K_ESCAPE)
+                ended = True
+            elif game.state == "game_over":
+                post_key(pygame.K_SPACE)
+                ended = True
+            elif game.state == "menu":
+                if self.shopped_after != self.matches:
+                    self.shopped_after = self.matches
+                    self.shop_steps = ["restock", "select", "trade"]
+                    post_key(pygame.K_s)
+                else:
+                    post_key(pygame.K_k)  # Save, then start the next match
+                    post_key(pygame.K_SPACE)
+            elif game.state == "shop":
+                self.shop()
+        game.run_frame()
+        if ended:
+            self.matches += 1
+        return ended
+
+    def shop(self):
+        game = self.game
+        step = self.shop_steps.pop(0) if self.shop_steps else "leave"
+        if step == "restock":
+            game.restock_at = 0  # Restocks in this frame's update
+            game.dirty = True
+        elif step == "select":
+            post_key(pygame.K_1 + self.rng.randrange(len(game.owned_characters)))
+        elif step == "trade":
+            # Mouse clicks can't be faked headless, so act on an area directly
+            areas = [area for area in game.shop_clickable_areas.values()
+                     if area["type"] == "sell" or (area["type"] == "buy" and area["can_afford"]
+                                                   and area["has_space"])]
+            if areas:
+                game.shop_action(self.rng.choice(areas))
+            game.dirty = True
+        else:
+            post_key(pygame.K_ESCAPE)  # Back to the menu, saving
+
+
+def take_snapshot():
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES])
+
+
+def traced_kib(snapshot):
+    return sum(stat.size for stat in snapshot.statistics("filename")) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wild Rails soak test")
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2, help="Matches played before the first snapshot")
+    parser.add_argument("--match-frames", type=int, default=3600,
+                        help="Leave a match after this many frames if the autopilot is still alive")
+    parser.add_argument("--snapshot-every", type=int, default=5, help="Matches between snapshots")
+    parser.add_argument("--max-growth-kb", type=float, default=2048,
+                        help="Fail if retained memory grows by more than this")
+    parser.add_argument("--top", type=int, default=10, help="Growing allocation sites to list")
+    parser.add_argument("--trace-depth", type=int, default=1, help="Stack frames tracemalloc records")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--telemetry", action="store_true", help="Also record match telemetry")
+    parser.add_argument("--headless", action="store_true", help="Use SDL's dummy video and audio drivers")
+    args = parser.parse_args()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+    import game
+
+    game.configure_logging("warning")
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    data_folder = tempfile.TemporaryDirectory(prefix="wild-rails-soak-")
+    g = game.Game(telemetry=args.telemetry, seed=args.seed, profile=PROFILE, data_folder=data_folder.name)
+    g.input = AutopilotInput(g, rng)
+    g.pacer.fps = 0  # Unthrottled: Clock.tick(0) doesn't wait
+    pilot = Autopilot(g, args.match_frames, rng)
+
+    tracemalloc.start(args.trace_depth)
+    baseline = None
+    snapshot = None
+    start = time.perf_counter()
+    frames = 0
+    while pilot.matches < args.warmup + args.matches:
+        frames += 1
+        if not pilot.step():
+            continue
+        played = pilot.matches - args.warmup
+        if played < 0 or played % args.snapshot_every and played != args.matches:
+            continue
+        snapshot = take_snapshot()
+        if baseline is None:
+            baseline = snapshot
+        growth = traced_kib(snapshot) - traced_kib(baseline)
+        print(f"match {played:>4}: wave {g.sim.wave:>2}, traced {traced_kib(snapshot) / 1024:7.2f} MiB "
+              f"({growth:+.0f} KiB since match 0), {frames / (time.perf_counter() - start):.0f} frames/s")
+
+    g.profiles.close()
+    data_folder.cleanup()
+    tracemalloc.stop()
+
+    growth = traced_kib(snapshot) - traced_kib(baseline)
+    print(f"\nTop growing allocation sites over {args.matches} matches:")
+    for stat in [s for s in snapshot.compare_to(baseline, "lineno") if s.size_diff > 0][:args.top]:
+        frame = stat.traceback[0]
+        print(f"  {frame.filename}:{frame.lineno}: {stat.size_diff / 1024:+.1f} KiB "
+              f"({stat.count_diff:+d} blocks, {stat.size / 1024:.1f} KiB now)")
+    if growth > args.max_growth_kb:
+        print(f"FAIL: retained memory grew {growth:.0f} KiB (limit {args.max_growth_kb:.0f} KiB)")
+        return 1
+    print(f"PASS: retained memory grew {growth:.0f} KiB (limit {args.max_growth_kb:.0f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
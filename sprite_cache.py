@@ -0,0 +1,129 @@
+import logging
+import math
+
+import pygame
+
+log = logging.getLogger("wild_rails.sprite_cache")
+
+# Defaults for the pre-rendered sprite cache
+FACING_ANGLES = 16       # Discrete facing directions per sprite
+WALK_FRAMES = 4          # Walk cycle frames per facing direction
+WALK_WOBBLE = 6          # Degrees of side-to-side tilt across the walk cycle
+CACHE_BUDGET = 32 * 1024 * 1024  # Max bytes of pre-rendered surfaces
+
+
+def angle_index(dx, dy, angles=FACING_ANGLES):
+    """Nearest of angles facing indices for a heading in screen space"""
+    # Screen y grows downward while rotate() turns counter-clockwise
+    degrees = math.degrees(math.atan2(-dy, dx))
+    return int(round(degrees / (360.0 / angles))) % angles
+
+
+def rotated_size(width, height, degrees):
+    """Size of the bounding box of a width x height image rotated by degrees"""
+    radians = math.radians(degrees)
+    cos_a = abs(math.cos(radians))
+    sin_a = abs(math.sin(radians))
+    return (int(math.ceil(width * cos_a + height * sin_a)) + 2,
+            int(math.ceil(width * sin_a + height * cos_a)) + 2)
+
+
+class SpriteCache:
+    """Pre-rendered facing angles and walk frames for a set of images
+
+    Every rotation happens in add(), so drawing a sprite is a plain
+    list lookup plus a blit.  Facing angle 0 is the image as drawn;
+    angles advance counter-clockwise like pygame.transform.rotate.
+    """
+
+    def __init__(self, angles=FACING_ANGLES, walk_frames=WALK_FRAMES, budget=CACHE_BUDGET):
+        self.angles = angles
+        self.walk_frames = walk_frames
+        self.budget = budget
+        self.sprites = {}  # name -> [frame][angle] -> (surface, (offset_x, offset_y))
+        self.sizes = {}    # name -> bytes used by that sprite's surfaces
+        self.rendered_angles = {}  # name -> facing angles actually rendered within the budget
+        self.step = 360.0 / angles
+
+    def _plan(self, image, free_bytes):
+        """Pick the largest (angles, frames) pair that fits in free_bytes"""
+        width, height = image.get_size()
+        bytesize = image.get_bytesize() or 4
+        angles, frames = self.angles, self.walk_frames
+        while True:
+            step = 360.0 / angles
+            per_frame = 0
+            for i in range(angles):
+                w, h = rotated_size(width, height, i * step)
+                per_frame += w * h * bytesize
+            if per_frame * frames <= free_bytes or (angles == 1 and frames == 1):
+                return angles, frames, per_frame * frames
+            # Drop walk frames before facing resolution
+            if frames > 1:
+                frames = max(1, frames // 2)
+            else:
+                angles = max(1, angles // 2)
+
+    def add(self, name, image):
+        """Pre-render every facing angle and walk frame of image under name"""
+        self.remove(name)
+        free_bytes = self.budget - self.memory_bytes()
+        angles, frames, planned = self._plan(image, free_bytes)
+        if planned > free_bytes:
+            log.warning("Sprite cache over budget: %s needs %d KB with one angle and frame, "
+                        "%d KB free", name, planned // 1024, max(0, free_bytes) // 1024)
+        step = 360.0 / angles
+
+        rendered = []
+        used = 0
+        for frame in range(frames):
+            tilt = 0
+            if frames > 1:
+                tilt = math.sin(2 * math.pi * frame / frames) * WALK_WOBBLE
+            row = []
+            for i in range(angles):
+                surf = pygame.transform.rotozoom(image, i * step + tilt, 1.0)
+                # Store the offset that centres the rotated surface on the entity
+                offset = (-surf.get_width() // 2, -surf.get_height() // 2)
+                row.append((surf, offset))
+                used += surf.get_width() * surf.get_height() * (surf.get_bytesize() or 4)
+            # Fill in skipped angles so lookups stay O(1) at full resolution
+            if angles < self.angles:
+                ratio = angles / self.angles
+                row = [row[int(j * ratio) % angles] for j in range(self.angles)]
+            rendered.append(row)
+
+        self.sprites[name] = rendered
+        self.sizes[name] = used
+        self.rendered_angles[name] = angles
+        return used
+
+    def remove(self, name):
+        """Drop a sprite and release its surfaces"""
+        self.sprites.pop(name, None)
+        self.sizes.pop(name, None)
+        self.rendered_angles.pop(name, None)
+
+    def angle_index(self, dx, dy):
+        """Nearest pre-rendered facing index for a heading in screen space"""
+        return angle_index(dx, dy, self.angles)
+
+    def get(self, name, angle_index=0, frame=0):
+        """Return (surface, offset) with the offset relative to the entity centre"""
+        frames = self.sprites[name]
+        return frames[frame % len(frames)][angle_index]
+
+    def memory_bytes(self):
+        """Total bytes held by pre-rendered surfaces"""
+        return sum(self.sizes.values())
+
+    def report(self):
+        """Human-readable summary of the cache's memory use"""
+        lines = [f"Sprite cache: {len(self.sprites)} sprites, "
+                 f"{self.memory_bytes() / (1024 * 1024):.1f} MB of "
+                 f"{self.budget / (1024 * 1024):.1f} MB budget"]
+        for name, size in sorted(self.sizes.items()):
+            frames = len(self.sprites[name])
+            lines.append(f"  {name}: {frames} frame(s) x {self.rendered_angles[name]} angles, "
+                         f"{size / 1024:.0f} KB")
+        return "\n".join(lines)
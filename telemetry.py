@@ -0,0 +1,145 @@
+"""Per-match telemetry: fixed-width records appended to monthly files
+
+Two record streams are written to the telemetry folder:
+
+- ticks-v1-YYYYMM.bin: one TICK_DTYPE record per gameplay frame
+- waves-v1-YYYYMM.bin: one WAVE_DTYPE record per wave played
+
+The files have no header or framing.  Each is a plain array of its dtype,
+so telemetry_report.py can np.memmap it and read any field as a strided
+column without parsing.  A crash can leave at most a partial record at
+the end, and readers ignore it.
+"""
+import logging
+import os
+import time
+
+import numpy as np
+
+log = logging.getLogger("wild_rails.telemetry")
+
+TELEMETRY_VERSION = 1       # Bump when a dtype changes; it is part of the file name
+TICK_BUFFER_RECORDS = 4096  # Tick records held in memory between writes (~68 s of play)
+
+TICK_DTYPE = np.dtype([
+    ("match", "<u8"),        # Match id: start time in microseconds since the epoch
+    ("tick", "<u4"),         # Gameplay frame number within the match
+    ("frame_ms", "<f4"),     # Update + draw time of the frame
+    ("wave", "<u2"),
+    ("zombies", "<u2"),
+    ("projectiles", "<u2"),
+    ("quality", "u1"),       # Index into QUALITY_LEVELS
+    ("pad", "u1"),
+])
+
+WAVE_DTYPE = np.dtype([
+    ("match", "<u8"),
+    ("character", "S16"),
+    ("wave", "<u2"),
+    ("outcome", "u1"),       # OUTCOME_* value
+    ("pad", "u1"),
+    ("kills", "<u4"),
+    ("ticks", "<u4"),        # Gameplay frames spent in the wave
+    ("seconds", "<f4"),      # Wall-clock time spent in the wave
+    ("bonds", "<u4"),        # Match bonds when the wave ended
+    ("frame_ms_mean", "<f4"),
+    ("frame_ms_max", "<f4"),
+])
+
+OUTCOME_CLEARED = 0
+OUTCOME_DIED = 1
+OUTCOME_QUIT = 2
+OUTCOMES = ["cleared", "died", "quit"]
+
+
+def stream_path(folder, stream, month):
+    """File holding one record stream ("ticks" or "waves") for a YYYYMM month"""
+    return os.path.join(folder, f"{stream}-v{TELEMETRY_VERSION}-{month}.bin")
+
+
+class MatchTelemetry:
+    """Collects tick and wave records for the current match
+
+    Tick records go into a fixed-size array that is appended to disk
+    when it fills up and when the match ends, so the game loop never
+    waits on the file system for more than one batched write.
+    """
+
+    def __init__(self, folder, buffer_records=TICK_BUFFER_RECORDS):
+        self.folder = folder
+        self.ticks = np.zeros(buffer_records, dtype=TICK_DTYPE)
+        self.count = 0
+        self.waves = []      # Finished wave records waiting to be written
+        self.match = None    # Id of the match in progress
+        self.character = b""
+
+    def start_match(self, character):
+        self.match = time.time_ns() // 1000
+        self.character = character.encode("utf-8")[:16]
+        self._begin_wave()
+
+    def _begin_wave(self):
+        self.kills = 0
+        self.wave_ticks = 0
+        self.wave_start = time.perf_counter()
+        self.frame_ms_total = 0.0
+        self.frame_ms_max = 0.0
+
+    def tick(self, tick, frame_ms, wave, zombies, projectiles, quality):
+        """Record one gameplay frame"""
+        if self.match is None:
+            return
+        self.ticks[self.count] = (self.match, tick, frame_ms, wave, min(zombies, 65535),
+                                  min(projectiles, 65535), quality, 0)
+        self.count += 1
+        if self.count == len(self.ticks):
+            self.flush()
+        self.wave_ticks += 1
+        self.frame_ms_total += frame_ms
+        if frame_ms > self.frame_ms_max:
+            self.frame_ms_max = frame_ms
+
+    def kill(self):
+        self.kills += 1
+
+    def end_wave(self, wave, bonds, outcome=OUTCOME_CLEARED):
+        """Summarise the wave that just finished and start timing the next"""
+        if self.match is None:
+            return
+        mean = self.frame_ms_total / self.wave_ticks if self.wave_ticks else 0.0
+        self.waves.append((self.match, self.character, wave, outcome, 0, self.kills,
+                           self.wave_ticks, time.perf_counter() - self.wave_start, bonds,
+                           mean, self.frame_ms_max))
+        self._begin_wave()
+
+    def end_match(self, wave, bonds, outcome, write=True):
+        """Close the last wave with the match's outcome and write everything out
+
+        With write=False the records stay buffered for a later flush().
+        """
+        if self.match is None:
+            return
+        self.end_wave(wave, bonds, outcome)
+        self.match = None
+        if write:
+            self.flush()
+
+    def should_flush(self):
+        """Whether records are waiting that are worth writing out before the buffer fills"""
+        return self.count >= len(self.ticks) // 2 or (self.match is None and (self.count or self.waves))
+
+    def flush(self):
+        """Append buffered records to this month's files"""
+        month = time.strftime("%Y%m")
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            if self.count:
+                with open(stream_path(self.folder, "ticks", month), "ab") as f:
+                    f.write(self.ticks[:self.count].tobytes())
+            if self.waves:
+                with open(stream_path(self.folder, "waves", month), "ab") as f:
+                    f.write(np.array(self.waves, dtype=WAVE_DTYPE).tobytes())
+        except OSError as e:
+            log.warning("Dropping %d tick and %d wave records: %s", self.count, len(self.waves), e)
+        self.count = 0
+        self.waves = []
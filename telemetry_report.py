@@ -0,0 +1,156 @@
+"""Summarise match telemetry per character and per wave
+
+    python telemetry_report.py
+    python telemetry_report.py --since 202601 --until 202606 --character Cowboy
+
+Files are memory-mapped and tick records are read in fixed-size chunks.
+Frame times are binned into histograms rather than collected, so memory
+use stays flat however many months of logs are scanned.
+"""
+import argparse
+import glob
+import os
+import re
+
+import numpy as np
+
+from telemetry import TICK_DTYPE, WAVE_DTYPE, TELEMETRY_VERSION, OUTCOMES
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry")
+CHUNK_RECORDS = 1 << 20     # Tick records processed per step (24 MB)
+HISTOGRAM_MS = 100.0        # Frame times above this land in the last bin
+HISTOGRAM_BINS = 1000       # 0.1 ms resolution
+MAX_WAVE = 100              # Waves above this are reported together
+
+
+def month_files(folder, stream, since=None, until=None):
+    """Files for a record stream, oldest month first, filtered to [since, until]"""
+    pattern = re.compile(rf"{stream}-v{TELEMETRY_VERSION}-(\d{{6}})\.bin$")
+    files = []
+    for path in glob.glob(os.path.join(folder, f"{stream}-v{TELEMETRY_VERSION}-*.bin")):
+        match = pattern.search(path)
+        if match and (since is None or match.group(1) >= since) and (until is None or match.group(1) <= until):
+            files.append((match.group(1), path))
+    return [path for _, path in sorted(files)]
+
+
+def open_records(path, dtype):
+    """Read-only memmap of a record file, ignoring a partial trailing record"""
+    count = os.path.getsize(path) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def percentiles(histogram, quantiles):
+    """Approximate quantiles (upper bin edges in ms) from histogram rows"""
+    counts = np.cumsum(histogram, axis=-1)
+    totals = counts[..., -1:]
+    edges = (np.arange(HISTOGRAM_BINS) + 1) * (HISTOGRAM_MS / HISTOGRAM_BINS)
+    result = []
+    for q in quantiles:
+        index = np.argmax(counts >= np.maximum(totals * q, 1), axis=-1)
+        result.append(np.where(totals[..., 0] > 0, edges[index], np.nan))
+    return result
+
+
+def load_waves(folder, since, until, character=None):
+    files = month_files(folder, "waves", since, until)
+    if not files:
+        return np.zeros(0, dtype=WAVE_DTYPE)
+    waves = np.concatenate([open_records(path, WAVE_DTYPE) for path in files])
+    if character is not None:
+        waves = waves[waves["character"] == character.encode("utf-8")[:16]]
+    return waves
+
+
+def frame_histograms(folder, since, until, matches, match_characters, character_count):
+    """Frame time histograms per wave and per character from the tick streams
+
+    matches is the sorted array of match ids to include and
+    match_characters their character codes.
+    """
+    per_wave = np.zeros((MAX_WAVE + 1, HISTOGRAM_BINS), dtype=np.int64)
+    per_character = np.zeros((character_count, HISTOGRAM_BINS), dtype=np.int64)
+    scale = HISTOGRAM_BINS / HISTOGRAM_MS
+    for path in month_files(folder, "ticks", since, until):
+        ticks = open_records(path, TICK_DTYPE)
+        for start in range(0, len(ticks), CHUNK_RECORDS):
+            chunk = ticks[start:start + CHUNK_RECORDS]
+            # Ticks of matches without wave records (filtered out or cut short) are skipped
+            slot = np.searchsorted(matches, chunk["match"])
+            slot[slot == len(matches)] = 0
+            known = matches[slot] == chunk["match"]
+            bins = np.minimum((chunk["frame_ms"][known] * scale).astype(np.int64), HISTOGRAM_BINS - 1)
+            waves = np.minimum(chunk["wave"][known].astype(np.int64), MAX_WAVE)
+            characters = match_characters[slot[known]]
+            per_wave += np.bincount(waves * HISTOGRAM_BINS + bins,
+                                    minlength=per_wave.size).reshape(per_wave.shape)
+            per_character += np.bincount(characters * HISTOGRAM_BINS + bins,
+                                         minlength=per_character.size).reshape(per_character.shape)
+    return per_wave, per_character
+
+
+def report(folder, since=None, until=None, character=None):
+    waves = load_waves(folder, since, until, character)
+    if len(waves) == 0:
+        print(f"No telemetry found in {folder}")
+        return
+
+    # Last record of each match holds the wave it reached and how it ended
+    order = np.lexsort((waves["wave"], waves["match"]))
+    waves = waves[order]
+    matches, first = np.unique(waves["match"], return_index=True)
+    last = np.append(first[1:], len(waves)) - 1
+    names, codes = np.unique(waves["character"], return_inverse=True)
+    match_characters = codes[first]
+    reached = waves["wave"][last]
+    match_kills = np.add.reduceat(waves["kills"].astype(np.int64), first)
+    match_seconds = np.add.reduceat(waves["seconds"].astype(np.float64), first)
+    outcomes = waves["outcome"][last]
+
+    per_wave_frames, per_character_frames = frame_histograms(
+        folder, since, until, matches, match_characters, len(names))
+
+    print(f"{len(matches)} matches, {len(waves)} waves, "
+          f"{match_seconds.sum() / 3600:.1f} hours of play\n")
+
+    character_p50, character_p99 = percentiles(per_character_frames, (0.5, 0.99))
+    print(f"{'character':<16}{'matches':>8}{'avg wave':>9}{'best':>6}{'kills/match':>12}"
+          f"{'min/match':>10}{'died':>6}{'frame p50':>10}{'p99':>7}")
+    for code, name in enumerate(names):
+        mine = match_characters == code
+        died = np.count_nonzero(outcomes[mine] == OUTCOMES.index("died"))
+        print(f"{name.decode('utf-8', 'replace'):<16}{np.count_nonzero(mine):>8}"
+              f"{reached[mine].mean():>9.1f}{reached[mine].max():>6}"
+              f"{match_kills[mine].mean():>12.1f}{match_seconds[mine].mean() / 60:>10.1f}"
+              f"{died:>6}{character_p50[code]:>8.1f}ms{character_p99[code]:>5.1f}ms")
+
+    wave_numbers = np.minimum(waves["wave"].astype(np.int64), MAX_WAVE)
+    played = np.bincount(wave_numbers, minlength=MAX_WAVE + 1)
+    cleared = np.bincount(wave_numbers[waves["outcome"] == OUTCOMES.index("cleared")],
+                          minlength=MAX_WAVE + 1)
+    kills = np.bincount(wave_numbers, weights=waves["kills"], minlength=MAX_WAVE + 1)
+    seconds = np.bincount(wave_numbers, weights=waves["seconds"], minlength=MAX_WAVE + 1)
+    wave_p50, wave_p95, wave_p99 = percentiles(per_wave_frames, (0.5, 0.95, 0.99))
+    print(f"\n{'wave':>5}{'played':>8}{'cleared':>9}{'avg kills':>10}{'avg secs':>9}"
+          f"{'frame p50':>10}{'p95':>7}{'p99':>7}")
+    for wave in np.flatnonzero(played):
+        label = f"{wave}+" if wave == MAX_WAVE else str(wave)
+        print(f"{label:>5}{played[wave]:>8}{cleared[wave]:>9}{kills[wave] / played[wave]:>10.1f}"
+              f"{seconds[wave] / played[wave]:>9.1f}{wave_p50[wave]:>8.1f}ms"
+              f"{wave_p95[wave]:>5.1f}ms{wave_p99[wave]:>5.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wild Rails telemetry report")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER)
+    parser.add_argument("--since", help="First month to include, as YYYYMM")
+    parser.add_argument("--until", help="Last month to include, as YYYYMM")
+    parser.add_argument("--character", help="Only include matches played as this character")
+    args = parser.parse_args()
+    report(args.folder, args.since, args.until, args.character)
+
+
+if __name__ == "__main__":
+    main()
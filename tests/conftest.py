@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live at the top of the repository; pygame needs no window or sound
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,73 @@
+import copy
+import json
+import os
+import re
+import shutil
+
+import pytest
+
+from balance import (CHARACTERS, DATA_FOLDER, DEFAULT_CHARACTER, TABLES, BalanceError,
+                     ensure_loaded, load_table, read_table, validate)
+
+ensure_loaded()
+
+
+def shipped(name):
+    with open(os.path.join(DATA_FOLDER, TABLES[name][1]), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_shipped_tables_are_valid():
+    for name in TABLES:
+        validate(name, shipped(name))
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda c: c[DEFAULT_CHARACTER].pop("damage"), "missing damage"),
+    (lambda c: c[DEFAULT_CHARACTER].update(damage="10"), "must be int, not str"),
+    (lambda c: c[DEFAULT_CHARACTER].update(damage=True), "must be int, not bool"),
+    (lambda c: c[DEFAULT_CHARACTER].update(projectiles=0), "must be at least 1"),
+    (lambda c: c[DEFAULT_CHARACTER].update(speed=3), "unknown field(s): speed"),
+    (lambda c: c[DEFAULT_CHARACTER].update(rarity="Shiny"), "unknown rarity Shiny"),
+    (lambda c: c[DEFAULT_CHARACTER].update(melee_color=[0, 0, 256]), "0-255 components"),
+    (lambda c: c.pop(DEFAULT_CHARACTER), f"must define {DEFAULT_CHARACTER}"),
+])
+def test_character_errors(change, message):
+    characters = copy.deepcopy(shipped("characters"))
+    change(characters)
+    with pytest.raises(BalanceError, match=re.escape(message)):
+        validate("characters", characters)
+
+
+def test_rarity_errors():
+    rarities = shipped("rarities")
+    with pytest.raises(BalanceError, match="chance above 0"):
+        validate("rarities", {key: dict(value, chance=0) for key, value in rarities.items()})
+    used = CHARACTERS[DEFAULT_CHARACTER]["rarity"]
+    with pytest.raises(BalanceError, match=f"drops rarity {used}"):
+        validate("rarities", {key: value for key, value in rarities.items() if key != used})
+
+
+def test_wave_errors():
+    waves = shipped("waves")
+    with pytest.raises(BalanceError, match="wave_growth must be at least 1"):
+        validate("waves", dict(waves, wave_growth=0.5))
+    with pytest.raises(BalanceError, match="must be an object"):
+        validate("waves", [])
+
+
+def test_bad_file_keeps_the_loaded_table(tmp_path):
+    for filename in os.listdir(DATA_FOLDER):
+        if filename.endswith(".json") and filename != "Settings.json":
+            shutil.copy(os.path.join(DATA_FOLDER, filename), tmp_path)
+    (tmp_path / "waves.json").write_text("{not json", encoding="utf-8")
+    with pytest.raises(BalanceError, match="Can't read"):
+        read_table("waves", str(tmp_path))
+
+    waves = shipped("waves")
+    waves["first_wave_size"] = 0
+    (tmp_path / "waves.json").write_text(json.dumps(waves), encoding="utf-8")
+    before = dict(TABLES["waves"][0])
+    with pytest.raises(BalanceError, match="first_wave_size must be at least 1"):
+        load_table("waves", str(tmp_path))
+    assert TABLES["waves"][0] == before
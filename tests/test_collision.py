@@ -0,0 +1,38 @@
+import math
+
+import numpy as np
+
+from collision import sweep, swept_hits
+
+
+def sweep_one(start, delta, box_min, box_max):
+    return sweep(*(np.array([point], dtype=float) for point in (start, delta, box_min, box_max)))[0]
+
+
+def test_sweep_enters_box_part_way():
+    assert sweep_one((0, 5), (20, 0), (5, 0), (10, 10)) == 0.25
+
+
+def test_sweep_from_inside_the_box_is_zero():
+    assert sweep_one((7, 5), (20, 0), (5, 0), (10, 10)) == 0
+
+
+def test_sweep_misses():
+    assert math.isinf(sweep_one((0, 20), (20, 0), (5, 0), (10, 10)))   # Passes above
+    assert math.isinf(sweep_one((0, 5), (4, 0), (5, 0), (10, 10)))     # Stops short
+    assert math.isinf(sweep_one((12, 5), (20, 0), (5, 0), (10, 10)))   # Moving away
+
+
+def test_swept_hits_catch_fast_projectiles_in_time_order():
+    # One projectile crosses both boxes in a single step; the other starts inside one
+    starts = [(0, 5), (32, 5)]
+    ends = [(100, 5), (33, 5)]
+    corners = [(60, 0), (20, 0), (30, 0)]
+    hit_projs, hit_boxes, times = swept_hits(starts, ends, corners, [(x + 10, y + 10) for x, y in corners])
+    hits = list(zip(hit_projs.tolist(), hit_boxes.tolist(), times.tolist()))
+    assert hits == [(1, 2, 0.0), (0, 1, 0.2), (0, 2, 0.3), (0, 0, 0.6)]
+
+
+def test_swept_hits_with_nothing_to_hit():
+    hit_projs, hit_boxes, times = swept_hits([(0, 0)], [(10, 0)], np.empty((0, 2)), np.empty((0, 2)))
+    assert len(hit_projs) == len(hit_boxes) == len(times) == 0
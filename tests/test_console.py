@@ -0,0 +1,34 @@
+import pytest
+
+from console import MAX_WAVE, MAX_WAVE_SIZE
+from game import Game
+
+
+@pytest.fixture
+def game(tmp_path):
+    game = Game(telemetry=False, seed=5, data_folder=str(tmp_path))
+    game.reset_game()
+    yield game
+    game.profiles.close()
+
+
+def test_wave_size_is_capped(game):
+    game.console.execute(f"wave {MAX_WAVE}")
+    assert game.sim.wave == MAX_WAVE
+    assert game.sim.zombies_per_wave == MAX_WAVE_SIZE
+    assert game.console.output[-1].endswith("(capped)")
+
+
+@pytest.mark.parametrize("number", [MAX_WAVE + 1, 10 ** 9, 0, "x"])
+def test_wave_out_of_range_is_rejected(game, number):
+    game.console.execute(f"wave {number}")
+    assert game.sim.wave == 1
+    assert game.console.output[-1].startswith("wave: ")
+
+
+def test_command_errors_are_reported(game, monkeypatch):
+    def overflow(*args):
+        raise OverflowError("too big")
+    monkeypatch.setattr(game.sim, "spawn_many", overflow)
+    game.console.execute("spawn 5")
+    assert game.console.output[-1] == "spawn: too big"
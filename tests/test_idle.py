@@ -0,0 +1,21 @@
+import time
+
+from game import Game, IDLE_WAKE_MS
+
+
+def test_idle_screen_runs_queued_chores_at_once(tmp_path):
+    game = Game(telemetry=False, seed=5, data_folder=str(tmp_path))
+    try:
+        while game.needs_redraw():
+            game.run_frame()  # Draw the menu until it is a static screen
+        assert game.idle_timeout_ms() > 0
+        ran = []
+        game.scheduler.defer("save", lambda: ran.append(True))
+        assert game.idle_timeout_ms() == 0
+        start = time.perf_counter()
+        game.run_frame()
+        assert ran == [True]
+        assert time.perf_counter() - start < IDLE_WAKE_MS / 1000 / 2
+        assert game.idle_timeout_ms() > 0
+    finally:
+        game.profiles.close()
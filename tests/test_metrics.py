@@ -0,0 +1,50 @@
+import urllib.request
+
+import pytest
+
+from game import Game
+from metrics import HOST
+
+
+def scrape(port):
+    with urllib.request.urlopen(f"http://{HOST}:{port}/metrics", timeout=5) as response:
+        text = response.read().decode("utf-8")
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+@pytest.fixture
+def game(tmp_path):
+    game = Game(telemetry=False, seed=5, metrics_port=0, data_folder=str(tmp_path))
+    yield game
+    game.metrics.close()
+    game.profiles.close()
+
+
+def test_game_gauges_and_frame_histogram(game):
+    game.reset_game()
+    game.console.execute("wave 3")
+    game.console.execute("spawn 40")
+    frames = 20
+    for _ in range(frames):
+        game.run_frame()
+    game.sim.match_bonds = 30
+
+    samples = scrape(game.metrics.exporter.port)
+    sim = game.sim
+    assert samples["wild_rails_playing"] == 1
+    assert samples["wild_rails_zombies"] == len(sim.zombies) >= 40
+    assert samples["wild_rails_awake_zombies"] == len(sim.awake_zombies)
+    assert samples["wild_rails_wave"] == sim.wave == 3
+    assert samples["wild_rails_match_bonds"] == 30
+    assert samples["wild_rails_quality_level"] == game.quality.index
+    assert samples["wild_rails_frames_total"] == frames
+    assert samples['wild_rails_frame_seconds_bucket{le="+Inf"}'] == frames
+    assert samples["wild_rails_frame_seconds_count"] == frames
+    assert samples["wild_rails_frame_seconds_sum"] > 0
+    buckets = [value for name, value in samples.items() if name.startswith("wild_rails_frame_seconds_bucket")]
+    assert buckets == sorted(buckets)  # Cumulative
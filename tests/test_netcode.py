@@ -0,0 +1,51 @@
+import netcode
+
+
+def snapshot(tick, base_tick, zombies, projectiles, base=({}, {})):
+    """Encode the difference from base and decode it again"""
+    zombie_ids, removed_zombies = netcode.diff_entities(zombies, base[0])
+    projectile_ids, removed_projectiles = netcode.diff_entities(projectiles, base[1])
+    players = {1: netcode.quantize(100, 200) + (1,)}
+    packet = netcode.encode_snapshot(tick, base_tick, 3, 120, netcode.FLAG_GAME_OVER, players,
+                                     zombies, zombie_ids, projectiles, projectile_ids,
+                                     removed_zombies, removed_projectiles)
+    return netcode.decode_snapshot(packet)
+
+
+def test_snapshot_round_trip():
+    zombies = {7: netcode.quantize(-20, 300) + (255,), 9: netcode.quantize(5000, 10) + (17,)}
+    projectiles = {40: netcode.quantize(12.7, 99.2)}
+    decoded = snapshot(10, 0, zombies, projectiles)
+    assert (decoded["tick"], decoded["base_tick"], decoded["wave"], decoded["bonds"]) == (10, 0, 3, 120)
+    assert decoded["flags"] & netcode.FLAG_GAME_OVER
+    assert decoded["players"] == {1: (1124, 1224, 1)}
+    assert decoded["zombies"] == zombies
+    assert decoded["projectiles"] == projectiles
+    assert netcode.dequantize(*decoded["zombies"][7][:2]) == (-20, 300)
+
+
+def test_deltas_rebuild_the_server_state():
+    world = netcode.ClientWorld()
+    first = {1: (1100, 1100, 255), 2: (1200, 1100, 255), 3: (1300, 1100, 255)}
+    assert world.apply(snapshot(2, 0, first, {5: (1000, 1000)}))
+
+    second = {1: (1100, 1100, 255), 2: (1210, 1105, 128), 4: (1400, 1100, 255)}
+    delta = snapshot(4, 2, second, {}, base=(first, {5: (1000, 1000)}))
+    assert set(delta["zombies"]) == {2, 4}  # Unchanged zombie 1 isn't sent
+    assert delta["removed_zombies"] == [3] and delta["removed_projectiles"] == [5]
+    assert world.apply(delta)
+    assert world.zombies == second
+    assert world.projectiles == {}
+
+
+def test_stale_and_unknown_bases_are_rejected():
+    world = netcode.ClientWorld()
+    assert world.apply(snapshot(4, 0, {1: (1, 1, 1)}, {}))
+    assert not world.apply(snapshot(3, 0, {}, {}))   # Older than what the client has
+    assert not world.apply(snapshot(6, 5, {}, {}))   # Base the client never received
+    assert world.zombies == {1: (1, 1, 1)}
+
+
+def test_input_round_trip():
+    packet = netcode.encode_input(12, 30, -1, 1, True, 512.5, -3.0)
+    assert netcode.decode_input(packet) == (12, 30, -1, 1, True, 512.5, -3.0)
@@ -0,0 +1,22 @@
+import pygame
+
+from game import Game
+
+
+def test_events_carry_their_arrival_time(tmp_path):
+    game = Game(telemetry=False, seed=5, data_folder=str(tmp_path))
+    try:
+        game.reset_game()
+        game.run_frame()
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(10, 20)))
+        before = pygame.time.get_ticks()
+        game.run_frame()
+        snapshot = game.input
+        assert [event.type for _, event in snapshot.events] == [pygame.MOUSEBUTTONDOWN]
+        arrived = snapshot.events[0][0]
+        assert before <= arrived <= pygame.time.get_ticks()
+        assert snapshot.fire_arrived == arrived
+        game.run_frame()
+        assert snapshot.events == [] and snapshot.fire_arrived is None
+    finally:
+        game.profiles.close()
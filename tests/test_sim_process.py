@@ -0,0 +1,33 @@
+import pytest
+
+from sim_process import SimulationProcess
+from simulation import Simulation
+
+
+def state(sim):
+    zombies = sorted((z[0], z[1], z[2]) for z in sim.zombies)
+    return (sim.match_tick, sim.wave, sim.match_bonds, *sim.players[1].pos,
+            *(value for zombie in zombies for value in zombie))
+
+
+def test_worker_shows_the_same_match_one_tick_behind():
+    inline = Simulation(seed=3)
+    worker = SimulationProcess(seed=3)
+    try:
+        for sim in (inline, worker):
+            sim.add_player()
+            sim.set_subsystem("collision", False)
+        seen = []
+        for tick in range(1, 301):
+            for sim in (inline, worker):
+                sim.set_input(1, (tick // 30) % 2 * 2 - 1, 0, True, 0.0, 0.0)
+                sim.step()
+            seen.append((state(inline), state(worker), len(worker.shots)))
+        # Each worker step shows the tick started by the step before
+        for (expected, _, _), (_, shown, _) in zip(seen, seen[1:]):
+            assert shown == pytest.approx(expected, abs=1e-3)  # Frames hold 32-bit floats
+        assert sum(shots for _, _, shots in seen) == 5  # Once a second
+        assert len(seen[-1][1]) > 5  # Wave spawns showed up
+        assert worker.torn == 0
+    finally:
+        worker.close()
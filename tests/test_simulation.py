@@ -0,0 +1,59 @@
+import pygame
+
+from balance import WAVES
+from simulation import Simulation, ZOMBIE_SIZE
+
+
+def add_zombie(sim, x, y, hp):
+    """A standing zombie, awake so projectiles can hit it"""
+    zombie = [x, y, hp, hp, pygame.Rect(x, y, ZOMBIE_SIZE, ZOMBIE_SIZE), 0, 0, "Zombie", 1.0,
+              0.0, 0.0, sim.tick, True, False, sim._new_id()]
+    sim.zombies.append(zombie)
+    sim.awake_zombies.append(zombie)
+    return zombie
+
+
+def still_match():
+    """A one-player match with nothing moving or spawning by itself"""
+    sim = Simulation(seed=1)
+    sim.add_player()
+    sim.invulnerable = True
+    sim.set_subsystem("movement", False)
+    sim.set_subsystem("spawning", False)
+    sim.clear()
+    return sim
+
+
+def test_slow_piercing_shot_hits_each_stacked_zombie_once():
+    sim = still_match()
+    view = sim.players[1].camera.rect
+    x, y = view.x + 100, view.y + 100
+    first = add_zombie(sim, x + 20, y, 100)
+    second = add_zombie(sim, x + 20 + ZOMBIE_SIZE, y, 100)
+    # One pixel a tick, so the shot spends dozens of ticks inside each zombie
+    sim.projectiles.append([x, y + ZOMBIE_SIZE // 2, 1.0, 0.0, True, 10, 1, sim._new_id(), set()])
+
+    hits = 0
+    for _ in range(3 * ZOMBIE_SIZE):
+        sim.step()
+        hits += len(sim.hits)
+
+    assert (first[2], second[2]) == (90, 90)
+    assert hits == 2
+    assert not sim.projectiles  # Spent on the second zombie
+
+
+def test_shot_without_pierce_stops_at_the_first_zombie():
+    sim = still_match()
+    view = sim.players[1].camera.rect
+    x, y = view.x + 100, view.y + 100
+    first = add_zombie(sim, x + 20, y, 10)
+    second = add_zombie(sim, x + 20 + ZOMBIE_SIZE, y, 10)
+    sim.projectiles.append([x, y + ZOMBIE_SIZE // 2, 8.0, 0.0, True, 10, 0, sim._new_id(), set()])
+
+    for _ in range(30):
+        sim.step()
+
+    assert first not in sim.zombies
+    assert second in sim.zombies and second[2] == 10
+    assert sim.match_bonds == WAVES["bonds_per_zombie"]
@@ -0,0 +1,41 @@
+import numpy as np
+
+from balance import ensure_loaded
+from wave_director import WavePlan
+
+ensure_loaded()
+
+
+def schedule(plan):
+    return plan.times, plan.sides, plan.along, plan.kinds
+
+
+def test_same_seed_plans_the_same_wave():
+    for a, b in zip(schedule(WavePlan(5, 200, 1234)), schedule(WavePlan(5, 200, 1234))):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_seed_and_wave_change_the_plan():
+    base = WavePlan(5, 200, 1234)
+    assert not np.array_equal(base.along, WavePlan(5, 200, 1235).along)
+    assert not np.array_equal(base.along, WavePlan(6, 200, 1234).along[:200])
+
+
+def test_take_hands_out_every_spawn_once():
+    plan = WavePlan(3, 50, 7)
+    taken = []
+    tick = 0
+    while not plan.done():
+        tick += 1
+        taken.extend(plan.take(tick)[2].tolist())
+    assert taken == plan.kinds.tolist()
+    assert len(plan.take(tick + 1)[2]) == 0
+
+
+def test_requeued_zombies_come_back_on_the_next_take():
+    plan = WavePlan(1, 10, 7)
+    plan.take(10 ** 9)
+    plan.requeue(plan.names[0])
+    assert not plan.done()
+    assert plan.take(10 ** 9)[2].tolist() == [0]
+    assert plan.done()
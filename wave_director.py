@@ -0,0 +1,144 @@
+"""Precomputed wave spawn schedules
+
+A wave's spawns are generated once at wave start as arrays of spawn
+tick, view edge, position along the edge and enemy type.  Each tick the
+game takes whatever is due with one searchsorted and adds it in bulk,
+so pacing costs nothing per spawn and a wave of thousands starts as
+quickly as a wave of five.
+
+Small waves keep the classic one zombie every spawn_delay ticks.  Once
+that would take longer than MAX_SPAWN_TICKS the wave is compressed into
+bursts that grow towards the end of the wave.  Everything is drawn from
+a generator seeded with (match seed, wave), so a seed replays the same
+schedule whatever happened earlier in the match.
+"""
+import numpy as np
+
+from balance import RARITIES, ENEMY_TYPES, WAVES
+
+MAX_SPAWN_TICKS = 45 * 60  # Longest a wave takes to spawn, at 60 ticks per second
+BURST_RAMP = 2.0           # Last burst of a wave is this much bigger than the first
+BURST_SPREAD = 20          # Ticks a burst is spread over so it doesn't land in one frame
+BASE_ENEMY = "Zombie"      # Regular zombie; other types join as the waves toughen
+
+TOP, RIGHT, BOTTOM, LEFT = range(4)
+
+
+def zombie_max_hp(wave):
+    """Zombie health for a wave: base health on wave 1, growing by a factor per wave"""
+    return int(WAVES["zombie_base_hp"] * (WAVES["zombie_hp_growth"] ** (wave - 1)))
+
+
+def next_wave_size(wave, zombies_per_wave):
+    """Zombie count for wave given the previous wave's count"""
+    if wave == 2:
+        return zombies_per_wave + WAVES["second_wave_increase"]
+    # Exponential growth in later waves
+    return int(zombies_per_wave * WAVES["wave_growth"])
+
+
+def enemy_weights(wave):
+    """(type names, spawn weights, hp multipliers, speed multipliers) for a wave
+
+    A type can appear once regular zombies are at least as tough as its
+    base health, and is weighted by its rarity's chance.  Its health
+    scales with the wave like a regular zombie's.
+    """
+    hp = zombie_max_hp(wave)
+    names = [name for name, enemy in ENEMY_TYPES.items()
+             if name == BASE_ENEMY or enemy["base_hp"] <= hp]
+    if not names:
+        names = [min(ENEMY_TYPES, key=lambda name: ENEMY_TYPES[name]["base_hp"])]
+    weights = np.array([RARITIES[ENEMY_TYPES[name]["rarity"]]["chance"] for name in names], dtype=np.float64)
+    if weights.sum() <= 0:
+        weights[:] = 1.0
+    hp_scale = np.array([ENEMY_TYPES[name]["base_hp"] / WAVES["zombie_base_hp"] for name in names])
+    if BASE_ENEMY in names:
+        hp_scale[names.index(BASE_ENEMY)] = 1.0  # The waves table sets regular zombie health
+    speed = np.array([ENEMY_TYPES[name]["speed_multiplier"] for name in names])
+    return names, weights / weights.sum(), hp_scale, speed
+
+
+def spawn_times(count, spawn_delay, rng):
+    """Sorted spawn ticks for a wave of count zombies"""
+    if count * spawn_delay <= MAX_SPAWN_TICKS:
+        return np.arange(1, count + 1) * spawn_delay
+    # Too many to trickle in: burst every spawn_delay ticks, bursts growing linearly
+    bursts = max(1, MAX_SPAWN_TICKS // spawn_delay)
+    weights = 1.0 + (BURST_RAMP - 1.0) * np.arange(bursts) / max(bursts - 1, 1)
+    bounds = np.round(np.cumsum(weights) / weights.sum() * count).astype(np.int64)
+    sizes = np.diff(bounds, prepend=0)
+    times = np.repeat(np.arange(1, bursts + 1) * spawn_delay, sizes)
+    times += rng.integers(0, BURST_SPREAD, count)
+    return np.sort(times)
+
+
+class WavePlan:
+    """One wave's schedule; take() hands out spawns as they fall due"""
+
+    def __init__(self, wave, count, seed):
+        rng = np.random.default_rng([seed, wave])
+        self.names, self.weights, self.hp_scale, self.speed = enemy_weights(wave)
+        self.kind_of = {name: kind for kind, name in enumerate(self.names)}
+        self.max_hp = zombie_max_hp(wave)
+        self.times = spawn_times(count, WAVES["spawn_delay"], rng)
+        self.sides = rng.integers(0, 4, count)
+        self.along = rng.random(count)  # Position along the edge, 0-1
+        self.kinds = rng.choice(len(self.names), count, p=self.weights)
+        self.next = 0
+        self.requeued = []  # Kinds of zombies sent back to spawn again
+
+    def take(self, tick):
+        """(sides, along, kinds) of every spawn due by tick, in bulk"""
+        end = int(np.searchsorted(self.times, tick, side="right"))
+        start, self.next = self.next, max(end, self.next)
+        sides = self.sides[start:self.next]
+        along = self.along[start:self.next]
+        kinds = self.kinds[start:self.next]
+        if self.requeued:
+            # Zombies recycled from outside the simulated area re-enter straight away
+            count = len(self.requeued)
+            sides = np.concatenate((sides, np.arange(count) % 4))
+            along = np.concatenate((along, np.full(count, 0.5)))
+            kinds = np.concatenate((kinds, self.requeued))
+            self.requeued = []
+        return sides, along, kinds
+
+    def requeue(self, name):
+        """Send a zombie of an enemy type back to spawn again
+
+        Zombies can outlive the plan they came from (the console jumps
+        waves), so a type this wave doesn't field comes back as a regular
+        zombie.
+        """
+        fallback = self.kind_of.get(BASE_ENEMY, 0)
+        self.requeued.append(self.kind_of.get(name, fallback))
+
+    def done(self):
+        """Everything in the schedule has been handed out"""
+        return self.next >= len(self.times) and not self.requeued
+
+
+def edge_positions(view, sides, along, margin=50):
+    """World positions just outside a pygame.Rect view for scheduled spawns"""
+    x = np.where(sides == RIGHT, view.right + margin,
+                 np.where(sides == LEFT, view.left - margin, view.left + along * view.width))
+    y = np.where(sides == TOP, view.top - margin,
+                 np.where(sides == BOTTOM, view.bottom + margin, view.top + along * view.height))
+    return x, y
+
+
+if __name__ == "__main__":
+    import time
+
+    from balance import ensure_loaded
+
+    ensure_loaded()
+    count = WAVES["first_wave_size"]
+    for wave in range(1, 31):
+        start = time.perf_counter()
+        plan = WavePlan(wave, count, seed=1)
+        elapsed = (time.perf_counter() - start) * 1000
+        types = ", ".join(f"{plan.names[k]} {n}" for k, n in enumerate(np.bincount(plan.kinds, minlength=len(plan.names))) if n)
+        print(f"wave {wave:>2}: {count:>7} zombies over {plan.times[-1] / 60:5.1f}s, planned in {elapsed:6.2f} ms ({types})")
+        count = next_wave_size(wave + 1, count)
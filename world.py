@@ -0,0 +1,182 @@
+import math
+import random
+from collections import OrderedDict
+
+import pygame
+
+# World layout: a long strip of fixed-size chunks with the railway running
+# through the middle from west to east
+CHUNK_SIZE = 256
+WORLD_CHUNKS_X = 128
+WORLD_CHUNKS_Y = 8
+WORLD_WIDTH = CHUNK_SIZE * WORLD_CHUNKS_X
+WORLD_HEIGHT = CHUNK_SIZE * WORLD_CHUNKS_Y
+RAIL_Y = WORLD_HEIGHT // 2   # Centre line of the track
+RAIL_GAUGE = 40              # Distance between the two rails
+TIE_SPACING = 32             # Distance between sleepers
+ACTIVE_MARGIN = 1            # Chunks around the view that keep simulating
+CLEAR_CHUNKS = 4             # Chunks at the western end kept clear for the start
+WAGON_CHANCE = 0.2           # Chance a track chunk has a derelict wagon
+WAGON_LENGTH = 140
+ROCK_CHANCE = 0.5            # Chance a chunk has a rock
+
+SAND = (238, 203, 173)
+DARK_SAND = (222, 184, 150)
+GRAVEL = (170, 160, 150)
+TIE_BROWN = (110, 75, 45)
+RAIL_STEEL = (90, 90, 100)
+ROCK_GREY = (128, 118, 110)
+WAGON_RED = (120, 50, 35)
+
+
+class Camera:
+    """View rectangle into the world that follows a target"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.x = 0.0
+        self.y = 0.0
+
+    def follow(self, center_x, center_y):
+        """Centre the view on a point, clamped to the world edges"""
+        self.x = max(0, min(center_x - self.width / 2, WORLD_WIDTH - self.width))
+        self.y = max(0, min(center_y - self.height / 2, WORLD_HEIGHT - self.height))
+
+    @property
+    def rect(self):
+        return pygame.Rect(int(self.x), int(self.y), self.width, self.height)
+
+    def to_world(self, screen_x, screen_y):
+        return screen_x + self.x, screen_y + self.y
+
+    def active_rect(self, margin_chunks=ACTIVE_MARGIN):
+        """World rect of the chunks around the view that are simulated
+
+        Not clamped to the world, so zombies spawning just past the world
+        edge are still simulated.
+        """
+        first_x = int(self.x) // CHUNK_SIZE - margin_chunks
+        first_y = int(self.y) // CHUNK_SIZE - margin_chunks
+        last_x = int(self.x + self.width) // CHUNK_SIZE + margin_chunks
+        last_y = int(self.y + self.height) // CHUNK_SIZE + margin_chunks
+        return pygame.Rect(first_x * CHUNK_SIZE, first_y * CHUNK_SIZE,
+                           (last_x - first_x + 1) * CHUNK_SIZE,
+                           (last_y - first_y + 1) * CHUNK_SIZE)
+
+
+def chunk_obstacles(chunk_x, chunk_y, seed=0):
+    """World rects of the rocks and wagons in a chunk, as ("rock" | "wagon", Rect)
+
+    Generated from the chunk's own seed, so the renderer and the
+    navigation grid agree without storing anything.
+    """
+    if chunk_x < CLEAR_CHUNKS:
+        return []
+    rng = random.Random((seed * 1000003 + chunk_x) * 7919 + chunk_y)
+    left, top = chunk_x * CHUNK_SIZE, chunk_y * CHUNK_SIZE
+    obstacles = []
+    bed = pygame.Rect(left, RAIL_Y - RAIL_GAUGE, CHUNK_SIZE, RAIL_GAUGE * 2)
+    if chunk_y == RAIL_Y // CHUNK_SIZE and rng.random() < WAGON_CHANCE:
+        x = left + rng.randrange(CHUNK_SIZE - WAGON_LENGTH)
+        obstacles.append(("wagon", pygame.Rect(x, bed.y - 8, WAGON_LENGTH, bed.height + 16)))
+    if rng.random() < ROCK_CHANCE:
+        w, h = rng.randint(32, 72), rng.randint(28, 56)
+        rock = pygame.Rect(left + rng.randrange(CHUNK_SIZE - w), top + rng.randrange(CHUNK_SIZE - h), w, h)
+        if not rock.colliderect(bed.inflate(0, 40)):
+            obstacles.append(("rock", rock))
+    return obstacles
+
+
+def render_chunk(chunk_x, chunk_y, seed=0):
+    """Draw the background of one chunk at full resolution"""
+    surf = pygame.Surface((CHUNK_SIZE, CHUNK_SIZE))
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert()
+    surf.fill(SAND)
+
+    # Scatter the same pebbles and dunes every time this chunk is drawn
+    rng = random.Random((seed * 1000003 + chunk_x) * 1000003 + chunk_y)
+    for _ in range(rng.randint(6, 14)):
+        x, y = rng.randrange(CHUNK_SIZE), rng.randrange(CHUNK_SIZE)
+        pygame.draw.ellipse(surf, DARK_SAND, (x, y, rng.randint(12, 40), rng.randint(4, 12)))
+    for _ in range(rng.randint(2, 6)):
+        x, y = rng.randrange(CHUNK_SIZE), rng.randrange(CHUNK_SIZE)
+        pygame.draw.circle(surf, GRAVEL, (x, y), rng.randint(2, 4))
+
+    # Railway: gravel bed, sleepers, then the two rails
+    top = chunk_y * CHUNK_SIZE
+    bed = pygame.Rect(0, RAIL_Y - RAIL_GAUGE - top, CHUNK_SIZE, RAIL_GAUGE * 2)
+    if bed.colliderect(surf.get_rect()):
+        pygame.draw.rect(surf, GRAVEL, bed)
+        for x in range(TIE_SPACING // 2, CHUNK_SIZE, TIE_SPACING):
+            pygame.draw.rect(surf, TIE_BROWN, (x - 5, bed.y + 6, 10, bed.height - 12))
+        for rail_y in (RAIL_Y - RAIL_GAUGE // 2 - top, RAIL_Y + RAIL_GAUGE // 2 - top):
+            pygame.draw.line(surf, RAIL_STEEL, (0, rail_y), (CHUNK_SIZE, rail_y), 4)
+
+    # Wagons straddle the chunk boundary the track runs along
+    obstacles = [obstacle for row in (chunk_y - 1, chunk_y, chunk_y + 1)
+                 for obstacle in chunk_obstacles(chunk_x, row, seed)]
+    for kind, rect in obstacles:
+        rect = rect.move(-chunk_x * CHUNK_SIZE, -top)
+        if kind == "rock":
+            pygame.draw.ellipse(surf, ROCK_GREY, rect)
+            pygame.draw.ellipse(surf, GRAVEL, rect.inflate(-rect.w // 2, -rect.h // 2).move(-4, -4))
+        else:
+            pygame.draw.rect(surf, WAGON_RED, rect, border_radius=4)
+            pygame.draw.rect(surf, TIE_BROWN, rect.inflate(-12, -12), 3)
+            for wheel_x in (rect.left + 20, rect.right - 20):
+                for wheel_y in (rect.top, rect.bottom):
+                    pygame.draw.circle(surf, RAIL_STEEL, (wheel_x, wheel_y), 7)
+    return surf
+
+
+class ChunkCache:
+    """LRU cache of pre-rendered chunk backgrounds
+
+    Capacity is derived from the view size, so memory stays bounded no
+    matter how long the world is.  Each render scale keeps its own
+    entries; chunks for a scale that is no longer drawn age out.
+    """
+
+    def __init__(self, view_width, view_height, seed=0):
+        cols = math.ceil(view_width / CHUNK_SIZE) + 1
+        rows = math.ceil(view_height / CHUNK_SIZE) + 1
+        # Everything the view can touch plus a ring for scrolling back and forth
+        self.capacity = (cols + 2) * (rows + 2)
+        self.seed = seed
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y, scale) -> Surface
+        self.rendered = 0
+
+    def get(self, chunk_x, chunk_y, scale=1.0):
+        key = (chunk_x, chunk_y, scale)
+        surf = self.chunks.get(key)
+        if surf is not None:
+            self.chunks.move_to_end(key)
+            return surf
+
+        surf = render_chunk(chunk_x, chunk_y, self.seed)
+        if scale != 1.0:
+            size = int(CHUNK_SIZE * scale)
+            surf = pygame.transform.smoothscale(surf, (size, size))
+        self.chunks[key] = surf
+        self.rendered += 1
+        while len(self.chunks) > self.capacity:
+            self.chunks.popitem(last=False)
+        return surf
+
+    def draw(self, target, camera, scale=1.0):
+        """Blit the chunks that cover the camera view"""
+        first_x = int(camera.x) // CHUNK_SIZE
+        first_y = int(camera.y) // CHUNK_SIZE
+        last_x = min(WORLD_CHUNKS_X - 1, int(camera.x + camera.width) // CHUNK_SIZE)
+        last_y = min(WORLD_CHUNKS_Y - 1, int(camera.y + camera.height) // CHUNK_SIZE)
+        origin_x = int(camera.x * scale)
+        origin_y = int(camera.y * scale)
+        step = int(CHUNK_SIZE * scale)
+        target.blits([(self.get(cx, cy, scale), (cx * step - origin_x, cy * step - origin_y))
+                      for cy in range(first_y, last_y + 1)
+                      for cx in range(first_x, last_x + 1)], doreturn=False)
+
+    def memory_bytes(self):
+        return sum(s.get_width() * s.get_height() * s.get_bytesize() for s in self.chunks.values())